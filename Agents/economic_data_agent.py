@@ -1,4 +1,5 @@
 import os
+import sys
 import time
 import logging
 from datetime import datetime, timezone, timedelta
@@ -9,6 +10,10 @@ from firebase_admin import credentials, firestore
 from dotenv import load_dotenv
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.cache import cached
+
 # Load environment variables
 load_dotenv()
 
@@ -75,9 +80,10 @@ def is_cache_valid(doc_ref) -> bool:
     wait=wait_exponential(multiplier=1, min=2, max=10),
     retry=retry_if_exception_type(Exception)
 )
+@cached("yf_info")
 def fetch_yahoo_info(stock_ticker: str) -> dict:
     """
-    Fetch ticker.info from yfinance with retry/backoff.
+    Fetch ticker.info from yfinance with retry/backoff (disk-cached, see utils.cache).
     """
     ticker = yf.Ticker(stock_ticker)
     return ticker.info
@@ -0,0 +1,309 @@
+# Model-side FinBERT helpers shared by sentiment_agent, offline rescoring and
+# the benchmarks. Nothing in here touches Firestore.
+import os
+import hashlib
+import multiprocessing as mp
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+
+from utils.cache import CACHE_ROOT, get_cache
+from utils.model_registry import configure_torch, get_model, register_model
+
+FINBERT_MODEL            = "ProsusAI/finbert"
+SNIPPET_CHARS            = 512          # chars of content fed to FinBERT
+MAX_TOKENS               = 512
+DEFAULT_INFERENCE_BATCH  = 32
+SENTIMENT_CACHE_SIZE     = 256 * 2**20  # bytes, LRU-evicted
+
+# torch (eager PyTorch) | onnx (ONNX Runtime fp32) | onnx-int8 (dynamic quantisation)
+FINBERT_BACKENDS = ("torch", "onnx", "onnx-int8")
+FINBERT_BACKEND  = os.getenv("FINBERT_BACKEND", "torch")
+ONNX_DIR         = os.path.join(CACHE_ROOT, "onnx", "finbert")
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Backends
+# ─────────────────────────────────────────────────────────────────────────────
+def model_id(backend: str = FINBERT_BACKEND) -> str:
+    """Cache/report id – int8 scores differ slightly, so backends never share."""
+    return FINBERT_MODEL if backend == "torch" else f"{FINBERT_MODEL}@{backend}"
+
+
+def _export_onnx(tokenizer) -> str:
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+
+    fp32_dir = os.path.join(ONNX_DIR, "fp32")
+    if not os.path.exists(os.path.join(fp32_dir, "model.onnx")):
+        print(f"📦 Exporting {FINBERT_MODEL} to ONNX → {fp32_dir}")
+        model = ORTModelForSequenceClassification.from_pretrained(FINBERT_MODEL, export=True)
+        model.save_pretrained(fp32_dir)
+        tokenizer.save_pretrained(fp32_dir)
+    return fp32_dir
+
+
+def _quantize_onnx(fp32_dir: str, tokenizer) -> str:
+    from optimum.onnxruntime import ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    int8_dir = os.path.join(ONNX_DIR, "int8")
+    if not os.path.exists(os.path.join(int8_dir, "model_quantized.onnx")):
+        print(f"📦 Quantising ONNX graph to int8 → {int8_dir}")
+        quantizer = ORTQuantizer.from_pretrained(fp32_dir)
+        qconfig   = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+        quantizer.quantize(save_dir=int8_dir, quantization_config=qconfig)
+        tokenizer.save_pretrained(int8_dir)
+    return int8_dir
+
+
+def build_sentiment_pipeline(backend: str = FINBERT_BACKEND, num_threads: Optional[int] = None):
+    """
+    FinBERT text-classification pipeline on the requested backend. The ONNX
+    variants are exported/quantised once into .cache/onnx and reused; they
+    need the optional `optimum[onnxruntime]` extra. `num_threads` caps the
+    ONNX Runtime intra-op pool (torch threads are set by the caller).
+    """
+    from transformers import AutoTokenizer, pipeline
+
+    if backend not in FINBERT_BACKENDS:
+        raise ValueError(f"Unknown FINBERT_BACKEND {backend!r}; pick one of {FINBERT_BACKENDS}.")
+    if backend == "torch":
+        return pipeline("sentiment-analysis", model=FINBERT_MODEL)
+
+    try:
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+    except ImportError as e:
+        raise ImportError(
+            f"FINBERT_BACKEND={backend!r} needs `pip install optimum[onnxruntime]`."
+        ) from e
+
+    session_options = None
+    if num_threads:
+        import onnxruntime
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = num_threads
+        session_options.inter_op_num_threads = 1
+
+    tokenizer = AutoTokenizer.from_pretrained(FINBERT_MODEL)
+    fp32_dir  = _export_onnx(tokenizer)
+    if backend == "onnx":
+        model = ORTModelForSequenceClassification.from_pretrained(
+            fp32_dir, session_options=session_options)
+    else:
+        int8_dir = _quantize_onnx(fp32_dir, tokenizer)
+        model = ORTModelForSequenceClassification.from_pretrained(
+            int8_dir, file_name="model_quantized.onnx", session_options=session_options)
+    return pipeline("sentiment-analysis", model=model, tokenizer=tokenizer)
+
+
+def _load_finbert():
+    configure_torch()
+    return build_sentiment_pipeline(FINBERT_BACKEND)
+
+
+register_model("finbert", _load_finbert)
+
+def get_sentiment_pipeline():
+    """Process-wide FinBERT pipeline, loaded on first use (see utils.model_registry)."""
+    return get_model("finbert")
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Length bucketing
+# ─────────────────────────────────────────────────────────────────────────────
+def token_lengths(tokenizer, snippets: Sequence[str]) -> List[int]:
+    """Token count per snippet (one batched tokenizer call, truncated)."""
+    enc = tokenizer(list(snippets), truncation=True, max_length=MAX_TOKENS)
+    return [len(ids) for ids in enc["input_ids"]]
+
+
+def length_buckets(lengths: Sequence[int], batch_size: int) -> List[List[int]]:
+    """
+    Indices grouped into batches of similar token length, so each forward
+    pass pads to roughly its own longest item instead of the global max.
+    """
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Scoring
+# ─────────────────────────────────────────────────────────────────────────────
+def normalize_result(result: Dict) -> Tuple[str, float]:
+    return (result.get("label", "Neutral").capitalize(),
+            round(float(result.get("score", 0.0)), 4))
+
+
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=2, max=8),
+    retry=retry_if_exception_type(Exception),
+    reraise=True
+)
+def _run_batch(pipe, batch: List[str]) -> List[Dict]:
+    return pipe(batch, batch_size=len(batch), truncation=True, max_length=MAX_TOKENS)
+
+
+def score_snippets(pipe, snippets: Sequence[str],
+                   batch_size: int = DEFAULT_INFERENCE_BATCH) -> List[Optional[Tuple[str, float]]]:
+    """
+    Score `snippets` with a text-classification pipeline in length-bucketed
+    batches. Returns (label, score) per input, in input order; None where
+    inference failed even after retrying the item on its own.
+    """
+    snippets = [s[:SNIPPET_CHARS] for s in snippets]
+    results: List[Optional[Tuple[str, float]]] = [None] * len(snippets)
+    if not snippets:
+        return results
+
+    lengths = token_lengths(pipe.tokenizer, snippets)
+    for idx in length_buckets(lengths, max(1, batch_size)):
+        batch = [snippets[i] for i in idx]
+        try:
+            out = _run_batch(pipe, batch)
+        except Exception as e:
+            print(f"⚠️ Batch of {len(batch)} failed ({e}); retrying one by one.")
+            out = []
+            for text in batch:
+                try:
+                    out.append(_run_batch(pipe, [text])[0])
+                except Exception as item_err:
+                    print(f"❌ Error analyzing sentiment: {item_err}")
+                    out.append(None)
+        for i, res in zip(idx, out):
+            results[i] = normalize_result(res) if res else None
+    return results
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Content-hash keyed sentiment cache
+# ─────────────────────────────────────────────────────────────────────────────
+def normalize_snippet(text: str) -> str:
+    """Exactly what FinBERT sees, minus casing/whitespace (the model is uncased)."""
+    return " ".join(text[:SNIPPET_CHARS].split()).lower()
+
+
+class SentimentCache:
+    """
+    Persistent (label, score) cache keyed by model id + sha256 of the
+    normalised snippet, so reposts, re-ingestion and offline rescoring never
+    pay for the same text twice. Backed by diskcache under .cache/sentiment.
+    """
+    def __init__(self, model_id: str = FINBERT_MODEL,
+                 size_limit: int = SENTIMENT_CACHE_SIZE):
+        self.model_id = model_id
+        self._cache   = get_cache("sentiment", size_limit)
+        self.hits     = 0
+        self.misses   = 0
+
+    def key(self, snippet: str) -> str:
+        digest = hashlib.sha256(normalize_snippet(snippet).encode("utf-8")).hexdigest()
+        return f"{self.model_id}:{digest}"
+
+    def get(self, snippet: str) -> Optional[Tuple[str, float]]:
+        value = self._cache.get(self.key(snippet))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, snippet: str, result: Tuple[str, float]) -> None:
+        self._cache.set(self.key(snippet), tuple(result))
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def report(self) -> str:
+        return (f"🗃️ Sentiment cache: {self.hits} hit(s), {self.misses} miss(es) "
+                f"({self.hit_rate():.1%} hit rate)")
+
+
+def score_snippets_cached(pipe, snippets: Sequence[str], cache: SentimentCache,
+                          batch_size: int = DEFAULT_INFERENCE_BATCH) -> List[Optional[Tuple[str, float]]]:
+    """
+    `score_snippets`, but only cache misses reach the model. `pipe=None`
+    means the shared FinBERT pipeline, loaded only if something misses.
+    """
+    results = [cache.get(s) for s in snippets]
+    todo: Dict[str, List[int]] = {}          # cache key → indices (dedup within call)
+    for i, r in enumerate(results):
+        if r is None:
+            todo.setdefault(cache.key(snippets[i]), []).append(i)
+    if todo:
+        firsts = [idx[0] for idx in todo.values()]
+        fresh  = score_snippets(pipe or get_sentiment_pipeline(),
+                                [snippets[i] for i in firsts], batch_size)
+        for idx, result in zip(todo.values(), fresh):
+            if result:
+                cache.set(snippets[idx[0]], result)
+                for i in idx:
+                    results[i] = result
+    return results
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Sharded multi-process scoring
+# ─────────────────────────────────────────────────────────────────────────────
+WORKER_MEMORY_GB = 1.5          # FinBERT fp32 + tokenizer + activations, per worker
+
+_worker_pipe  = None
+_worker_cache = None
+_worker_batch = DEFAULT_INFERENCE_BATCH
+
+
+def default_workers(memory_per_worker_gb: float = WORKER_MEMORY_GB) -> int:
+    """One worker per core, capped by available RAM where the OS reports it."""
+    cores = os.cpu_count() or 1
+    try:
+        avail = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / 2**30
+        return max(1, min(cores, int(avail // memory_per_worker_gb)))
+    except (AttributeError, ValueError, OSError):       # e.g. Windows
+        return max(1, cores // 2)
+
+
+def _init_worker(backend: str, threads: int, batch_size: int) -> None:
+    # pin BLAS/OpenMP pools before torch is imported so workers don't oversubscribe
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    import torch
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+    configure_torch()
+
+    global _worker_pipe, _worker_cache, _worker_batch
+    _worker_pipe  = build_sentiment_pipeline(backend, num_threads=threads)
+    _worker_cache = SentimentCache(model_id(backend))
+    _worker_batch = batch_size
+
+
+def _score_shard(shard: List[Tuple[str, str]]):
+    """→ (results, cache hits, cache misses) for this shard."""
+    ids      = [doc_id for doc_id, _ in shard]
+    snippets = [text for _, text in shard]
+    hits, misses = _worker_cache.hits, _worker_cache.misses
+    results = list(zip(ids, score_snippets_cached(_worker_pipe, snippets,
+                                                  _worker_cache, _worker_batch)))
+    return results, _worker_cache.hits - hits, _worker_cache.misses - misses
+
+
+def score_sharded(items: Sequence[Tuple[str, str]], workers: Optional[int] = None,
+                  shard_size: int = 256, batch_size: int = DEFAULT_INFERENCE_BATCH,
+                  backend: str = FINBERT_BACKEND,
+                  stats: Optional[SentimentCache] = None) -> Iterator[Tuple[str, Optional[Tuple[str, float]]]]:
+    """
+    Score (doc_id, snippet) pairs across `workers` processes. Each worker
+    loads FinBERT once with torch/ORT threads pinned to cores // workers,
+    and results stream back shard by shard (completion order) so the caller
+    can commit while the pool keeps working. Workers keep their own
+    SentimentCache; their hit/miss counts are added to `stats` if given.
+    """
+    workers = workers or default_workers()
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    shards  = [list(items[i:i + shard_size]) for i in range(0, len(items), shard_size)]
+    if not shards:
+        return
+    ctx = mp.get_context("spawn")           # fork + torch threads is unsafe
+    with ctx.Pool(min(workers, len(shards)), initializer=_init_worker,
+                  initargs=(backend, threads, batch_size)) as pool:
+        for results, hits, misses in pool.imap_unordered(_score_shard, shards):
+            if stats is not None:
+                stats.hits   += hits
+                stats.misses += misses
+            yield from results
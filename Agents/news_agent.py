@@ -1,23 +1,24 @@
-import os, sys, requests, time
+import os, sys, requests, time, asyncio
+import httpx
 from datetime import datetime, timezone
 import firebase_admin
 from firebase_admin import firestore, credentials
 from dotenv import load_dotenv
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-import tensorflow as tf, torch
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type, retry_if_exception
 
 # ──────────────────────────────── house-keeping ─────────────────────────────
-os.environ["TF_ENABLE_ONEDNN_OPTS"] = "0"
-tf.compat.v1.logging.set_verbosity(tf.compat.v1.logging.ERROR)
-torch._C._jit_set_profiling_executor(False)
-torch._C._jit_set_profiling_mode(False)
-
 load_dotenv()
 NEWS_API_KEY = os.getenv("NEWS_API_KEY")
 
 # let other modules import this package easily
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+from utils.cache import cached, make_key, http_get, http_set
+from utils.near_dup import get_index, save_index, article_text
+from utils.news_urls import canonicalize_url, news_doc_id
+from utils.rate_limit import NewsQuotaExhausted, TokenBucket
+from Agents.retrieval_agent import index_articles, save_indexes
+
 # ─────────────────────────────── Firebase init ──────────────────────────────
 def initialize_firebase() -> firestore.Client:
     cred_paths = [
@@ -50,17 +51,25 @@ def build_stock_mapping():
 STOCK_MAPPING = build_stock_mapping()
 
 # ─────────────────────────── NewsAPI w/ retry logic ─────────────────────────
+NEWSAPI_URL            = "https://newsapi.org/v2/everything"
+NEWSAPI_MAX_PAGE_SIZE  = 100         # hard cap per request
+NEWSAPI_RATE_PER_SEC   = float(os.getenv("NEWSAPI_RATE_PER_SEC", "1.0"))
+NEWSAPI_BURST          = int(os.getenv("NEWSAPI_BURST", "5"))
+NEWSAPI_DAILY_QUOTA    = int(os.getenv("NEWSAPI_DAILY_QUOTA", "100"))   # developer plan
+NEWSAPI_MAX_CONCURRENCY = 8
+
 @retry(
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, min=2, max=10),
     retry=retry_if_exception_type(requests.exceptions.RequestException)
 )
+@cached("newsapi")
 def fetch_news_articles(keywords, page_size=10):
     if not NEWS_API_KEY:
         raise RuntimeError("NEWS_API_KEY not set in environment.")
     query = " OR ".join(keywords)
     resp  = requests.get(
-        "https://newsapi.org/v2/everything",
+        NEWSAPI_URL,
         params={
             "q": query,
             "apiKey": NEWS_API_KEY,
@@ -73,62 +82,244 @@ def fetch_news_articles(keywords, page_size=10):
     resp.raise_for_status()
     return resp.json().get("articles", [])
 
+# ───────────────────── async multi-ticker fetcher ──────────────────────────
+def _is_server_error(err: BaseException) -> bool:
+    return isinstance(err, httpx.HTTPStatusError) and err.response.status_code >= 500
+
+
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=2, max=10),
+    retry=retry_if_exception_type(httpx.TransportError) | retry_if_exception(_is_server_error),
+    reraise=True
+)
+async def _fetch_news_page(client, bucket, query, page, page_size):
+    key = make_key(query, page, page_size)
+    if (hit := http_get("newsapi", key)) is not None:
+        return hit
+
+    await bucket.acquire()
+    resp = await client.get(
+        NEWSAPI_URL,
+        params={
+            "q": query,
+            "apiKey": NEWS_API_KEY,
+            "language": "en",
+            "sortBy": "publishedAt",
+            "pageSize": page_size,
+            "page": page
+        }
+    )
+    if resp.status_code == 429:
+        bucket.exhaust()
+        raise NewsQuotaExhausted("NewsAPI rate limit hit (429).")
+    # developer plans stop at 100 results → 426 maximumResultsReached
+    if resp.status_code == 426 and resp.json().get("code") == "maximumResultsReached":
+        return [], 0
+    resp.raise_for_status()         # 5xx (often an HTML body) → HTTPStatusError, retried
+    body = resp.json()
+    result = (body.get("articles", []), body.get("totalResults", 0))
+    http_set("newsapi", key, result)
+    return result
+
+
+async def _fetch_ticker_news(client, bucket, keywords, budget):
+    query     = " OR ".join(keywords)
+    page_size = min(NEWSAPI_MAX_PAGE_SIZE, budget)   # constant → stable page offsets
+    articles, page = [], 1
+    while len(articles) < budget:
+        batch, total = await _fetch_news_page(client, bucket, query, page, page_size)
+        articles.extend(batch)
+        if len(batch) < page_size or page * page_size >= total:
+            break
+        page += 1
+    return articles[:budget]
+
+
+async def fetch_news_for_tickers(tickers, per_ticker_budget: int = 20,
+                                 max_concurrency: int = NEWSAPI_MAX_CONCURRENCY):
+    """
+    Fetch up to `per_ticker_budget` articles for every ticker concurrently,
+    following `page` cursors. `tickers` is a list of symbols or a
+    {ticker: [keywords]} dict. All requests draw from one TokenBucket, so the
+    NewsAPI quota holds across tickers; wall time tracks the slowest ticker.
+
+    Returns {ticker: [raw NewsAPI article]} – each list can be passed straight
+    to `process_articles(keywords, articles=...)`. A ticker whose fetch did
+    not complete (quota / 429, errors after retries) maps to None, not [];
+    the pages it did get stay in the HTTP cache for the retry.
+    """
+    if not NEWS_API_KEY:
+        raise RuntimeError("NEWS_API_KEY not set in environment.")
+    if not isinstance(tickers, dict):
+        tickers = {t: [t] for t in tickers}
+
+    bucket = TokenBucket(NEWSAPI_RATE_PER_SEC, NEWSAPI_BURST, NEWSAPI_DAILY_QUOTA)
+    limits = httpx.Limits(max_connections=max_concurrency)
+    async with httpx.AsyncClient(timeout=10, limits=limits) as client:
+        results = await asyncio.gather(
+            *(_fetch_ticker_news(client, bucket, kw, per_ticker_budget)
+              for kw in tickers.values()),
+            return_exceptions=True
+        )
+
+    out = {}
+    for ticker, res in zip(tickers, results):
+        if isinstance(res, Exception):
+            print(f"❌ NewsAPI fetch failed for {ticker}: {res}")
+            res = None
+        out[ticker] = res
+    print(f"📰 Fetched {sum(len(a or []) for a in out.values())} article(s) for "
+          f"{len(out)} ticker(s) using {bucket.used} request(s).")
+    return out
+
+
+def fetch_news_batch(tickers, per_ticker_budget: int = 20):
+    """Synchronous wrapper around `fetch_news_for_tickers`."""
+    return asyncio.run(fetch_news_for_tickers(tickers, per_ticker_budget))
+
+# ─────────────────────────── URL → document id ─────────────────────────────
+FIRESTORE_BATCH_LIMIT = 500          # max writes per WriteBatch
+FIRESTORE_IN_LIMIT    = 30           # max values in an `in` filter
+LEGACY_URL_LOOKUP     = True         # also match docs stored under auto-IDs
+
+
+def _find_legacy_docs(urls):
+    """
+    Look up pre-hash documents (auto-generated IDs) by their `url` field,
+    30 URLs per `in` query. Returns ({url: DocumentReference}, queries_run).
+    """
+    found, queries = {}, 0
+    for i in range(0, len(urls), FIRESTORE_IN_LIMIT):
+        chunk = urls[i:i + FIRESTORE_IN_LIMIT]
+        for snap in db.collection("news").where("url", "in", chunk).get():
+            found.setdefault(snap.to_dict().get("url"), snap.reference)
+        queries += 1
+    return found, queries
+
 # ─────────────────────────── main up-sert function ─────────────────────────
-def process_articles(keywords, page_size: int = 10):
-    print(f"🔎 Fetching news for: {keywords}")
-    articles = fetch_news_articles(keywords, page_size)
+def process_articles(keywords, page_size: int = 10, articles=None, save: bool = True):
+    """
+    Fetch headlines for `keywords` and up-sert them into `news`.
+    Pass `articles` (e.g. one entry of `fetch_news_for_tickers`) to skip
+    the synchronous NewsAPI call. `save=False` leaves the on-disk
+    near-dup / retrieval indexes to one `save_ingest_indexes()` afterwards
+    (parallel ingest).
+
+    Documents are keyed by `news_doc_id(url)`, so dedup is one batched
+    `get_all` over the candidate IDs; inserts and `ingested_at` refreshes
+    share a single write batch. Returns a stats dict incl. round trips saved
+    versus the old per-article query + per-duplicate update approach.
+    """
+    if articles is None:
+        print(f"🔎 Fetching news for: {keywords}")
+        articles = fetch_news_articles(keywords, page_size)
     if not articles:
         print("⚠️  No articles returned from NewsAPI.")
-        return
-
-    new_count  = 0          # newly inserted docs
-    up_count   = 0          # existing docs refreshed
-    batch      = db.batch()
+        return {"new": 0, "refreshed": 0, "round_trips": 0, "round_trips_saved": 0}
 
+    # ── candidate IDs (also collapses in-page duplicates) ─────────────────
+    candidates = {}
     for art in articles:
         url = art.get("url")
-        if not url:
-            continue
+        if url:
+            candidates.setdefault(news_doc_id(url), art)
+    if not candidates:
+        print("⚠️  No articles with a URL returned from NewsAPI.")
+        return {"new": 0, "refreshed": 0, "round_trips": 0, "round_trips_saved": 0}
+
+    news_ref = db.collection("news")
+    refs     = [news_ref.document(doc_id) for doc_id in candidates]
+    existing = {snap.id: snap.reference for snap in db.get_all(refs) if snap.exists}
+    round_trips = 1
+
+    # ── fall back to `url ==` matching for docs written before hash IDs ───
+    if LEGACY_URL_LOOKUP:
+        missing = [candidates[i]["url"] for i in candidates if i not in existing]
+        legacy, queries = _find_legacy_docs(missing) if missing else ({}, 0)
+        round_trips += queries
+        for doc_id, art in candidates.items():
+            if art["url"] in legacy:
+                existing[doc_id] = legacy[art["url"]]
+
+    now     = datetime.now(timezone.utc)     # stored as a native Firestore timestamp
+    tag     = keywords[0].strip().upper()
+    econ_id = STOCK_MAPPING.get(tag.lower(), tag)
 
-        now_iso = datetime.now(timezone.utc).isoformat()
-        snap    = db.collection("news").where("url", "==", url).limit(1).get()
+    dedup     = get_index()
+    new_count = 0           # newly inserted docs
+    up_count  = 0           # existing docs refreshed
+    dup_count = 0           # near-duplicates of an already indexed story
+    commits   = 0
+    pending   = 0
+    batch     = db.batch()
+    inserted  = []          # (doc_id, payload) for the retrieval index
 
+    for doc_id, art in candidates.items():
         # ── existing headline → refresh ingested_at only ───────────────────
-        if snap:
-            db.collection("news").document(snap[0].id).update({"ingested_at": now_iso})
+        if doc_id in existing:
+            batch.update(existing[doc_id], {"ingested_at": now})
             up_count += 1
-            continue
-
         # ── brand-new headline → build full payload ────────────────────────
-        tag     = keywords[0].strip().upper()
-        econ_id = STOCK_MAPPING.get(tag.lower(), tag)
-
-        payload = {
-            "title":          art.get("title"),
-            "content":        art.get("content"),
-            "url":            url,
-            "timestamp":      art.get("publishedAt"),       # original pub-date
-            "ingested_at":    now_iso,                      # first seen now
-            "source":         art.get("source", {}).get("name"),
-            "keywords":       [k.lower().strip() for k in keywords],
-            "economic_data_id": econ_id,
-            "sentiment_label":  None,
-            "sentiment_score":  None,
-            "analyzed_at":      None
-        }
-        doc_ref = db.collection("news").document()
-        batch.set(doc_ref, payload)
-        new_count += 1
+        else:
+            dup_of = dedup.match_or_add(
+                doc_id, article_text(art.get("title"), art.get("content")))
+            dup_count += dup_of is not None
+            payload = {
+                "title":          art.get("title"),
+                "content":        art.get("content"),
+                "url":            art.get("url"),
+                "timestamp":      art.get("publishedAt"),       # original pub-date
+                "ingested_at":    now,                          # first seen now
+                "source":         (art.get("source") or {}).get("name"),
+                "keywords":       [k.lower().strip() for k in keywords],
+                "economic_data_id": econ_id,
+                "linked_at":        None,                   # set by daily_run's link stage
+                "duplicate_of":     dup_of,                 # canonical repost source
+                "cluster_id":       dup_of or doc_id,
+                "sentiment_label":  None,
+                "sentiment_score":  None,
+                "analyzed_at":      None,
+                "needs_sentiment":  True                    # pending-work flag
+            }
+            batch.set(news_ref.document(doc_id), payload)
+            inserted.append((doc_id, payload))
+            new_count += 1
 
-        if new_count % 500 == 0:
+        pending += 1
+        if pending == FIRESTORE_BATCH_LIMIT:
             batch.commit()
-            batch = db.batch()
+            commits += 1
+            batch, pending = db.batch(), 0
 
-    if new_count % 500 != 0:
+    if pending:
         batch.commit()
+        commits += 1
+    round_trips += commits
+    if save:
+        save_index()
+    try:
+        index_articles(inserted, save=save)
+    except Exception as e:
+        print(f"⚠️  Retrieval index not updated ({e}); run `python -m Agents.retrieval_agent build`.")
+
+    # old path: one query per article + one update per duplicate + insert commits
+    legacy_trips = len(candidates) + up_count + -(-new_count // FIRESTORE_BATCH_LIMIT)
+    saved = max(legacy_trips - round_trips, 0)
+
+    print(f"✅ Stored {new_count} new article(s) ({dup_count} near-duplicate); "
+          f"🕑 refreshed {up_count} existing doc(s); "
+          f"⚡ {round_trips} round trip(s), saved {saved}.")
+    return {"new": new_count, "refreshed": up_count, "near_duplicates": dup_count,
+            "round_trips": round_trips, "round_trips_saved": saved}
 
-    print(f"✅ Stored {new_count} new article(s); "
-          f"🕑 refreshed {up_count} existing doc(s).")
+def save_ingest_indexes():
+    """Persist the near-dup and retrieval indexes after `process_articles(save=False)`."""
+    save_index()
+    try:
+        save_indexes()
+    except Exception as e:
+        print(f"⚠️  Retrieval index not saved ({e}).")
 
 # ──────────────────────────────── CLI helper ────────────────────────────────
 if __name__ == "__main__":
@@ -0,0 +1,161 @@
+import os
+import re
+import hashlib
+import functools
+from typing import Dict, List, Tuple
+
+from utils.cache import make_key
+from utils.sentiment_agg import aggregate, to_columns
+
+# ─────────────────────────────────────────────────────────────────────────────
+# RAG prompt construction & parsing (no Firestore / OpenAI imports)
+# ─────────────────────────────────────────────────────────────────────────────
+GPT_MODEL            = "gpt-4o-mini"
+CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKENS", "600"))   # article lines only
+SUMMARY_CHARS        = 300
+HEADLINE_MERGE_JACCARD = 0.8      # title token overlap to treat two headlines as one
+
+# persistent LLM response cache (shared by the sync and batch paths)
+LLM_CACHE_SIZE       = int(os.getenv("LLM_CACHE_SIZE_MB", "128")) * 2**20
+LLM_CACHE_TTL        = int(os.getenv("LLM_CACHE_TTL")) if os.getenv("LLM_CACHE_TTL") else None
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Token counting
+# ─────────────────────────────────────────────────────────────────────────────
+@functools.lru_cache(maxsize=None)
+def _encoding(model: str):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str, model: str = GPT_MODEL) -> int:
+    """tiktoken count for `model`; ≈ chars/4 when tiktoken is not installed."""
+    enc = _encoding(model)
+    return len(enc.encode(text)) if enc else -(-len(text) // 4)
+
+
+def llm_cache_key(prompt: str, model: str, **params) -> str:
+    """Model + sha256(prompt) + generation params."""
+    return make_key(model, hashlib.sha256(prompt.encode("utf-8")).hexdigest(), params)
+
+
+def aggregate_sentiment(documents: List[dict]) -> Tuple[str, Dict[str, float]]:
+    """
+    Sum FinBERT scores per label (each repost cluster counts once) and
+    derive the aggregator signal – ONLY Buy or Sell.
+    """
+    summary = aggregate(to_columns(documents))["sums"]
+    agg = "Buy" if summary["positive"] >= summary["negative"] else "Sell"
+    return agg, summary
+
+
+def _usable_summary(doc: dict) -> str:
+    summary = doc.get("summary")
+    if not isinstance(summary, str) or summary.startswith(("Error during summarization",
+                                                           "No content to summarize")):
+        return ""
+    summary = " ".join(summary.split())
+    return summary if len(summary) <= SUMMARY_CHARS else summary[:SUMMARY_CHARS].rsplit(" ", 1)[0] + "…"
+
+
+def merge_headlines(documents: List[dict]) -> List[List[dict]]:
+    """
+    Group reposts: same `cluster_id` or title token Jaccard ≥ threshold.
+    Groups keep the input (ranking) order; each group's first doc leads.
+    """
+    groups: List[List[dict]] = []
+    keys: List[Tuple[object, frozenset]] = []
+    for d in documents:
+        words = frozenset(_WORD.findall(str(d.get("title") or "").lower()))
+        cluster = d.get("cluster_id")
+        for (g_cluster, g_words), group in zip(keys, groups):
+            same_cluster = cluster and cluster == g_cluster
+            overlap = len(words & g_words) / len(words | g_words) if words and g_words else 0.0
+            if same_cluster or overlap >= HEADLINE_MERGE_JACCARD:
+                group.append(d)
+                break
+        else:
+            groups.append([d])
+            keys.append((cluster, words))
+    return groups
+
+
+def _context_line(group: List[dict], with_summary: bool) -> str:
+    d = group[0]
+    title = d.get("title", "No Title")
+    score = float(d.get("sentiment_score") or 0.0)
+    label = d.get("sentiment_label", "Neutral")
+    more  = f" [+{len(group) - 1} similar]" if len(group) > 1 else ""
+    line  = f"- {title}{more} (**{score:.4f}**, {label})"
+    summary = _usable_summary(d) if with_summary else ""
+    return f"{line} — {summary}" if summary else line
+
+
+def pack_context(documents: List[dict], budget: int = CONTEXT_TOKEN_BUDGET,
+                 model: str = GPT_MODEL) -> Tuple[str, Dict[str, int]]:
+    """
+    Fill `budget` tokens with article lines in ranking order: near-identical
+    headlines are merged, stored summaries are used when they fit, and a
+    line that does not fit with its summary is retried title-only.
+    """
+    groups = merge_headlines(documents)
+    lines, used = [], 0
+    for group in groups:
+        for with_summary in (True, False):
+            line = _context_line(group, with_summary)
+            cost = count_tokens(line + "\n", model)
+            if used + cost <= budget:
+                lines.append(line)
+                used += cost
+                break
+    stats = {"articles": len(documents), "groups": len(groups), "lines": len(lines),
+             "merged": len(documents) - len(groups), "context_tokens": used, "budget": budget}
+    return "\n".join(lines), stats
+
+
+def build_prompt_with_stats(agg: str, documents: List[dict], budget: int = CONTEXT_TOKEN_BUDGET,
+                            model: str = GPT_MODEL) -> Tuple[str, Dict[str, int]]:
+    """Strict analyst prompt over a token-budgeted context; only allows Buy or Sell."""
+    ctx, stats = pack_context(documents, budget, model)
+    prompt = (
+        "You are a seasoned financial analyst.\n\n"
+        f"Aggregator signal (Buy/Sell): {agg}\n\n"
+        "Top articles (title, bold score, label — summary where available):\n"
+        f"{ctx}\n\n"
+        "Answer in exactly this format:\n"
+        "Recommendation: <Buy or Sell>  (one sentence)\n"
+        "Reasoning:\n"
+        "- <Title 1> (**X.XXXX**, Label): …how this supports your view\n"
+        "- <Title 2> (**Y.YYYY**, Label): …how this supports your view"
+    )
+    stats["prompt_tokens"] = count_tokens(prompt, model)
+    return prompt, stats
+
+
+def build_prompt(agg: str, documents: List[dict], budget: int = CONTEXT_TOKEN_BUDGET,
+                 model: str = GPT_MODEL) -> str:
+    return build_prompt_with_stats(agg, documents, budget, model)[0]
+
+
+def parse_gpt_output(out: str, agg: str) -> Tuple[str, str]:
+    """
+    (recommendation, reasoning) from a model answer. Anything other than
+    Buy/Sell falls back to the aggregator; reasoning keeps the first two bullets.
+    """
+    rec_line = next((l for l in out.splitlines()
+                     if l.lower().startswith("recommendation:")), "")
+    rec = rec_line.split(":", 1)[-1].strip().capitalize()
+    if rec not in ("Buy", "Sell"):
+        rec = agg
+
+    bullets = [l for l in out.splitlines() if l.strip().startswith("- ")]
+    reasoning = "\n".join(bullets[:2]) if bullets else "No reasoning."
+    return rec, reasoning
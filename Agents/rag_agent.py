@@ -1,14 +1,28 @@
 import os
+import sys
+import time
+import random
+import threading
 from datetime import datetime
 from dotenv import load_dotenv
 import yfinance as yf
 import firebase_admin
 from firebase_admin import firestore, credentials
-from openai import OpenAI
+from openai import OpenAI, RateLimitError as OpenAIRateLimitError
 from httpx import ReadTimeout
 import logging
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.cache import get_cache
+from Agents.prompt_builder import (
+    GPT_MODEL, LLM_CACHE_SIZE, LLM_CACHE_TTL, aggregate_sentiment, build_prompt_with_stats,
+    llm_cache_key, parse_gpt_output
+)
+from Agents.retrieval_agent import select_context
+from utils.vector_index import to_epoch
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Load environment variables & initialize OpenAI client
 # ─────────────────────────────────────────────────────────────────────────────
@@ -91,83 +105,174 @@ def fetch_closing_prices(stock_ticker: str):
 # ─────────────────────────────────────────────────────────────────────────────
 # Fetch related news from Firestore
 # ─────────────────────────────────────────────────────────────────────────────
-def fetch_related_news(stock_ticker: str):
+RELATED_NEWS_MAX         = 50      # articles handed to the RAG step
+RELATED_NEWS_WINDOW_DAYS = 7
+RELATED_NEWS_CHUNK       = 100     # refs per get_all round trip
+# only what aggregation, context ranking and the prompt read; `content` keeps
+# on-the-fly embeddings title+content like the indexed vectors (NewsAPI truncates it)
+RAG_NEWS_FIELDS = ["title", "content", "summary", "sentiment_label", "sentiment_score",
+                   "cluster_id", "timestamp", "ingested_at", "economic_data_id"]
+
+def fetch_related_news(stock_ticker: str, max_articles: int = RELATED_NEWS_MAX,
+                       window_days: float = RELATED_NEWS_WINDOW_DAYS):
     """
-    Pull all news articles linked to the given economic_data document.
+    Up to `max_articles` news articles linked to the given economic_data
+    document and ingested within the last `window_days`, newest first.
+
+    `linked_news_ids` is walked from the end (mostly newest) in batched,
+    field-projected `get_all` calls until `max_articles` in-window docs are
+    found or the ids run out. Its order is not strictly by ingestion time –
+    the entity linker appends older ids after newer ones – so an
+    out-of-window chunk does not end the walk.
     """
-    econ_doc = db.collection("latest_economic_data").document(stock_ticker).get()
+    econ_doc = db.collection("latest_economic_data").document(stock_ticker) \
+                 .get(field_paths=["linked_news_ids"])
     if not econ_doc.exists:
         print(f"⚠️ No economic data for {stock_ticker}")
         return []
-    linked_ids = econ_doc.to_dict().get("linked_news_ids", [])
+    linked_ids = list(dict.fromkeys(reversed(econ_doc.to_dict().get("linked_news_ids", []))))
+    cutoff = time.time() - window_days * 86400
+
+    news_ref = db.collection("news")
     articles = []
-    for nid in linked_ids:
-        ndoc = db.collection("news").document(nid).get()
-        if ndoc.exists:
-            articles.append(ndoc.to_dict())
-    return articles
+    for i in range(0, len(linked_ids), RELATED_NEWS_CHUNK):
+        refs = [news_ref.document(nid) for nid in linked_ids[i:i + RELATED_NEWS_CHUNK]]
+        for snap in db.get_all(refs, field_paths=RAG_NEWS_FIELDS):
+            if not snap.exists:
+                continue
+            doc = snap.to_dict()
+            ts = to_epoch(doc.get("ingested_at") or doc.get("timestamp"))
+            if ts >= cutoff:
+                articles.append({**doc, "id": snap.id, "__ts": ts})
+        if len(articles) >= max_articles:
+            break
+
+    articles.sort(key=lambda d: d["__ts"], reverse=True)
+    return [{k: v for k, v in d.items() if k != "__ts"} for d in articles[:max_articles]]
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Persistent LLM response cache
+# ─────────────────────────────────────────────────────────────────────────────
+LLM_FORCE_REFRESH  = os.getenv("LLM_FORCE_REFRESH", "0") == "1"
+
+LLM_MAX_RETRIES    = 6
+
+_llm_stats = {"hits": 0, "misses": 0, "prompt_tokens": 0, "completion_tokens": 0}
+_stats_lock = threading.Lock()
+
+class RateLimitGate:
+    """
+    Process-wide pause shared by every worker thread: one 429 pushes
+    `resume_at` forward and all callers wait it out before their next request.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._resume_at = 0.0
+
+    def wait(self):
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def trip(self, delay: float):
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + delay)
+
+_rate_gate = RateLimitGate()
+
+def _retry_after(err: Exception, attempt: int) -> float:
+    """Honour the server's Retry-After header, else exponential backoff + jitter."""
+    response = getattr(err, "response", None)
+    header = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(header)
+    except (TypeError, ValueError):
+        return min(60.0, 2 ** attempt) + random.uniform(0, 1)
+
+def chat_completion(prompt: str, model: str = GPT_MODEL, max_tokens: int = 200,
+                    temperature: float = 0, timeout: float = 15,
+                    force_refresh: bool = LLM_FORCE_REFRESH) -> str:
+    """
+    Single-turn chat completion, served from the on-disk cache when the same
+    (model, prompt, params) was answered before. `force_refresh` skips the
+    lookup and overwrites the entry.
+    """
+    cache = get_cache("llm", LLM_CACHE_SIZE)
+    key = llm_cache_key(prompt, model, max_tokens=max_tokens, temperature=temperature)
+    if not force_refresh:
+        hit = cache.get(key)
+        if hit is not None:
+            with _stats_lock:
+                _llm_stats["hits"] += 1
+            return hit
+    with _stats_lock:
+        _llm_stats["misses"] += 1
+
+    for attempt in range(LLM_MAX_RETRIES):
+        _rate_gate.wait()
+        try:
+            resp = client.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                timeout=timeout
+            )
+            break
+        except OpenAIRateLimitError as e:
+            if attempt == LLM_MAX_RETRIES - 1:
+                raise
+            delay = _retry_after(e, attempt)
+            logging.warning(f"⏳ OpenAI 429 – pausing all workers for {delay:.1f}s")
+            _rate_gate.trip(delay)
+    out = resp.choices[0].message.content.strip()
+    if getattr(resp, "usage", None) is not None:
+        with _stats_lock:
+            _llm_stats["prompt_tokens"] += resp.usage.prompt_tokens
+            _llm_stats["completion_tokens"] += resp.usage.completion_tokens
+    cache.set(key, out, expire=LLM_CACHE_TTL)
+    return out
+
+
+def llm_cache_stats() -> dict:
+    return dict(_llm_stats)
+
+
+def llm_cache_report() -> str:
+    total = _llm_stats["hits"] + _llm_stats["misses"]
+    rate = _llm_stats["hits"] / total if total else 0.0
+    return (f"🗃️ LLM cache: {_llm_stats['hits']} hit(s), {_llm_stats['misses']} "
+            f"API call(s) ({rate:.1%} hit rate); billed {_llm_stats['prompt_tokens']} prompt + "
+            f"{_llm_stats['completion_tokens']} completion tokens")
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Main RAG: recommendation + reasoning
 # ─────────────────────────────────────────────────────────────────────────────
-def generate_rag_response(query, documents):
+def generate_rag_response(query, documents, force_refresh=LLM_FORCE_REFRESH):
     """
     Returns a tuple: (aggregator_rec, gpt_rec, reasoning, sentiment_summary)
-    Now forces only Buy/Sell (no Hold ever).
+    Now forces only Buy/Sell (no Hold ever). Identical prompts are answered
+    from the LLM cache unless `force_refresh`.
     """
     try:
-        # 1️⃣ Aggregate sentiment
-        summary = {"positive": 0.0, "neutral": 0.0, "negative": 0.0}
-        for d in documents:
-            lbl = d.get("sentiment_label", "neutral").lower()
-            summary[lbl] += float(d.get("sentiment_score", 0.0))
-
-        # 2️⃣ Aggregator logic → ONLY Buy or Sell
-        agg = "Buy" if summary["positive"] >= summary["negative"] else "Sell"
-
-        # 3️⃣ Build context snippet (up to 4 articles)
-        ctx_lines = []
-        for d in documents[:4]:
-            title = d.get("title", "No Title")
-            score = float(d.get("sentiment_score", 0.0))
-            label = d.get("sentiment_label", "Neutral")
-            ctx_lines.append(f"- {title} (**{score:.4f}**, {label})")
-        ctx = "\n".join(ctx_lines)
-
-        # 4️⃣ Strict prompt, only allows Buy or Sell
-        prompt = (
-            "You are a seasoned financial analyst.\n\n"
-            f"Aggregator signal (Buy/Sell): {agg}\n\n"
-            "Top articles (title, bold score, label):\n"
-            f"{ctx}\n\n"
-            "Answer in exactly this format:\n"
-            "Recommendation: <Buy or Sell>  (one sentence)\n"
-            "Reasoning:\n"
-            "- <Title 1> (**X.XXXX**, Label): …how this supports your view\n"
-            "- <Title 2> (**Y.YYYY**, Label): …how this supports your view"
-        )
+        # 1️⃣ Aggregate sentiment → aggregator signal (ONLY Buy or Sell)
+        agg, summary = aggregate_sentiment(documents)
+
+        # 2️⃣ Strict prompt: most relevant articles packed into the token budget
+        prompt, stats = build_prompt_with_stats(agg, select_context(query, documents))
 
         logging.info("🛰️ Sending prompt to OpenAI…")
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=200,
-            temperature=0,
-            timeout=15
-        )
-        out = resp.choices[0].message.content.strip()
+        t0 = time.perf_counter()
+        out = chat_completion(prompt, max_tokens=200, temperature=0, timeout=15,
+                              force_refresh=force_refresh)
+        logging.info(
+            f"🧮 prompt={stats['prompt_tokens']} tok (context {stats['context_tokens']}/"
+            f"{stats['budget']}), {stats['lines']} line(s) from {stats['articles']} article(s), "
+            f"{stats['merged']} merged, {(time.perf_counter() - t0) * 1000:.0f} ms")
         logging.info(f"🛰️ OpenAI returned: {out!r}")
 
-        # 5️⃣ Parse GPT's recommendation and force Buy/Sell
-        rec_line = next((l for l in out.splitlines()
-                         if l.lower().startswith("recommendation:")), "")
-        rec = rec_line.split(":", 1)[-1].strip().capitalize()
-        if rec not in ("Buy", "Sell"):
-            rec = agg
-
-        # 6️⃣ Extract exactly two bullets
-        bullets = [l for l in out.splitlines() if l.strip().startswith("- ")]
-        reasoning = "\n".join(bullets[:2]) if bullets else "No reasoning."
+        # 3️⃣ Parse GPT's recommendation (forced Buy/Sell) + two bullets
+        rec, reasoning = parse_gpt_output(out, agg)
 
         return agg, rec, reasoning, summary
 
@@ -0,0 +1,228 @@
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import logging
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.cache import CACHE_ROOT, get_cache
+from Agents.prompt_builder import (
+    GPT_MODEL, LLM_CACHE_SIZE, LLM_CACHE_TTL, aggregate_sentiment, build_prompt_with_stats,
+    llm_cache_key, parse_gpt_output
+)
+from Agents.retrieval_agent import select_context
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Configuration
+# ─────────────────────────────────────────────────────────────────────────────
+BATCH_DIR           = os.path.join(CACHE_ROOT, "rag_batches")
+BATCH_ENDPOINT      = "/v1/chat/completions"
+BATCH_WINDOW        = "24h"
+BATCH_POLL_SECONDS  = int(os.getenv("RAG_BATCH_POLL_SECONDS", "30"))
+BATCH_TERMINAL      = ("completed", "failed", "expired", "cancelled")
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Job file → submit → poll → parse
+# ─────────────────────────────────────────────────────────────────────────────
+def write_batch_file(prompts: Dict[str, str], path: str, model: str = GPT_MODEL,
+                     max_tokens: int = 200, temperature: float = 0) -> str:
+    """One chat-completion request per line, keyed by `custom_id`."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        for custom_id, prompt in prompts.items():
+            fh.write(json.dumps({
+                "custom_id": custom_id,
+                "method":    "POST",
+                "url":       BATCH_ENDPOINT,
+                "body": {
+                    "model":       model,
+                    "messages":    [{"role": "user", "content": prompt}],
+                    "max_tokens":  max_tokens,
+                    "temperature": temperature,
+                },
+            }) + "\n")
+    return path
+
+
+def submit_batch(client, path: str):
+    with open(path, "rb") as fh:
+        uploaded = client.files.create(file=fh, purpose="batch")
+    return client.batches.create(input_file_id=uploaded.id, endpoint=BATCH_ENDPOINT,
+                                 completion_window=BATCH_WINDOW)
+
+
+def wait_for_batch(client, batch_id: str, poll_seconds: float = BATCH_POLL_SECONDS,
+                   timeout: Optional[float] = None):
+    """Poll until the batch reaches a terminal status (or `timeout` seconds pass)."""
+    t0 = time.monotonic()
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        counts = getattr(batch, "request_counts", None)
+        if counts is not None:
+            print(f"⏳ Batch {batch_id}: {batch.status} "
+                  f"({counts.completed}/{counts.total} done, {counts.failed} failed)")
+        if batch.status in BATCH_TERMINAL:
+            return batch
+        if timeout is not None and time.monotonic() - t0 > timeout:
+            raise TimeoutError(f"Batch {batch_id} still '{batch.status}' after {timeout:.0f}s")
+        time.sleep(poll_seconds)
+
+
+def read_batch_output(client, batch) -> Dict[str, str]:
+    """custom_id → assistant message for every request that succeeded."""
+    if not batch.output_file_id:
+        return {}
+    answers = {}
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        if not line.strip():
+            continue
+        row = json.loads(line)
+        response = row.get("response") or {}
+        if row.get("error") or response.get("status_code") != 200:
+            logging.warning(f"⚠️ Batch request {row.get('custom_id')} failed: {row.get('error')}")
+            continue
+        answers[row["custom_id"]] = response["body"]["choices"][0]["message"]["content"].strip()
+    return answers
+
+
+def generate_rag_batch(requests: Sequence[Tuple[str, List[dict]]], client,
+                       model: str = GPT_MODEL, poll_seconds: float = BATCH_POLL_SECONDS,
+                       timeout: Optional[float] = None, job_dir: str = BATCH_DIR,
+                       max_tokens: int = 200, temperature: float = 0):
+    """
+    Bulk counterpart of `rag_agent.generate_rag_response`: `requests` is a
+    list of (query, documents) and the result is a list of
+    (aggregator_rec, gpt_rec, reasoning, sentiment_summary) in the same order.
+    Identical prompts are submitted once and prompts already in the `llm`
+    cache are not submitted at all; answers are written back under the
+    same key `chat_completion` uses. Requests the batch did not answer fall
+    back to the aggregator like the synchronous path does.
+    """
+    cache  = get_cache("llm", LLM_CACHE_SIZE)
+    params = {"max_tokens": max_tokens, "temperature": temperature}
+    prepared, prompts, custom_ids, answers = [], {}, {}, {}
+    prompt_tokens = 0
+    for query, documents in requests:
+        agg, summary = aggregate_sentiment(documents)
+        prompt, stats = build_prompt_with_stats(agg, select_context(query, documents), model=model)
+        if prompt not in custom_ids:
+            custom_id = custom_ids[prompt] = f"req-{len(custom_ids)}"
+            hit = cache.get(llm_cache_key(prompt, model, **params))
+            if hit is not None:
+                answers[custom_id] = hit
+            else:
+                prompts[custom_id] = prompt
+                prompt_tokens += stats["prompt_tokens"]
+        prepared.append((agg, summary, custom_ids[prompt]))
+    print(f"🗄️ {len(answers)}/{len(custom_ids)} prompt(s) served from the LLM cache")
+
+    if prompts:
+        path = os.path.join(job_dir, f"batch_{time.strftime('%Y%m%dT%H%M%S')}.jsonl")
+        write_batch_file(prompts, path, model=model, **params)
+        print(f"📦 Wrote {len(prompts)} prompt(s) for {len(requests)} request(s) to {path} "
+              f"(~{prompt_tokens} prompt tokens)")
+
+        batch = submit_batch(client, path)
+        print(f"🚀 Submitted batch {batch.id}")
+        batch = wait_for_batch(client, batch.id, poll_seconds, timeout)
+        fresh = read_batch_output(client, batch) if batch.status == "completed" else {}
+        if batch.status != "completed":
+            logging.error(f"❌ Batch {batch.id} ended as '{batch.status}'")
+        for custom_id, out in fresh.items():
+            cache.set(llm_cache_key(prompts[custom_id], model, **params), out, expire=LLM_CACHE_TTL)
+        answers.update(fresh)
+        print(f"✅ Batch {batch.id}: {len(fresh)}/{len(prompts)} prompt(s) answered")
+
+    results = []
+    for agg, summary, custom_id in prepared:
+        out = answers.get(custom_id)
+        if out is None:
+            results.append((agg, agg, "- **Error generating reasoning**.", summary))
+            continue
+        rec, reasoning = parse_gpt_output(out, agg)
+        results.append((agg, rec, reasoning, summary))
+    return results
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Offline stand-in with the same files/batches surface as the OpenAI client
+# ─────────────────────────────────────────────────────────────────────────────
+_SIGNAL = re.compile(r"Aggregator signal \(Buy/Sell\): (\w+)")
+
+
+def echo_responder(body: dict) -> str:
+    """Deterministic answer: repeat the aggregator signal, cite the first two articles."""
+    prompt = body["messages"][-1]["content"]
+    match = _SIGNAL.search(prompt)
+    signal = match.group(1) if match else "Buy"
+    articles = [l for l in prompt.split("Answer in exactly this format:")[0].splitlines()
+                if l.startswith("- ")]
+    bullets = [f"{a}: consistent with the aggregate signal" for a in articles[:2]]
+    return "\n".join([f"Recommendation: {signal}", "Reasoning:", *bullets])
+
+
+class LocalBatchClient:
+    """
+    In-process replacement for `OpenAI()` in batch mode: `files.create`,
+    `files.content`, `batches.create` and `batches.retrieve` behave like the
+    API, answering each request with `responder(body)`. The batch is
+    reported `in_progress` on the first poll and `completed` on the next.
+    """
+    def __init__(self, responder: Callable[[dict], str] = echo_responder):
+        self._responder = responder
+        self._files: Dict[str, bytes] = {}
+        self._batches: Dict[str, SimpleNamespace] = {}
+        self.files = SimpleNamespace(create=self._create_file, content=self._file_content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve_batch)
+
+    def _create_file(self, file, purpose):
+        file_id = f"file-{uuid.uuid4().hex[:12]}"
+        self._files[file_id] = file.read()
+        return SimpleNamespace(id=file_id, purpose=purpose)
+
+    def _file_content(self, file_id):
+        return SimpleNamespace(text=self._files[file_id].decode("utf-8"))
+
+    def _create_batch(self, input_file_id, endpoint, completion_window):
+        batch_id = f"batch-{uuid.uuid4().hex[:12]}"
+        lines = [l for l in self._files[input_file_id].decode("utf-8").splitlines() if l.strip()]
+        self._batches[batch_id] = SimpleNamespace(
+            id=batch_id, status="validating", endpoint=endpoint,
+            input_file_id=input_file_id, output_file_id=None, error_file_id=None,
+            request_counts=SimpleNamespace(total=len(lines), completed=0, failed=0),
+        )
+        return self._batches[batch_id]
+
+    def _retrieve_batch(self, batch_id):
+        batch = self._batches[batch_id]
+        if batch.status == "validating":
+            batch.status = "in_progress"
+        elif batch.status == "in_progress":
+            self._run(batch)
+        return batch
+
+    def _run(self, batch):
+        out = []
+        for line in self._files[batch.input_file_id].decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            req = json.loads(line)
+            content = self._responder(req["body"])
+            out.append(json.dumps({
+                "id": f"batch_req_{uuid.uuid4().hex[:12]}",
+                "custom_id": req["custom_id"],
+                "response": {"status_code": 200, "body": {
+                    "model":   req["body"]["model"],
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}],
+                }},
+                "error": None,
+            }))
+        output_id = f"file-{uuid.uuid4().hex[:12]}"
+        self._files[output_id] = ("\n".join(out) + "\n").encode("utf-8")
+        batch.output_file_id = output_id
+        batch.request_counts.completed = len(out)
+        batch.status = "completed"
@@ -0,0 +1,266 @@
+# Question-aware retrieval over the `news` collection: a sentence-embedding
+# index (utils.vector_index) and a BM25 keyword index (utils.bm25_index),
+# both kept up to date at ingestion and used for the RAG context and the
+# Streamlit chatbot. Firestore is only touched on demand.
+import os
+import sys
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.logger import get_logger
+from utils.model_registry import configure_torch, get_model, register_model
+from utils.near_dup import article_text
+from utils.vector_index import get_vector_index, save_vector_index
+from utils.bm25_index import get_bm25_index, save_bm25_index
+
+logger = get_logger(__name__)
+
+ENCODER_MODEL    = "sentence-transformers/all-MiniLM-L6-v2"
+EMBED_DIM        = 384
+EMBED_MAX_TOKENS = 256
+EMBED_BATCH      = 64
+HYBRID_POOL      = 50           # candidates taken from each ranker before fusion
+RRF_K            = 60           # reciprocal-rank-fusion damping
+# embedding (rank RAG context by similarity to the question) | none (keep input order)
+CONTEXT_RANKING  = os.getenv("RAG_CONTEXT_RANKING", "embedding")
+
+_ranking_failed = False      # encoder can't load → stop retrying (and warning) per call
+
+NEWS_FIELDS = ["title", "content", "economic_data_id", "keywords", "timestamp", "publishedAt"]
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Sentence encoder (mean-pooled MiniLM, loaded on first use)
+# ─────────────────────────────────────────────────────────────────────────────
+def _load_encoder():
+    from transformers import AutoModel, AutoTokenizer
+    configure_torch()
+    tokenizer = AutoTokenizer.from_pretrained(ENCODER_MODEL)
+    model = AutoModel.from_pretrained(ENCODER_MODEL).eval()
+    return tokenizer, model
+
+register_model("encoder", _load_encoder)
+
+
+def embed_texts(texts: Sequence[str], batch_size: int = EMBED_BATCH) -> np.ndarray:
+    """L2-normalised float32 embeddings, one row per text."""
+    import torch
+
+    if not texts:
+        return np.empty((0, EMBED_DIM), dtype=np.float32)
+    tokenizer, model = get_model("encoder")
+    out = []
+    with torch.inference_mode():
+        for i in range(0, len(texts), batch_size):
+            enc = tokenizer(list(texts[i:i + batch_size]), padding=True, truncation=True,
+                            max_length=EMBED_MAX_TOKENS, return_tensors="pt")
+            hidden = model(**enc).last_hidden_state
+            mask = enc["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(1) / mask.sum(1).clamp(min=1e-9)
+            out.append(torch.nn.functional.normalize(pooled, dim=1).numpy())
+    return np.vstack(out).astype(np.float32)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Article helpers
+# ─────────────────────────────────────────────────────────────────────────────
+def article_id(doc: dict) -> Optional[str]:
+    return doc.get("id") or doc.get("doc_id")
+
+
+def article_ticker(doc: dict) -> Optional[str]:
+    ticker = doc.get("economic_data_id")
+    if not ticker and isinstance(doc.get("keywords"), list) and doc["keywords"]:
+        ticker = doc["keywords"][0]
+    return ticker.upper() if isinstance(ticker, str) else None
+
+
+def article_published(doc: dict):
+    return doc.get("publishedAt") or doc.get("timestamp") or doc.get("ingested_at")
+
+
+def vector_index():
+    return get_vector_index(EMBED_DIM)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Incremental indexing
+# ─────────────────────────────────────────────────────────────────────────────
+def index_articles(items: Iterable[Tuple[str, dict]], save: bool = True) -> int:
+    """
+    Add (doc_id, doc) pairs that are not indexed yet – BM25 first (no model
+    needed), then the embedding index. Returns how many were new.
+    """
+    items = list(items)
+    bm25 = get_bm25_index()
+    todo = [(doc_id, doc) for doc_id, doc in items if doc_id not in bm25]
+    added = bm25.add([i for i, _ in todo],
+                     [article_text(d.get("title"), d.get("content")) for _, d in todo],
+                     [article_ticker(d) for _, d in todo],
+                     [article_published(d) for _, d in todo])
+    if save:
+        save_bm25_index()
+
+    index = vector_index()
+    todo = [(doc_id, doc) for doc_id, doc in items if doc_id not in index]
+    if todo:
+        vecs = embed_texts([article_text(d.get("title"), d.get("content")) for _, d in todo])
+        added = max(added, index.add([i for i, _ in todo], vecs,
+                                     [article_ticker(d) for _, d in todo],
+                                     [article_published(d) for _, d in todo]))
+        if save:
+            save_vector_index()
+    return added
+
+
+def save_indexes() -> None:
+    save_bm25_index()
+    save_vector_index()
+
+
+def build_index(csv_path: Optional[str] = None, chunk: int = 1024) -> int:
+    """Seed the index from a news export (`doc_id` column) or the Firestore collection."""
+    if csv_path:
+        import pandas as pd
+        df = pd.read_csv(csv_path)
+        df = df.astype(object).where(df.notna(), None)
+        rows = ((str(r["doc_id"]), r) for r in df.to_dict("records"))
+    else:
+        from Firebase.firestore_operations import initialize_firestore
+        db = initialize_firestore()
+        rows = ((s.id, s.to_dict()) for s in db.collection("news").select(NEWS_FIELDS).stream())
+
+    added, buf = 0, []
+    for item in rows:
+        buf.append(item)
+        if len(buf) == chunk:
+            added += index_articles(buf, save=False)
+            buf = []
+    added += index_articles(buf, save=False)
+    save_indexes()
+    print(f"🧭 Indexed {added} new article(s); BM25 index holds {len(get_bm25_index())}, "
+          f"vector index {len(vector_index())}.")
+    return added
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Search
+# ─────────────────────────────────────────────────────────────────────────────
+def search_ids(query: str, ticker: Optional[str] = None, start=None, end=None,
+               k: int = 10) -> List[Tuple[str, float]]:
+    return vector_index().search(embed_texts([query])[0], k, ticker, start, end)
+
+
+def fetch_articles(hits: Sequence[Tuple[str, float]], score_field: str = "similarity") -> List[dict]:
+    """Load hit documents with one `get_all`, keeping the ranking order."""
+    if not hits:
+        return []
+    from Firebase.firestore_operations import initialize_firestore
+    db = initialize_firestore()
+    news_ref = db.collection("news")
+    snaps = {s.id: s for s in db.get_all([news_ref.document(i) for i, _ in hits]) if s.exists}
+    docs = []
+    for doc_id, score in hits:
+        if doc_id in snaps:
+            docs.append({**snaps[doc_id].to_dict(), "id": doc_id, score_field: score})
+    return docs
+
+
+def search_news(query: str, ticker: Optional[str] = None, start=None, end=None,
+                k: int = 10) -> List[dict]:
+    """Top-`k` news docs for `query` (cosine), filtered by ticker and publication window."""
+    return fetch_articles(search_ids(query, ticker, start, end, k))
+
+
+def hybrid_search_ids(query: str, ticker: Optional[str] = None, start=None, end=None,
+                      k: int = 10, pool: int = HYBRID_POOL) -> List[Tuple[str, float]]:
+    """
+    Reciprocal-rank fusion of BM25 and embedding hits (same filters). Falls
+    back to BM25 alone when the encoder is unavailable.
+    """
+    rankings = [get_bm25_index().search(query, pool, ticker, start, end)]
+    try:
+        rankings.append(search_ids(query, ticker, start, end, pool))
+    except Exception as e:
+        logger.warning(f"Embedding search unavailable ({e}); BM25 only.")
+    fused: Dict[str, float] = {}
+    for hits in rankings:
+        for rank, (doc_id, _) in enumerate(hits):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+    return sorted(fused.items(), key=lambda kv: -kv[1])[:k]
+
+
+def hybrid_search_news(query: str, ticker: Optional[str] = None, start=None, end=None,
+                       k: int = 10) -> List[dict]:
+    """Question-relevant news docs (BM25 + embeddings) in one call, best first."""
+    return fetch_articles(hybrid_search_ids(query, ticker, start, end, k), "relevance")
+
+
+def select_context(query: str, documents: List[dict], k: Optional[int] = None) -> List[dict]:
+    """
+    `documents` ordered by similarity to `query` (ties keep input order),
+    optionally cut to the best `k`. Indexed docs reuse their stored vectors;
+    the others are embedded on the fly. Falls back to the input order if
+    ranking is disabled or the encoder is unavailable.
+    """
+    global _ranking_failed
+    if CONTEXT_RANKING != "embedding" or _ranking_failed or not query or len(documents) <= 1:
+        return documents[:k]
+    try:
+        import torch  # noqa: F401
+        get_model("encoder")
+    except Exception as e:          # missing deps / weights: permanent for this process
+        logger.warning(f"Context ranking unavailable ({e}); keeping input order.")
+        _ranking_failed = True
+        return documents[:k]
+    try:
+        index = vector_index()
+        vecs: Dict[int, np.ndarray] = {}
+        missing = []
+        for pos, doc in enumerate(documents):
+            vec = index.vector(article_id(doc)) if article_id(doc) else None
+            if vec is None:
+                missing.append(pos)
+            else:
+                vecs[pos] = vec
+        texts = [article_text(documents[p].get("title"), documents[p].get("content")) for p in missing]
+        embedded = embed_texts([query] + texts)
+        q = embedded[0]
+        for pos, vec in zip(missing, embedded[1:]):
+            vecs[pos] = vec
+        scores = np.array([float(vecs[p] @ q) for p in range(len(documents))])
+        return [documents[p] for p in np.argsort(-scores, kind="stable")[:k]]
+    except Exception as e:          # transient: fall back for this call only
+        logger.warning(f"Context ranking failed ({e}); keeping input order for this request.")
+        return documents[:k]
+
+# ─────────────────────────────────────────────────────────────────────────────
+# CLI
+# ─────────────────────────────────────────────────────────────────────────────
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="index every article not yet indexed")
+    b.add_argument("--csv", help="news export instead of Firestore (needs doc_id column)")
+    s = sub.add_parser("search")
+    s.add_argument("query")
+    s.add_argument("--ranker", choices=("hybrid", "bm25", "embedding"), default="hybrid")
+    s.add_argument("--ticker")
+    s.add_argument("--start")
+    s.add_argument("--end")
+    s.add_argument("--k", type=int, default=5)
+    args = ap.parse_args()
+
+    if args.cmd == "build":
+        build_index(args.csv)
+    else:
+        search = {"hybrid": hybrid_search_ids, "embedding": search_ids,
+                  "bm25": get_bm25_index().search}[args.ranker]
+        t0 = time.perf_counter()
+        hits = search(args.query, k=args.k, ticker=args.ticker, start=args.start, end=args.end)
+        print(f"🔎 {len(hits)} hit(s) in {(time.perf_counter() - t0) * 1000:.2f} ms "
+              f"({args.ranker})")
+        for doc_id, score in hits:
+            print(f"  {score:.3f}  {doc_id}")
@@ -1,11 +1,17 @@
 import os
+import sys
 import time
 import firebase_admin
 from firebase_admin import firestore, credentials
-from transformers import pipeline
-from datetime import datetime
+from datetime import datetime, timezone
 from dotenv import load_dotenv
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from Agents.finbert_scoring import (
+    FINBERT_BACKEND, DEFAULT_INFERENCE_BATCH, SentimentCache,
+    model_id, score_snippets_cached, score_sharded
+)
 
 # Load environment variables
 load_dotenv()
@@ -32,67 +38,204 @@ def initialize_firebase() -> firestore.Client:
 db = initialize_firebase()
 
 # ─────────────────────────────────────────────────────────────────────────────
-# ⚙️ Initialize FinBERT Sentiment Analyzer
-# ─────────────────────────────────────────────────────────────────────────────
-sentiment_analyzer = pipeline("sentiment-analysis", model="ProsusAI/finbert")
-
-# ─────────────────────────────────────────────────────────────────────────────
-# 🔄 Retry decorator for analysis crashes
+# ⚙️ FinBERT Sentiment Analyzer – loaded lazily on first use
 # ─────────────────────────────────────────────────────────────────────────────
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=2, max=8),
-    retry=retry_if_exception_type(Exception)
-)
-def analyze_snippet(snippet: str):
-    return sentiment_analyzer(snippet)[0]
+# Backend chosen via FINBERT_BACKEND=torch|onnx|onnx-int8 (see finbert_scoring)
 
 # ─────────────────────────────────────────────────────────────────────────────
 # 🔍 Analyze & Store Sentiment in Batches
 # ─────────────────────────────────────────────────────────────────────────────
-def analyze_sentiment_and_store(batch_size: int = 500):
+JOB_STATE_COLLECTION = "job_state"      # one doc per one-off / incremental job
+
+
+def pending_news_query():
+    """
+    Unscored docs only. `needs_sentiment` is a single-field equality filter,
+    so Firestore's automatic index serves it – no composite index needed.
+    """
+    return db.collection("news").where("needs_sentiment", "==", True)
+
+
+def backfill_pending_flags(batch_size: int = 500):
+    """
+    One-off: flag docs ingested before `needs_sentiment` existed. Matches
+    explicit `sentiment_label == None` (what news_agent always wrote).
+    Records a `job_state/backfill_pending_flags` marker when done.
+    """
     news_ref = db.collection("news")
-    docs = news_ref.stream()
+    batch, flagged = db.batch(), 0
+    for snap in news_ref.where("sentiment_label", "==", None).stream():
+        batch.update(snap.reference, {"needs_sentiment": True})
+        flagged += 1
+        if flagged % batch_size == 0:
+            batch.commit()
+            batch = db.batch()
+    if flagged % batch_size != 0:
+        batch.commit()
+    db.collection(JOB_STATE_COLLECTION).document("backfill_pending_flags").set({
+        "flagged": flagged, "done_at": datetime.utcnow().isoformat() + "Z"})
+    print(f"🏷️ Flagged {flagged} legacy doc(s) as needing sentiment.")
+    return flagged
+
+
+def ensure_pending_flags():
+    """Run `backfill_pending_flags` once per database – a no-op once its marker exists."""
+    if db.collection(JOB_STATE_COLLECTION).document("backfill_pending_flags").get().exists:
+        return 0
+    return backfill_pending_flags()
+
+
+def analyze_sentiment_and_store(batch_size: int = 500,
+                                inference_batch_size: int = DEFAULT_INFERENCE_BATCH):
+    """
+    Score every unanalysed news doc (read via `pending_news_query`, so cost
+    is O(new articles), not O(collection)). Pending snippets are gathered first and
+    run through FinBERT in length-bucketed batches of `inference_batch_size`;
+    results are written back through Firestore batches of `batch_size`.
+    Near-duplicates (`duplicate_of` set at ingestion) reuse their canonical
+    article's sentiment instead of running FinBERT again, and every snippet
+    is looked up in the persistent SentimentCache before inference. Legacy
+    docs without the flag are flagged on the first run (`ensure_pending_flags`).
+    """
+    ensure_pending_flags()
+    cache = SentimentCache(model_id(FINBERT_BACKEND))
+    news_ref = db.collection("news")
+    docs = pending_news_query().stream()
     batch = db.batch()
+    ops = 0             # writes staged in Firestore batches
     count = 0
+    read = 0
+    scored = {}         # doc_id → (label, score) known this run
+    pending = []        # (doc_id, content) to score
+    duplicates = []     # (doc_id, canonical_id, content)
+
+    def write(doc_id, fields):
+        nonlocal batch, ops
+        batch.update(news_ref.document(doc_id), fields)
+        ops += 1
+        if ops % batch_size == 0:
+            batch.commit()
+            batch = db.batch()
+
+    def stage(doc_id, label, score):
+        nonlocal count
+        write(doc_id, {
+            "sentiment_label": label,
+            "sentiment_score": score,
+            "analyzed_at":     datetime.utcnow().isoformat() + "Z",
+            "needs_sentiment": False
+        })
+        count += 1
+
+    def score_and_stage(items):
+        results = score_snippets_cached(None, [c for _, c in items],
+                                        cache, inference_batch_size)
+        for (doc_id, _), result in zip(items, results):
+            if result:
+                scored[doc_id] = result
+                stage(doc_id, *result)
 
     for doc in docs:
         data = doc.to_dict()
         doc_id = doc.id
+        read += 1
 
-        # Skip if already analyzed
+        # Already analyzed (e.g. by migrate_sentiment) → just clear the flag
         if data.get("sentiment_label") is not None and data.get("sentiment_score") is not None:
+            write(doc_id, {"needs_sentiment": False})
             continue
 
         content = (data.get("content") or "").strip()
         if not content:
             print(f"⚠️ Skipping empty content for {doc_id}")
+            write(doc_id, {"needs_sentiment": False})
             continue
 
-        snippet = content[:512]
-        try:
-            result = analyze_snippet(snippet)
-            label = result.get("label", "Neutral").capitalize()
-            score = round(result.get("score", 0.0), 4)
-        except Exception as e:
-            print(f"❌ Error analyzing sentiment for {doc_id}: {e}")
-            continue
+        if data.get("duplicate_of"):
+            duplicates.append((doc_id, data["duplicate_of"], content))
+        else:
+            pending.append((doc_id, content))
 
+    score_and_stage(pending)
+
+    # ── near-duplicates: reuse the canonical article's sentiment ─────────
+    missing = {c for _, c, _ in duplicates if c not in scored}
+    if missing:
+        for snap in db.get_all([news_ref.document(c) for c in missing]):
+            d = snap.to_dict() if snap.exists else {}
+            if d.get("sentiment_label") is not None and d.get("sentiment_score") is not None:
+                scored[snap.id] = (d["sentiment_label"], d["sentiment_score"])
+
+    avoided = 0
+    orphans = []
+    for doc_id, canonical, content in duplicates:
+        if canonical in scored:
+            stage(doc_id, *scored[canonical])
+            avoided += 1
+        else:
+            orphans.append((doc_id, content))
+    score_and_stage(orphans)
+
+    if ops % batch_size != 0:
+        batch.commit()
+
+    print(f"✅ Sentiment updated for {count} of {read} pending article(s) "
+          f"(♻️ {avoided} FinBERT inference(s) avoided via near-duplicates).")
+    print(cache.report())
+    return {"read": read, "updated": count, "inferences_avoided": avoided,
+            "cache_hits": cache.hits, "cache_misses": cache.misses}
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 🧵 Sharded backfill across processes
+# ─────────────────────────────────────────────────────────────────────────────
+def rescore_sharded(workers=None, force: bool = False, shard_size: int = 256,
+                    batch_size: int = 500,
+                    inference_batch_size: int = DEFAULT_INFERENCE_BATCH):
+    """
+    Backfill scoring for large volumes (e.g. all history after a model
+    change with `force=True`). The parent reads doc IDs + content, worker
+    processes score shards in parallel, and results are committed here in
+    Firestore batches as shards finish.
+    """
+    news_ref = db.collection("news")
+    if not force:
+        ensure_pending_flags()
+    query = news_ref if force else pending_news_query()
+    items = []
+    for snap in query.select(["content"]).stream():
+        content = (snap.to_dict().get("content") or "").strip()
+        if content:
+            items.append((snap.id, content))
+    print(f"🧵 Scoring {len(items)} article(s) across "
+          f"{workers or 'auto'} worker process(es)…")
+
+    t0 = time.perf_counter()
+    cache = SentimentCache(model_id(FINBERT_BACKEND))     # parent-side tally of worker hits
+    batch, count = db.batch(), 0
+    for doc_id, result in score_sharded(items, workers, shard_size, inference_batch_size,
+                                        stats=cache):
+        if not result:
+            continue
+        label, score = result
         batch.update(news_ref.document(doc_id), {
             "sentiment_label": label,
             "sentiment_score": score,
-            "analyzed_at":     datetime.utcnow().isoformat() + "Z"
+            "analyzed_at":     datetime.utcnow().isoformat() + "Z",
+            "needs_sentiment": False
         })
         count += 1
-
         if count % batch_size == 0:
             batch.commit()
             batch = db.batch()
-
     if count % batch_size != 0:
         batch.commit()
 
-    print(f"✅ Sentiment updated for {count} articles.")
+    elapsed = time.perf_counter() - t0
+    print(f"✅ Sentiment updated for {count} articles in {elapsed:.1f}s "
+          f"({count / elapsed if elapsed else 0:.1f} docs/sec).")
+    print(cache.report())
+    return {"updated": count, "seconds": elapsed,
+            "cache_hits": cache.hits, "cache_misses": cache.misses}
 
 # ─────────────────────────────────────────────────────────────────────────────
 # ✔️ Verify Unprocessed Articles
@@ -109,31 +252,120 @@ def verify_sentiment_mapping():
         print("✅ All news articles have sentiment data.")
 
 # ─────────────────────────────────────────────────────────────────────────────
-# 📦 Migration Utility (optional)
+# 📦 Migration Utility (incremental, idempotent)
 # ─────────────────────────────────────────────────────────────────────────────
-def migrate_sentiment():
-    sent_ref = db.collection("sentiment_analysis").stream()
-    merged = 0
-    for sdoc in sent_ref:
-        sdata = sdoc.to_dict()
-        nid = sdata.get("news_id")
-        if not nid:
-            continue
+_NO_TS = datetime.min.replace(tzinfo=timezone.utc)   # records without analyzed_at sort first
+
+
+def _as_utc(value):
+    """`analyzed_at` as an aware UTC datetime – legacy docs hold ISO strings, newer ones timestamps."""
+    if isinstance(value, str):
         try:
-            db.collection("news").document(nid).update({
-                "sentiment_label": sdata.get("label","Neutral"),
-                "sentiment_score": sdata.get("score",0.0),
-                "analyzed_at":     sdata.get("analyzed_at")
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def migrate_sentiment(batch_size: int = 500):
+    """
+    Copy `sentiment_analysis` records onto their `news` docs.
+
+    A watermark (`job_state/migrate_sentiment.last_analyzed_at`) means only
+    records newer than the last run are read; news docs that already hold
+    the same label/score are not rewritten, and writes go through batched
+    commits. Once caught up this is a pair of empty queries.
+    """
+    state_ref = db.collection(JOB_STATE_COLLECTION).document("migrate_sentiment")
+    state = state_ref.get()
+    watermark = _as_utc((state.to_dict() or {}).get("last_analyzed_at") if state.exists else None)
+
+    sent_ref = db.collection("sentiment_analysis")
+    if watermark:
+        # Range filters only match one value type, so timestamps and ISO strings
+        # are read separately. ">=" re-reads records at the watermark itself;
+        # unchanged docs are skipped below.
+        queries = [
+            sent_ref.where("analyzed_at", ">=", watermark).order_by("analyzed_at"),
+            sent_ref.where("analyzed_at", ">=", watermark.strftime("%Y-%m-%dT%H:%M:%S"))
+                    .order_by("analyzed_at"),
+        ]
+    else:
+        queries = [sent_ref]        # first run: include records without analyzed_at
+    records = {}
+    newest = {}                     # news_id → normalised analyzed_at of the kept record
+    high = watermark
+    read = 0
+    for query in queries:
+        for sdoc in query.stream():
+            read += 1
+            sdata = sdoc.to_dict()
+            ts = _as_utc(sdata.get("analyzed_at"))
+            if ts and (high is None or ts > high):
+                high = ts
+            nid = sdata.get("news_id")
+            if nid and (nid not in records or (ts or _NO_TS) >= newest[nid]):
+                records[nid] = sdata    # newest analyzed_at per news doc wins
+                newest[nid] = ts or _NO_TS
+
+    news_ref = db.collection("news")
+    batch, written, skipped = db.batch(), 0, 0
+    ids = list(records)
+    for i in range(0, len(ids), batch_size):
+        chunk = [news_ref.document(nid) for nid in ids[i:i + batch_size]]
+        for snap in db.get_all(chunk, field_paths=["sentiment_label", "sentiment_score"]):
+            if not snap.exists:
+                skipped += 1
+                continue
+            sdata = records[snap.id]
+            label = sdata.get("label", "Neutral")
+            score = sdata.get("score", 0.0)
+            current = snap.to_dict() or {}
+            if current.get("sentiment_label") == label and current.get("sentiment_score") == score:
+                continue
+            batch.update(snap.reference, {
+                "sentiment_label": label,
+                "sentiment_score": score,
+                "analyzed_at":     sdata.get("analyzed_at"),
+                "needs_sentiment": False
             })
-            merged += 1
-        except Exception as e:
-            print(f"❌ Migration error for {nid}: {e}")
-    print(f"🔗 Migrated {merged} sentiment records.")
+            written += 1
+            if written % batch_size == 0:
+                batch.commit()
+                batch = db.batch()
+    if written % batch_size != 0:
+        batch.commit()
+
+    if high != watermark:
+        state_ref.set({"last_analyzed_at": high,
+                       "updated_at": datetime.utcnow().isoformat() + "Z"}, merge=True)
+
+    print(f"🔗 Migrated sentiment: read {read} record(s), wrote {written} news doc(s)"
+          f"{f', {skipped} missing' if skipped else ''}.")
+    return {"read": read, "written": written, "missing": skipped}
 
 # ─────────────────────────────────────────────────────────────────────────────
 # 🏁 Main
 # ─────────────────────────────────────────────────────────────────────────────
 if __name__ == "__main__":
-    analyze_sentiment_and_store()
+    import argparse
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backfill", action="store_true",
+                    help="re-flag legacy unscored docs (runs automatically once)")
+    ap.add_argument("--sharded", action="store_true",
+                    help="score in parallel worker processes")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--force", action="store_true",
+                    help="with --sharded: rescore every article, not just pending")
+    args = ap.parse_args()
+
+    if args.backfill:
+        backfill_pending_flags()
+    if args.sharded:
+        rescore_sharded(workers=args.workers, force=args.force)
+    else:
+        analyze_sentiment_and_store()
     verify_sentiment_mapping()
     # migrate_sentiment()  # uncomment to run migrations
@@ -1,15 +1,19 @@
 import os
 import sys
-from transformers import pipeline
+import time
+import hashlib
 from firebase_admin import firestore, initialize_app, credentials
 from dotenv import load_dotenv
 
-# Suppress TensorFlow warnings
-os.environ["TF_CPP_MIN_LOG_LEVEL"] = "3"  # Suppresses INFO and WARNING logs
-os.environ["TF_ENABLE_ONEDNN_OPTS"] = "0"  # Prevents oneDNN numerical differences
 # Forbindelse til projektets rodmappe
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+from utils.model_registry import quiet_ml_logs, configure_torch, register_model, get_model
+from utils.textrank import textrank_summary
+
+# Suppress TensorFlow warnings (env only – nothing heavy is imported here)
+quiet_ml_logs()
+
 # Indlæs miljøvariabler
 load_dotenv()
 
@@ -53,48 +57,127 @@ def initialize_firebase():
 # Initialize Firebase
 db = initialize_firebase()
 
-# Opsummeringsmodel
-summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
-
-def summarize_text(text, max_length=50, min_length=20):
+# Opsummeringsmodeller – indlæses først ved første brug
+# bart (default) | distilbart (≈2x faster) | textrank (NumPy, extractive, no model)
+SUMMARIZER_MODELS = {
+    "bart":       "facebook/bart-large-cnn",
+    "distilbart": "sshleifer/distilbart-cnn-12-6",
+}
+SUMMARIZER_BACKENDS = (*SUMMARIZER_MODELS, "textrank")
+SUMMARIZER_BACKEND  = os.getenv("SUMMARIZER_BACKEND", "bart")
+SUMMARIZER_MODEL    = SUMMARIZER_MODELS["bart"]
+
+def _summarizer_loader(model_name):
+    def load():
+        from transformers import pipeline
+        configure_torch()
+        return pipeline("summarization", model=model_name)
+    return load
+
+for _backend, _model in SUMMARIZER_MODELS.items():
+    register_model(f"summarizer:{_backend}", _summarizer_loader(_model))
+register_model("summarizer", lambda: get_model("summarizer:bart"))    # alias, same instance
+
+
+def summarize_batch(texts, backend=SUMMARIZER_BACKEND, max_length=50, min_length=20,
+                    batch_size=8):
+    """
+    Summaries for `texts` in input order. Abstractive backends run the
+    pipeline over the whole list in batches of `batch_size`; `textrank`
+    picks the two most central sentences.
+    """
+    if backend not in SUMMARIZER_BACKENDS:
+        raise ValueError(f"Unknown summarizer backend {backend!r}; pick one of {SUMMARIZER_BACKENDS}.")
+    if backend == "textrank":
+        return [textrank_summary(t) for t in texts]
+    out = get_model(f"summarizer:{backend}")(
+        list(texts), batch_size=batch_size, truncation=True,
+        max_length=max_length, min_length=min_length, do_sample=False
+    )
+    return [o["summary_text"] for o in out]
+
+
+def summarize_text(text, max_length=50, min_length=20, backend=SUMMARIZER_BACKEND):
     """
     Opsummerer teksten ved hjælp af modellen.
     """
     if not text:
         return "No content to summarize."
     try:
-        summary = summarizer(text, max_length=max_length, min_length=min_length, do_sample=False)
-        return summary[0]["summary_text"]
+        return summarize_batch([text], backend, max_length, min_length)[0]
     except Exception as e:
         return f"Error during summarization: {e}"
 
-def summarize_documents_from_firestore():
+
+def content_hash(content):
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def summarize_documents_from_firestore(backend=SUMMARIZER_BACKEND, batch_size=8,
+                                       write_batch_size=500, force=False):
     """
-    Generate and store summaries for news articles in the Firestore 'news' collection.
+    Generate and store summaries for news articles in the Firestore 'news'
+    collection – only for docs without a summary or whose content changed
+    since it was summarised (`summary_content_hash`). Inputs go through the
+    model in batches and writes are committed in Firestore batches.
     """
     try:
         news_ref = db.collection("news")
-        articles = news_ref.stream()
+        articles = news_ref.select(["content", "summary", "summary_content_hash"]).stream()
 
+        todo = []       # (doc_id, content, hash)
         for article in articles:
             doc = article.to_dict()
-            doc_id = article.id
-            content = doc.get("content", "")
-
+            content = (doc.get("content") or "").strip()
             if not content:
-                print(f"⚠️ No content for news ID: {doc_id}")
                 continue
-
-            # Generate summary
-            summary = summarize_text(content)
-
-            # Update the news document with the summary
-            news_ref.document(doc_id).update({"summary": summary})
-            print(f"✅ Summary stored for news ID: {doc_id}")
+            digest = content_hash(content)
+            summary = doc.get("summary")
+            stale = doc.get("summary_content_hash") not in (None, digest)
+            failed = isinstance(summary, str) and summary.startswith("Error during summarization")
+            if force or not summary or stale or failed:
+                todo.append((article.id, content, digest))
+
+        if not todo:
+            print("✅ All summaries are up to date.")
+            return {"summarized": 0, "articles_per_sec": 0.0}
+
+        print(f"📝 Summarizing {len(todo)} article(s) with '{backend}'…")
+        t0 = time.perf_counter()
+        batch, written = db.batch(), 0
+        for i in range(0, len(todo), write_batch_size):
+            chunk = todo[i:i + write_batch_size]
+            try:
+                summaries = summarize_batch([c for _, c, _ in chunk], backend,
+                                            batch_size=batch_size)
+            except Exception as e:
+                print(f"❌ Error summarizing chunk of {len(chunk)}: {e}")
+                continue
+            for (doc_id, _, digest), summary in zip(chunk, summaries):
+                batch.update(news_ref.document(doc_id), {
+                    "summary":              summary,
+                    "summary_content_hash": digest,
+                    "summary_backend":      backend,
+                })
+                written += 1
+            batch.commit()
+            batch = db.batch()
+
+        elapsed = time.perf_counter() - t0
+        rate = written / elapsed if elapsed else 0.0
+        print(f"✅ Stored {written} summaries in {elapsed:.1f}s "
+              f"({rate:.1f} articles/sec, backend={backend}).")
+        return {"summarized": written, "articles_per_sec": rate}
 
     except Exception as e:
         print(f"❌ Error summarizing documents: {e}")
 
 
 if __name__ == "__main__":
-    summarize_documents_from_firestore()
+    import argparse
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backend", choices=SUMMARIZER_BACKENDS, default=SUMMARIZER_BACKEND)
+    ap.add_argument("--batch-size", type=int, default=8)
+    ap.add_argument("--force", action="store_true", help="re-summarize every article")
+    args = ap.parse_args()
+    summarize_documents_from_firestore(args.backend, args.batch_size, force=args.force)
@@ -1,6 +1,11 @@
 import firebase_admin
 from firebase_admin import credentials, firestore
 import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.entity_matcher import EntityMatcher, name_variants
 
 def initialize_firebase():
     """
@@ -35,65 +40,107 @@ def initialize_firebase():
 # Initialize Firebase
 db = initialize_firebase()
 
+FIRESTORE_BATCH_LIMIT = 500
+
+def build_entity_matcher():
+    """
+    Compile an EntityMatcher from `latest_economic_data`: each doc's ticker,
+    `long_name` (with corporate suffixes peeled) and optional `aliases` list.
+    """
+    patterns = {}
+    for doc in db.collection("latest_economic_data").stream():
+        data = doc.to_dict()
+        stock_ticker = (data.get("stock_ticker") or doc.id).upper().strip()
+        if stock_ticker:
+            patterns[stock_ticker.lower()] = doc.id
+        for name in name_variants(data.get("long_name") or ""):
+            patterns[name] = doc.id
+        for alias in data.get("aliases") or []:
+            patterns[alias.lower().strip()] = doc.id
+    return EntityMatcher(patterns)
+
+
+def commit_links(links, batch=None, pending: int = 0):
+    """
+    Back-link news IDs onto their economic docs: one ArrayUnion per
+    `latest_economic_data/{id}` (chunked), committed through `batch`.
+    `links` maps econ doc id → list of news ids. Returns the commits made.
+    """
+    batch, commits = batch or db.batch(), 0
+    for econ_doc_id, news_ids in links.items():
+        econ_ref = db.collection("latest_economic_data").document(econ_doc_id)
+        for i in range(0, len(news_ids), FIRESTORE_BATCH_LIMIT):
+            batch.update(econ_ref, {
+                "linked_news_ids": firestore.ArrayUnion(news_ids[i:i + FIRESTORE_BATCH_LIMIT])
+            })
+            pending += 1
+            if pending == FIRESTORE_BATCH_LIMIT:
+                batch.commit()
+                commits += 1
+                batch, pending = db.batch(), 0
+    if pending:
+        batch.commit()
+        commits += 1
+    return commits
+
+
 def link_news_to_economic_data():
     """
-    Link news articles to economic data by matching keywords to stock tickers or company names.
+    Link news articles to economic data by matching tickers, company names
+    and aliases in keywords, title and content (one Aho-Corasick pass per
+    article). News-side updates and back-links are written in batches.
     """
     try:
-        # Fetch all economic data documents
-        economic_data_docs = db.collection("latest_economic_data").stream()
-
-        # Build a mapping of stock tickers and company names
-        ticker_to_doc_id = {}
-        for doc in economic_data_docs:
-            data = doc.to_dict()
-            stock_ticker = data.get("stock_ticker", "").upper().strip()
-            company_name = data.get("long_name", "").lower().strip()
+        matcher = build_entity_matcher()
 
-            if stock_ticker:
-                ticker_to_doc_id[stock_ticker] = doc.id
-            if company_name:
-                ticker_to_doc_id[company_name] = doc.id
+        news_docs = (
+            db.collection("news")
+              .select(["keywords", "title", "content", "economic_data_id", "matched_tickers"])
+              .stream()
+        )
 
-        # Fetch all news documents
-        news_docs = db.collection("news").stream()
+        links = {}          # econ doc id → [news ids]
+        batch, pending = db.batch(), 0
+        linked = unmatched = 0
 
         for news_doc in news_docs:
             news_data = news_doc.to_dict()
             news_id = news_doc.id
-            keywords = news_data.get("keywords", [])
-            linked = False  # Flag to prevent multiple links for the same news
-
-            for keyword in keywords:
-                keyword_normalized = keyword.lower().strip()
-
-                # Check for both ticker and company name matches
-                for key, econ_doc_id in ticker_to_doc_id.items():
-                    if keyword_normalized in key or key in keyword_normalized:
-                        # Link news to economic data
-                        db.collection("news").document(news_id).update({
-                            "economic_data_id": econ_doc_id
-                        })
-                        print(f"✅ Linked news ID {news_id} to economic data ID {econ_doc_id}")
-
-                        # Link back from economic data to news
-                        economic_doc_ref = db.collection("latest_economic_data").document(econ_doc_id)
-                        economic_doc = economic_doc_ref.get().to_dict()
-                        news_links = economic_doc.get("linked_news_ids", [])
-
-                        # Prevent duplicate links
-                        if news_id not in news_links:
-                            news_links.append(news_id)
-                            economic_doc_ref.update({"linked_news_ids": news_links})
-
-                        linked = True
-                        break  # Stop after the first match
-
-                if linked:
-                    break  # Skip remaining keywords if already linked
-
-            if not linked:
-                print(f"⚠️ No match found for news ID {news_id}")
+            text = " ".join([
+                " ".join(news_data.get("keywords") or []),
+                news_data.get("title") or "",
+                news_data.get("content") or "",
+            ])
+
+            matched = matcher.match(text)
+            if not matched:
+                unmatched += 1
+                continue
+            linked += 1
+
+            # skip the write (and the back-link) when nothing changed
+            if news_data.get("economic_data_id") and \
+               news_data.get("matched_tickers") == matched:
+                continue
+            known = set(news_data.get("matched_tickers") or [])
+            for econ_doc_id in matched:
+                if econ_doc_id not in known:        # only new matches need a back-link
+                    links.setdefault(econ_doc_id, []).append(news_id)
+
+            # keep the ticker the article was ingested for; record every match
+            update = {"matched_tickers": matched}
+            if not news_data.get("economic_data_id"):
+                update["economic_data_id"] = matched[0]
+            batch.update(db.collection("news").document(news_id), update)
+            pending += 1
+            if pending == FIRESTORE_BATCH_LIMIT:
+                batch.commit()
+                batch, pending = db.batch(), 0
+
+        commit_links(links, batch, pending)
+        print(f"✅ Matched {linked} news doc(s); back-linked "
+              f"{sum(map(len, links.values()))} new match(es) to {len(links)} economic doc(s); "
+              f"⚠️ {unmatched} without a match.")
 
     except Exception as e:
         print(f"❌ Error in linking news to economic data: {e}")
@@ -37,7 +37,7 @@ def export_collection(name: str, out_dir: str):
     # JSON
     json_path = os.path.join(out_dir, f"{name}.json")
     with open(json_path, "w", encoding="utf-8") as jf:
-        json.dump(data, jf, indent=2, ensure_ascii=False)
+        json.dump(data, jf, indent=2, ensure_ascii=False, default=str)   # timestamps
     print(f"✅ Exported {count} docs to {json_path}")
 
     # CSV (if non‐empty)
@@ -2,7 +2,9 @@
 
 import os
 import sys
+import argparse
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -13,6 +15,20 @@ SCRIPT_DIR   = os.path.dirname(__file__)
 PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, os.pardir))
 sys.path.insert(0, PROJECT_ROOT)
 
+# ───────────────────────────────────────────────────────────────────────────────
+# 1b️⃣ CLI – sync (one GPT call at a time), bounded thread pool, or Batch API
+# ───────────────────────────────────────────────────────────────────────────────
+ap = argparse.ArgumentParser()
+ap.add_argument("--mode", choices=("sync", "threads", "batch"), default="sync")
+ap.add_argument("--concurrency", type=int,
+                default=int(os.getenv("RECOMPUTE_CONCURRENCY", "8")),
+                help="max in-flight GPT calls in --mode threads")
+ap.add_argument("--batch-client", choices=("openai", "local"), default="openai",
+                help="--mode batch: real Batch API or the offline LocalBatchClient")
+ap.add_argument("--poll-seconds", type=float, default=30,
+                help="--mode batch: status poll interval")
+args = ap.parse_args()
+
 # ───────────────────────────────────────────────────────────────────────────────
 # 2️⃣ Load CSVs
 # ───────────────────────────────────────────────────────────────────────────────
@@ -61,18 +77,19 @@ hist_lookup = (
 # ───────────────────────────────────────────────────────────────────────────────
 # 3️⃣ Import your RAG‐agent
 # ───────────────────────────────────────────────────────────────────────────────
-from Agents.rag_agent import generate_rag_response
+from Agents.rag_agent import generate_rag_response, llm_cache_report, client
+from Agents.rag_batch import generate_rag_batch, LocalBatchClient
 
 # ───────────────────────────────────────────────────────────────────────────────
-# 4️⃣ Main recompute loop (aggregator + GPT/RAG)
+# 4️⃣ Collect (ticker, day) jobs
 # ───────────────────────────────────────────────────────────────────────────────
 STOCKS   = ["TSLA", "AAPL", "MSFT", "NVDA", "NVO"]
 all_recs = []
 
 print(f"\n▶️ Full‐history offline recompute started at {datetime.utcnow().isoformat()}Z\n")
 
+jobs = []   # (ticker, exp_day, run_date, articles) in output order
 for ticker in STOCKS:
-    print(f"── {ticker} ──")
     df_t = df_news[df_news["economic_data_id"] == ticker]
     if df_t.empty:
         print(f"⚠️ no news for {ticker}")
@@ -87,56 +104,85 @@ for ticker in STOCKS:
 
     for exp_day, run_date in enumerate(run_dates, start=1):
         day_slice = df_t[df_t["publishedAt"].dt.date == run_date]
-        articles  = day_slice.to_dict("records")
-
-        # — Aggregator (FinBERT net‐sentiment ensemble) + GPT/RAG
-        agg, gpt, reasoning, summary = generate_rag_response(
-            f"Outlook for {ticker} on {run_date}", articles
-        )
-
-        # skip pure‐Hold aggregator days
-        if agg == "Hold":
-            print(f"  {run_date} → skipping Hold")
-            continue
-
-        # if GPT returns Hold, fall back to aggregator
-        if gpt == "Hold":
-            gpt = agg
-
-        # pull closes
-        prev   = float(hist_lookup.at[(ticker, run_date), "previous_close"])
-        latest = float(hist_lookup.at[(ticker, run_date), "latest_close"])
-
-        # price movement direction
-        if   latest > prev:   direction =  1
-        elif latest < prev:   direction = -1
-        else:                 direction =  0
-
-        # correctness flags
-        correct_agg = (agg == "Buy"  and direction ==  1) or \
-                      (agg == "Sell" and direction == -1)
-        correct_gpt = (gpt == "Buy"  and direction ==  1) or \
-                      (gpt == "Sell" and direction == -1)
-
-        all_recs.append({
-            "stock_ticker":              ticker,
-            "run_date":                  run_date,
-            "aggregator_recommendation": agg,
-            "gpt_recommendation":        gpt,
-            "previous_close":            prev,
-            "latest_close":              latest,
-            "price_direction":           direction,
-            "is_correct_agg":            correct_agg,
-            "is_correct_gpt":            correct_gpt,
-            "sentiment_summary":         summary,
-            "timestamp":                 datetime.utcnow().isoformat() + "Z",
-            "experiment_day":            exp_day,
-        })
-
-        print(
-            f"  {run_date} → agg={agg} (corr={correct_agg}), "
-            f"gpt={gpt} (corr={correct_gpt})"
-        )
+        jobs.append((ticker, exp_day, run_date, day_slice.to_dict("records")))
+
+# ───────────────────────────────────────────────────────────────────────────────
+# 4b️⃣ Aggregator (FinBERT net‐sentiment ensemble) + GPT/RAG
+# ───────────────────────────────────────────────────────────────────────────────
+def run_job(job):
+    ticker, _, run_date, articles = job
+    return generate_rag_response(f"Outlook for {ticker} on {run_date}", articles)
+
+t0 = datetime.utcnow()
+if args.mode == "threads":
+    # 429s pause every worker via the shared gate in rag_agent.chat_completion;
+    # map() yields results in job order regardless of completion order.
+    print(f"🧵 {len(jobs)} jobs on {args.concurrency} threads…")
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        results = list(pool.map(run_job, jobs))
+elif args.mode == "batch":
+    batch_client = LocalBatchClient() if args.batch_client == "local" else client
+    results = generate_rag_batch(
+        [(f"Outlook for {ticker} on {run_date}", articles)
+         for ticker, _, run_date, articles in jobs],
+        batch_client, poll_seconds=args.poll_seconds,
+    )
+else:
+    results = [run_job(job) for job in jobs]
+print(f"⏱️ GPT/RAG stage took {(datetime.utcnow() - t0).total_seconds():.1f}s ({args.mode})\n")
+
+# ───────────────────────────────────────────────────────────────────────────────
+# 4c️⃣ Score against price moves (sequential, original order)
+# ───────────────────────────────────────────────────────────────────────────────
+current = None
+for (ticker, exp_day, run_date, _), (agg, gpt, reasoning, summary) in zip(jobs, results):
+    if ticker != current:
+        print(f"── {ticker} ──")
+        current = ticker
+
+    # skip pure‐Hold aggregator days
+    if agg == "Hold":
+        print(f"  {run_date} → skipping Hold")
+        continue
+
+    # if GPT returns Hold, fall back to aggregator
+    if gpt == "Hold":
+        gpt = agg
+
+    # pull closes
+    prev   = float(hist_lookup.at[(ticker, run_date), "previous_close"])
+    latest = float(hist_lookup.at[(ticker, run_date), "latest_close"])
+
+    # price movement direction
+    if   latest > prev:   direction =  1
+    elif latest < prev:   direction = -1
+    else:                 direction =  0
+
+    # correctness flags
+    correct_agg = (agg == "Buy"  and direction ==  1) or \
+                  (agg == "Sell" and direction == -1)
+    correct_gpt = (gpt == "Buy"  and direction ==  1) or \
+                  (gpt == "Sell" and direction == -1)
+
+    all_recs.append({
+        "stock_ticker":              ticker,
+        "run_date":                  run_date,
+        "aggregator_recommendation": agg,
+        "gpt_recommendation":        gpt,
+        "previous_close":            prev,
+        "latest_close":              latest,
+        "price_direction":           direction,
+        "is_correct_agg":            correct_agg,
+        "is_correct_gpt":            correct_gpt,
+        "sentiment_summary":         summary,
+        "timestamp":                 datetime.utcnow().isoformat() + "Z",
+        "experiment_day":            exp_day,
+    })
+
+    print(
+        f"  {run_date} → agg={agg} (corr={correct_agg}), "
+        f"gpt={gpt} (corr={correct_gpt})"
+    )
 
 # ───────────────────────────────────────────────────────────────────────────────
 # 5️⃣ Save results + print accuracies
@@ -150,5 +196,6 @@ gpt_acc = df_out["is_correct_gpt"].mean()
 print(f"\n▶️ Aggregator accuracy: {agg_acc:.2%}")
 print(f"▶️ GPT/RAG accuracy:      {gpt_acc:.2%}")
 
-print(f"\n✅ Saved {len(df_out)} rows to:\n   {OUT_PATH}\n")
+print(f"\n✅ Saved {len(df_out)} rows to:\n   {OUT_PATH}")
+print(f"{llm_cache_report()}\n")
 1
\ No newline at end of file
@@ -0,0 +1,73 @@
+# migrate_ingested_at.py
+#
+# One-off: convert `news.ingested_at` from ISO-8601 strings to native
+# Firestore timestamps, so the daily context query can range/order on it
+# (Firestore never compares a string with a timestamp).
+#
+#   python Firebase/migrate_ingested_at.py --dry-run
+#   python Firebase/migrate_ingested_at.py
+
+import os
+import sys
+import argparse
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Firebase.firestore_operations import initialize_firestore
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+BATCH_SIZE = 500        # Firestore write-batch limit
+
+
+def migrate_ingested_at(batch_size: int = BATCH_SIZE, dry_run: bool = False) -> dict:
+    """
+    Page through string-typed `ingested_at` values (`>= ""` only matches
+    strings) and rewrite them as UTC timestamps, one write batch per page.
+    Unparsable values are left alone and counted.
+    """
+    db = initialize_firestore()
+    query = db.collection("news") \
+              .where("ingested_at", ">=", "") \
+              .order_by("ingested_at") \
+              .select(["ingested_at"]) \
+              .limit(batch_size)
+
+    read = converted = bad = 0
+    last = None
+    while True:
+        page = list((query.start_after(last) if last else query).stream())
+        if not page:
+            break
+        last = page[-1]
+        read += len(page)
+
+        parsed = pd.to_datetime(pd.Series([s.to_dict().get("ingested_at") for s in page]),
+                                utc=True, format="ISO8601", errors="coerce")
+        batch, pending = db.batch(), 0
+        for snap, ts in zip(page, parsed):
+            if pd.isna(ts):
+                bad += 1
+                continue
+            batch.update(snap.reference, {"ingested_at": ts.to_pydatetime()})
+            pending += 1
+        if pending and not dry_run:
+            batch.commit()
+        converted += pending
+        logger.info(f"ingested_at: {read} read, {converted} converted, {bad} unparsable")
+
+    verb = "would convert" if dry_run else "converted"
+    print(f"🕒 ingested_at: read {read} string value(s), {verb} {converted}"
+          f"{f', {bad} unparsable' if bad else ''}.")
+    return {"read": read, "converted": converted, "unparsable": bad}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    ap.add_argument("--dry-run", action="store_true", help="count only, write nothing")
+    args = ap.parse_args()
+    migrate_ingested_at(args.batch_size, args.dry_run)
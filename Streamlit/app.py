@@ -4,26 +4,19 @@ from datetime import datetime, timedelta
 import re
 
 import streamlit as st
-import warnings
-import tensorflow as tf
-import torch
 import matplotlib.pyplot as plt
 import pandas as pd
 
 from dotenv import load_dotenv
 from google.api_core.exceptions import ResourceExhausted
 
-# Suppress Warnings
-os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
-tf.compat.v1.logging.set_verbosity(tf.compat.v1.logging.ERROR)
-warnings.filterwarnings("ignore", category=UserWarning)
-torch._C._jit_set_profiling_executor(False)
-torch._C._jit_set_profiling_mode(False)
-os.environ["TF_ENABLE_ONEDNN_OPTS"] = "0"
-
 # Add root directory for custom module imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Suppress Warnings (env only – models load on first use)
+from utils.model_registry import quiet_ml_logs
+quiet_ml_logs()
+
 # Load environment variables
 load_dotenv()
 
@@ -33,6 +26,8 @@ from Agents.rag_agent import generate_rag_response
 from Agents.sentiment_agent import analyze_sentiment_and_store
 from Agents.economic_data_agent import economic_data_agent
 from Firebase.firestore_operations import initialize_firestore, query_news_articles, query_collection
+from Agents.retrieval_agent import hybrid_search_news
+from utils.cache import set_bypass
 
 # Initialize Firestore client
 db = initialize_firestore()
@@ -75,7 +70,9 @@ st.sidebar.markdown("---")
 # Sidebar: Run Full Analysis Pipeline
 # ─────────────────────────────────────────────────────────────────────────────
 st.sidebar.subheader("🚀 Run Full Pipeline")
+bypass_cache = st.sidebar.checkbox("Bypass HTTP cache", value=False)
 if st.sidebar.button("Start Full Pipeline"):
+    set_bypass(bypass_cache)
     with st.spinner("Running the full analysis workflow..."):
         try:
             economic_data_agent([ticker_input])
@@ -178,13 +175,22 @@ if user_input:
             start_ts = start_date.isoformat() + "T00:00:00Z"
             end_ts   = end_date.isoformat()   + "T23:59:59Z"
 
-            # Primary, indexed server-side fetch
-            articles = query_news_articles(
-                ticker=effective_ticker,
-                start=start_ts,
-                end=end_ts,
-                limit=max_articles
-            )
+            # Primary: question-relevant articles (BM25 + embeddings, one call)
+            try:
+                articles = hybrid_search_news(user_input, ticker=effective_ticker,
+                                              start=start_ts, end=end_ts, k=max_articles)
+            except Exception as e:
+                st.warning(f"Search index unavailable ({e}); using date-ordered news.")
+                articles = []
+
+            # Next: indexed server-side fetch by ticker + date
+            if not articles:
+                articles = query_news_articles(
+                    ticker=effective_ticker,
+                    start=start_ts,
+                    end=end_ts,
+                    limit=max_articles
+                )
 
             # Fallback: single-field fetch + in-memory date filter
             if not articles:
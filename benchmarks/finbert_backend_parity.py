@@ -0,0 +1,111 @@
+# finbert_backend_parity.py
+#
+# Compare FinBERT backends on Data Analysis/Data/news.csv content: label
+# agreement and score delta vs. the torch reference, plus throughput and peak
+# RSS. Each backend runs in its own subprocess so RSS numbers don't bleed.
+#
+#   python benchmarks/finbert_backend_parity.py --docs 500
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+import pandas as pd
+
+# ───────────────────────────────────────────────────────────────────────────────
+# 1️⃣ PYTHONPATH setup
+# ───────────────────────────────────────────────────────────────────────────────
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, PROJECT_ROOT)
+
+from Agents.finbert_scoring import FINBERT_BACKENDS, DEFAULT_INFERENCE_BATCH
+
+NEWS_CSV = os.path.join(PROJECT_ROOT, "Data Analysis", "Data", "news.csv")
+
+
+def peak_rss_mb():
+    try:
+        import resource
+        kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss   # KiB on Linux
+        return kb / (1024 * 1024) if sys.platform == "darwin" else kb / 1024
+    except ImportError:                                             # Windows
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / 2**20
+        except ImportError:
+            return None
+
+# ───────────────────────────────────────────────────────────────────────────────
+# 2️⃣ Worker: score once on a single backend, dump JSON to stdout
+# ───────────────────────────────────────────────────────────────────────────────
+def run_worker(backend, docs, batch_size):
+    from Agents.finbert_scoring import build_sentiment_pipeline, score_snippets
+
+    snippets = pd.read_csv(NEWS_CSV)["content"].dropna().astype(str).head(docs).tolist()
+    t0   = time.perf_counter()
+    pipe = build_sentiment_pipeline(backend)
+    load = time.perf_counter() - t0
+
+    score_snippets(pipe, snippets[:8], 8)                           # warm-up
+    t0      = time.perf_counter()
+    results = score_snippets(pipe, snippets, batch_size)
+    elapsed = time.perf_counter() - t0
+
+    json.dump({
+        "backend": backend,
+        "load_s":  load,
+        "docs_per_s": len(snippets) / elapsed,
+        "peak_rss_mb": peak_rss_mb(),
+        "results": results,
+    }, sys.stdout)
+
+# ───────────────────────────────────────────────────────────────────────────────
+# 3️⃣ Parent: compare every backend against torch
+# ───────────────────────────────────────────────────────────────────────────────
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=500)
+    ap.add_argument("--batch-size", type=int, default=DEFAULT_INFERENCE_BATCH)
+    ap.add_argument("--backends", nargs="*", default=list(FINBERT_BACKENDS))
+    ap.add_argument("--worker", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.docs, args.batch_size)
+        return
+
+    runs = {}
+    for backend in args.backends:
+        print(f"▶️ {backend} …", flush=True)
+        proc = subprocess.run(
+            [sys.executable, __file__, "--worker", backend,
+             "--docs", str(args.docs), "--batch-size", str(args.batch_size)],
+            capture_output=True, text=True
+        )
+        if proc.returncode:
+            print(f"  ❌ {backend} failed:\n{proc.stderr.strip()[-500:]}")
+            continue
+        runs[backend] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    ref = runs.get("torch")
+    print(f"\n{'backend':>10} {'load s':>7} {'docs/s':>8} {'RSS MB':>8} "
+          f"{'agree':>7} {'mean Δ':>8} {'max Δ':>7}")
+    for backend, run in runs.items():
+        agree = mean_d = max_d = float("nan")
+        if ref:
+            pairs = [(a, b) for a, b in zip(ref["results"], run["results"]) if a and b]
+            if pairs:
+                agree  = sum(a[0] == b[0] for a, b in pairs) / len(pairs)
+                deltas = [abs(a[1] - b[1]) for a, b in pairs]
+                mean_d, max_d = sum(deltas) / len(deltas), max(deltas)
+        rss = run["peak_rss_mb"]
+        print(f"{backend:>10} {run['load_s']:>7.1f} {run['docs_per_s']:>8.1f} "
+              f"{(rss if rss is not None else float('nan')):>8.0f} "
+              f"{agree:>7.1%} {mean_d:>8.4f} {max_d:>7.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# finbert_batch_benchmark.py
+#
+# Docs/sec of FinBERT on CPU at several inference batch sizes, using the same
+# length-bucketed path as sentiment_agent.analyze_sentiment_and_store.
+#
+#   python benchmarks/finbert_batch_benchmark.py --docs 256
+
+import os
+import sys
+import time
+import argparse
+
+import pandas as pd
+
+# ───────────────────────────────────────────────────────────────────────────────
+# 1️⃣ PYTHONPATH setup
+# ───────────────────────────────────────────────────────────────────────────────
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, PROJECT_ROOT)
+
+from Agents.finbert_scoring import FINBERT_MODEL, score_snippets
+
+NEWS_CSV    = os.path.join(PROJECT_ROOT, "Data Analysis", "Data", "news.csv")
+BATCH_SIZES = [1, 8, 32, 64]
+
+# ───────────────────────────────────────────────────────────────────────────────
+# 2️⃣ Benchmark
+# ───────────────────────────────────────────────────────────────────────────────
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=256, help="number of news.csv rows to score")
+    ap.add_argument("--batch-sizes", type=int, nargs="*", default=BATCH_SIZES)
+    args = ap.parse_args()
+
+    import torch
+    from transformers import pipeline
+
+    snippets = (
+        pd.read_csv(NEWS_CSV)["content"].dropna().astype(str).head(args.docs).tolist()
+    )
+    pipe = pipeline("sentiment-analysis", model=FINBERT_MODEL, device=-1)
+    score_snippets(pipe, snippets[:8], 8)                    # warm-up
+
+    print(f"▶️ {len(snippets)} docs, torch threads={torch.get_num_threads()}")
+    print(f"{'batch':>6} {'seconds':>9} {'docs/sec':>10}")
+    for bs in args.batch_sizes:
+        t0 = time.perf_counter()
+        score_snippets(pipe, snippets, bs)
+        dt = time.perf_counter() - t0
+        print(f"{bs:>6} {dt:>9.2f} {len(snippets) / dt:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
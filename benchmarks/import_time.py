@@ -0,0 +1,96 @@
+# import_time.py
+#
+# Cold import cost of the CLI entry point and the Streamlit app, each in a
+# fresh interpreter. Pass --ref <git rev> to measure that revision too (in a
+# temporary worktree) for a before/after comparison.
+#
+#   python benchmarks/import_time.py --ref HEAD~1
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+TARGETS = {
+    "CLI (daily_run)":       "daily_run",
+    "Streamlit cold-start":  "Streamlit.app",
+    "Agents.sentiment_agent": "Agents.sentiment_agent",
+    "Agents.summarizer_agent": "Agents.summarizer_agent",
+}
+
+_PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+t0 = time.perf_counter()
+import {module}
+dt = time.perf_counter() - t0
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+except ImportError:
+    rss = float("nan")
+print(json.dumps({{"seconds": dt,
+                   "rss_mb": rss,
+                   "torch": "torch" in sys.modules,
+                   "tensorflow": "tensorflow" in sys.modules}}))
+"""
+
+# ───────────────────────────────────────────────────────────────────────────────
+# Measurement
+# ───────────────────────────────────────────────────────────────────────────────
+def measure(root, module, repeats):
+    runs = []
+    for _ in range(repeats):
+        proc = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(root=root, module=module)],
+            cwd=root, capture_output=True, text=True
+        )
+        if proc.returncode:
+            return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr else "failed"}
+        runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    return {
+        "seconds":    statistics.median(r["seconds"] for r in runs),
+        "rss_mb":     max(r["rss_mb"] for r in runs),
+        "torch":      runs[-1]["torch"],
+        "tensorflow": runs[-1]["tensorflow"],
+    }
+
+
+def report(label, root, repeats):
+    print(f"\n▶️ {label}")
+    print(f"{'target':>26} {'seconds':>8} {'RSS MB':>8} {'torch':>6} {'tf':>6}")
+    for name, module in TARGETS.items():
+        r = measure(root, module, repeats)
+        if "error" in r:
+            print(f"{name:>26}  ❌ {r['error']}")
+            continue
+        print(f"{name:>26} {r['seconds']:>8.2f} {r['rss_mb']:>8.0f} "
+              f"{str(r['torch']):>6} {str(r['tensorflow']):>6}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeats", type=int, default=3)
+    ap.add_argument("--ref", help="git revision to compare against (e.g. HEAD~1)")
+    args = ap.parse_args()
+
+    if args.ref:
+        with tempfile.TemporaryDirectory() as tmp:
+            wt = os.path.join(tmp, "ref")
+            subprocess.run(["git", "worktree", "add", "--detach", wt, args.ref],
+                           cwd=PROJECT_ROOT, check=True, capture_output=True)
+            try:
+                report(f"before ({args.ref})", wt, args.repeats)
+            finally:
+                subprocess.run(["git", "worktree", "remove", "--force", wt],
+                               cwd=PROJECT_ROOT, capture_output=True)
+    report("after (working tree)", PROJECT_ROOT, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
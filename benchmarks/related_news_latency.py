@@ -0,0 +1,64 @@
+# related_news_latency.py
+#
+# Wall-clock latency of rag_agent.fetch_related_news (windowed, projected,
+# batched get_all) versus the old one-`get()`-per-linked-id loop.
+#
+#   python benchmarks/related_news_latency.py --tickers TSLA AAPL --repeat 3
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+# ───────────────────────────────────────────────────────────────────────────────
+# 1️⃣ PYTHONPATH setup
+# ───────────────────────────────────────────────────────────────────────────────
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, PROJECT_ROOT)
+
+from Agents.rag_agent import db, fetch_related_news
+
+# ───────────────────────────────────────────────────────────────────────────────
+# 2️⃣ Previous implementation (kept here for comparison only)
+# ───────────────────────────────────────────────────────────────────────────────
+def fetch_related_news_loop(stock_ticker: str):
+    econ_doc = db.collection("latest_economic_data").document(stock_ticker).get()
+    if not econ_doc.exists:
+        return []
+    linked_ids = econ_doc.to_dict().get("linked_news_ids", [])
+    articles = []
+    for nid in linked_ids:
+        ndoc = db.collection("news").document(nid).get()
+        if ndoc.exists:
+            articles.append(ndoc.to_dict())
+    return articles
+
+# ───────────────────────────────────────────────────────────────────────────────
+# 3️⃣ Benchmark
+# ───────────────────────────────────────────────────────────────────────────────
+def timed(fn, ticker, repeat):
+    runs, n = [], 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        n = len(fn(ticker))
+        runs.append(time.perf_counter() - t0)
+    return statistics.median(runs), n
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tickers", nargs="*", default=["TSLA", "AAPL", "MSFT", "NVDA", "NVO"])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'ticker':>7} {'loop s':>8} {'docs':>6} {'batched s':>10} {'docs':>6} {'speed-up':>9}")
+    for ticker in args.tickers:
+        old_s, old_n = timed(fetch_related_news_loop, ticker, args.repeat)
+        new_s, new_n = timed(fetch_related_news, ticker, args.repeat)
+        print(f"{ticker:>7} {old_s:>8.2f} {old_n:>6} {new_s:>10.2f} {new_n:>6} "
+              f"{old_s / new_s if new_s else float('inf'):>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# vector_index_latency.py
+#
+# Top-k latency of utils.vector_index at news-archive scale: random unit
+# vectors (MiniLM width) spread over tickers and a year of timestamps, saved
+# and reloaded from disk, then queried unfiltered, by ticker, and by ticker +
+# 30-day window. A brute-force scan of the float16 memmap is timed alongside
+# as the reference for searching the on-disk matrix directly.
+#
+#   python benchmarks/vector_index_latency.py --vectors 100000
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+import numpy as np
+
+# ───────────────────────────────────────────────────────────────────────────────
+# 1️⃣ PYTHONPATH setup
+# ───────────────────────────────────────────────────────────────────────────────
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.vector_index import VECTORS_BIN, VectorIndex
+
+DIM     = 384
+TICKERS = ["AAPL", "MSFT", "NVDA", "TSLA", "AMZN", "GOOGL", "META", "JPM", "XOM", "PFE"]
+YEAR    = 365 * 86400
+T0      = 1_704_067_200          # 2024-01-01T00:00:00Z
+
+# ───────────────────────────────────────────────────────────────────────────────
+# 2️⃣ Benchmark
+# ───────────────────────────────────────────────────────────────────────────────
+def timed(fn, repeats):
+    fn()                                                     # warm-up
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--vectors", type=int, default=100_000)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--repeats", type=int, default=50)
+    args = ap.parse_args()
+
+    rng  = np.random.default_rng(0)
+    vecs = rng.standard_normal((args.vectors, DIM), dtype=np.float32)
+    ids  = [f"doc{i}" for i in range(args.vectors)]
+    tick = [TICKERS[i % len(TICKERS)] for i in range(args.vectors)]
+    ts   = [np.datetime64(T0 + int(s), "s").astype(str) + "Z"
+            for s in rng.integers(0, YEAR, args.vectors)]
+    q    = rng.standard_normal(DIM, dtype=np.float32)
+    window = (np.datetime64(T0 + YEAR // 2, "s").astype(str) + "Z",
+              np.datetime64(T0 + YEAR // 2 + 30 * 86400, "s").astype(str) + "Z")
+
+    with tempfile.TemporaryDirectory() as path:
+        index = VectorIndex(DIM, path)
+        t0 = time.perf_counter()
+        index.add(ids, vecs, tick, ts)
+        build = time.perf_counter() - t0
+        index.save()
+
+        t0 = time.perf_counter()
+        index = VectorIndex.load(DIM, path)
+        load = time.perf_counter() - t0
+
+        mm = np.memmap(os.path.join(path, VECTORS_BIN), dtype=np.float16,
+                       mode="r", shape=(args.vectors, DIM))
+        qn = (q / np.linalg.norm(q)).astype(np.float16)
+
+        def memmap_scan():
+            scores = mm @ qn
+            np.argpartition(-scores, args.k - 1)[:args.k]
+
+        cases = {
+            "unfiltered":           lambda: index.search(q, args.k),
+            "ticker":               lambda: index.search(q, args.k, "NVDA"),
+            "ticker + 30d window":  lambda: index.search(q, args.k, "NVDA", *window),
+            "float16 memmap scan":  memmap_scan,
+        }
+
+        print(f"▶️ {args.vectors} vectors × {DIM} dims, {len(TICKERS)} tickers, k={args.k}")
+        print(f"   build {build:.2f}s, load from disk {load:.2f}s")
+        print(f"{'query':>22} {'median ms':>10} {'max ms':>9}")
+        for name, fn in cases.items():
+            med, worst = timed(fn, args.repeats)
+            print(f"{name:>22} {med:>10.2f} {worst:>9.2f}")
+        del mm
+
+
+if __name__ == "__main__":
+    main()
@@ -11,17 +11,21 @@ import yfinance as yf
 from tiingo import TiingoClient
 
 # Agents
-from Agents.news_agent import process_articles
-from Agents.rag_agent import generate_rag_response
+from utils.cache import http_get, http_set, make_key
+from utils.model_registry import prewarm, quiet_ml_logs
+quiet_ml_logs()     # before any agent can pull in transformers
+from Agents.news_agent import (process_articles, fetch_news_batch, news_doc_id,
+                               save_ingest_indexes)
+from Agents.rag_agent import generate_rag_response, llm_cache_report
+from Agents.retrieval_agent import CONTEXT_RANKING
 from Agents.sentiment_agent import analyze_sentiment_and_store, migrate_sentiment
+from Agents.table_integration_agent import FIRESTORE_BATCH_LIMIT, commit_links
+from utils.sentiment_agg import aggregate, to_columns
 
-import warnings
-import tensorflow as tf
-import torch
 import time
+import itertools
 from tenacity import retry, wait_exponential, stop_after_attempt, retry_if_exception_type
-import os, warnings, logging
-import tensorflow as tf
+import logging
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -31,6 +35,7 @@ VERBOSE = True
 EXPERIMENT_START_DATE = datetime(2025, 1, 22, tzinfo=timezone.utc)  # ← add tzinfo
 RETRY_SLEEP_SECONDS = 60
 TIINGO_BACKFILL_DAYS = 7
+PARTIAL_BAR_TTL = 15 * 60        # today's bar missing / still trading → re-check soon
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Load environment & init clients
@@ -48,16 +53,6 @@ if not TIINGO_API_KEY:
     raise RuntimeError("❌ TIINGO_API_KEY not set in environment.")
 _tiingo_client = TiingoClient({"api_key": TIINGO_API_KEY, "session": True})
 
-# ─────────────────────────────────────────────────────────────────────────────
-# Suppress TF/torch warnings
-# ─────────────────────────────────────────────────────────────────────────────
-os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
-tf.compat.v1.logging.set_verbosity(tf.compat.v1.logging.ERROR)
-warnings.filterwarnings("ignore", category=UserWarning)
-torch._C._jit_set_profiling_executor(False)
-torch._C._jit_set_profiling_mode(False)
-tf.get_logger().setLevel(logging.ERROR)       # hide Python-side warnings
-
 # ─────────────────────────────────────────────────────────────────────────────
 # Initialize Firebase
 # ─────────────────────────────────────────────────────────────────────────────
@@ -91,21 +86,51 @@ class PriceFetchError(Exception): pass
     reraise=True
 )
 def _fetch_with_yf(ticker):
-    data = yf.Ticker(ticker).history(period="5d")["Close"].dropna()
+    data = _yf_closes(ticker, "5d")
     if len(data) < 2:
         raise PriceFetchError(f"Insufficient yfinance data for {ticker}")
-    return float(data.iloc[-1]), float(data.iloc[-2])
+    return float(data[-1]), float(data[-2])
+
+
+def _yf_closes(ticker, period):
+    """
+    Daily closes. Same rule as `_tiingo_daily_prices`: while the last bar is
+    today's session (live, not yet closed) the result is cached only briefly.
+    """
+    key = make_key("_yf_closes", (ticker, period), {})
+    closes = http_get("yf_history", key)
+    if closes is None:
+        hist = yf.Ticker(ticker).history(period=period)["Close"].dropna()
+        closes = hist.tolist()
+        live = len(hist) > 0 and hist.index[-1].date() >= datetime.now(hist.index.tz).date()
+        http_set("yf_history", key, closes, PARTIAL_BAR_TTL if live else None)
+    return closes
+
+
+def _tiingo_daily_prices(ticker, start, end):
+    """
+    Daily bars, cached for the endpoint TTL only once the bar for `end` is
+    in. A pre-close fetch is cached briefly, so reruns later that day see
+    the new close.
+    """
+    key = make_key("_tiingo_daily_prices", (ticker, start, end), {})
+    prices = http_get("tiingo_daily", key)
+    if prices is None:
+        prices = _tiingo_client.get_ticker_price(
+            ticker,
+            startDate=start,
+            endDate=end,
+            frequency='daily'
+        )
+        complete = bool(prices) and str(prices[-1].get("date", ""))[:10] >= end
+        http_set("tiingo_daily", key, prices, None if complete else PARTIAL_BAR_TTL)
+    return prices
 
 
 def _fetch_with_tiingo(ticker):
     end = datetime.utcnow().date()
     start = end - timedelta(days=TIINGO_BACKFILL_DAYS)
-    prices = _tiingo_client.get_ticker_price(
-        ticker,
-        startDate=start.isoformat(),
-        endDate=end.isoformat(),
-        frequency='daily'
-    )
+    prices = _tiingo_daily_prices(ticker, start.isoformat(), end.isoformat())
     if not prices or len(prices) < 2:
         raise PriceFetchError(f"Insufficient Tiingo data for {ticker}")
     latest = prices[-1]['adjClose']
@@ -127,15 +152,6 @@ def fetch_closing_prices(ticker):
     except Exception as yf:
         raise PriceFetchError(f"Both price sources failed for {ticker}: ti={ti}, yf={yf}")
 
-# ─────────────────────────────────────────────────────────────────────────────
-# Helpers: link
-# ─────────────────────────────────────────────────────────────────────────────
-def link_news_to_economic_data(news_id, stock):
-    db.collection("latest_economic_data").document(stock).update({
-        "linked_news_ids": firestore.ArrayUnion([news_id])
-    })
-    db.collection("news").document(news_id).update({"economic_data_id": stock})
-
 # ─────────────────────────────────────────────────────────────────────────────
 # Evaluate recommendation correctness
 # ─────────────────────────────────────────────────────────────────────────────
@@ -188,8 +204,9 @@ def store_recommendation(
         "experiment_day":          experiment_day,
         "recommendation_detail":   detail
     }
-    rec_ref = db.collection("model_recommendations").add(rec_doc)
-    rec_id  = rec_ref[1].id
+    # deterministic ids: re-storing the same day (resume, --force) overwrites
+    rec_id = f"{experiment_day}_{stock}"
+    db.collection("model_recommendations").document(rec_id).set(rec_doc)
     print(f"✅ Stored rec {rec_id} for {stock}")
 
     # 4️⃣  build and store economic-data doc
@@ -203,21 +220,33 @@ def store_recommendation(
         "recommendation_id": rec_id,
         "timestamp":      ts_str
     }
-    db.collection("economic_data").add(econ_doc)
+    db.collection("economic_data").document(rec_id).set(econ_doc)
     print(f"✅ Stored econ for {stock}")
 
 
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Daily pipeline – FinBERT vs GPT-4o-mini vs actual price move
 # ─────────────────────────────────────────────────────────────────────────────
 from datetime import datetime, timedelta, timezone
+from dataclasses import dataclass, field
 from rich.console import Console
 from rich.table   import Table
+from concurrent.futures import ThreadPoolExecutor
+from utils.pipeline_state import (ALL_TICKERS, CheckpointStore, SkipTicker, StageNotReady,
+                                  StageRun, run_stage, upstream)
 
 WINDOW_HOURS        = 24         # rolling horizon (7 days)
-MAX_DOCS_PER_STOCK  = 20           # cap after sorting by ingested_at
+MAX_DOCS_PER_STOCK  = 20           # server-side limit, newest ingested_at first
 REQUIRE_TODAY_NEWS  = True        # True → must be ingested today
 SHOW_ARTICLE_LINES  = False        # verbose per-headline print
+PIPELINE_WORKERS    = int(os.getenv("DAILY_RUN_WORKERS", "4"))   # per-ticker I/O threads
+LEGACY_LINK_SCAN    = False        # also link docs written before `linked_at` existed
+DEFAULT_STOCKS      = ["TSLA", "AAPL", "MSFT", "NVDA", "NVO"]
+
+# fields carried from the context query into the `select_context` checkpoint
+CONTEXT_FIELDS = ["id", "title", "content", "summary", "sentiment_label", "sentiment_score",
+                  "cluster_id", "timestamp", "ingested_at", "publishedAt", "economic_data_id"]
 
 console = Console()
 
@@ -226,121 +255,352 @@ def finbert_to_rec(total_signed: float) -> str:
     return "buy" if total_signed > 0 else "sell"
 
 
-def run_daily_pipeline(stocks, articles_per_stock: int = 20) -> None:
-    cutoff    = datetime.now(timezone.utc) - timedelta(hours=WINDOW_HOURS)
-    today_utc = cutoff.date()
-    summary_rows = []
+@dataclass
+class PipelineRun(StageRun):
+    """StageRun plus the daily window and the pre-fetched headlines."""
+    cutoff_epoch:       int  = 0
+    today_day:          int  = 0
+    articles_per_stock: int  = 20
+    fetched:            dict = field(default_factory=dict)      # ticker → articles | None
 
-    for stock in stocks:
-        console.rule(f"[bold yellow]{stock} (last {WINDOW_HOURS} h)")
-
-        # 1) ingest up to `articles_per_stock` new headlines
-        process_articles([stock], articles_per_stock)
-
-        # 2) ensure every news doc links to its econ record
-        for snap in db.collection("news") \
-                      .where("keywords", "array_contains", stock).stream():
-            if not snap.to_dict().get("economic_data_id"):
-                link_news_to_economic_data(snap.id, stock)
-
-        analyze_sentiment_and_store()
-        migrate_sentiment()
-
-        # 3) collect docs inside window – then cap to 20 freshest
-        docs = []
-        for snap in db.collection("news") \
-                      .where("economic_data_id", "==", stock).stream():
-            d = snap.to_dict()
-            if "sentiment_score" not in d:
-                continue
+# ─────────────────────────────────────────────────────────────────────────────
+# Stages – each returns the JSON payload stored as its checkpoint
+# ─────────────────────────────────────────────────────────────────────────────
+def stage_ingest(stock: str, run: PipelineRun) -> dict:
+    """
+    Store up to `articles_per_stock` fetched headlines. A failed fetch
+    (None) is not "no news": it leaves ingest un-checkpointed for a retry.
+    """
+    articles = run.fetched.get(stock)
+    if articles is None:
+        raise StageNotReady(f"{stock}: NewsAPI fetch did not complete – ingest left pending")
+    return process_articles([stock], run.articles_per_stock, articles=articles,
+                            save=False)     # saved once after the parallel ingest
 
-            raw_ts = d.get("ingested_at") or d.get("timestamp", "")
-            try:
-                ts = datetime.fromisoformat(raw_ts.replace("Z", "+00:00"))
-            except Exception:
-                continue
-            if ts.tzinfo is None:
-                ts = ts.replace(tzinfo=timezone.utc)
-
-            fresh    = ts >= cutoff
-            is_today = ts.date() == today_utc
-            if fresh and (not REQUIRE_TODAY_NEWS or is_today):
-                d["__ts"] = ts            # stash for sorting
-                docs.append(d)
-
-        # keep only N freshest by ingested_at
-        docs.sort(key=lambda x: x["__ts"], reverse=True)
-        docs = docs[:MAX_DOCS_PER_STOCK]
-
-        if not docs:
-            console.print(
-                f"[italic]No qualifying headlines "
-                f"(≤{WINDOW_HOURS} h and REQUIRE_TODAY_NEWS={REQUIRE_TODAY_NEWS}).[/]")
+
+def stage_link(stock: str, run: PipelineRun) -> dict:
+    """
+    Link this ticker's unlinked news docs (`linked_at == None`, set at
+    ingest). The econ doc gets a single ArrayUnion through `commit_links`
+    first; news-side updates follow in their own write batches, so a failed
+    back-link leaves the docs unlinked for the next run (re-unioning is a no-op).
+    """
+    upstream(run, stock, "ingest")
+    key  = stock.lower().strip()        # keywords are stored lower-cased
+    news = db.collection("news").where("keywords", "array_contains", key)
+    snaps = news.where("linked_at", "==", None).select(["economic_data_id"]).stream()
+    if LEGACY_LINK_SCAN:                # a missing field never matches `== None`
+        legacy = (s for s in news.select(["economic_data_id", "linked_at"]).stream()
+                  if "linked_at" not in s.to_dict())
+        snaps = itertools.chain(snaps, legacy)
+
+    snaps = list(snaps)
+    linked = [snap.id for snap in snaps]
+    commits = commit_links({stock: linked}) if linked else 0
+
+    now = datetime.now(timezone.utc)
+    batch, pending = db.batch(), 0
+    for snap in snaps:
+        update = {"linked_at": now}
+        if not snap.to_dict().get("economic_data_id"):
+            update["economic_data_id"] = stock
+        batch.update(snap.reference, update)
+        pending += 1
+        if pending == FIRESTORE_BATCH_LIMIT:
+            batch.commit()
+            commits += 1
+            batch, pending = db.batch(), 0
+    if pending:
+        batch.commit()
+        commits += 1
+    print(f"🔗 {stock}: linked {len(linked)} news doc(s) in {commits} commit(s).")
+    return {"linked": len(linked), "commits": commits}
+
+
+def stage_score(stock: str, run: PipelineRun) -> dict:
+    """FinBERT over everything pending – once per run, not per ticker."""
+    console.rule("[bold yellow]FinBERT scoring")
+    migrated = migrate_sentiment()      # incremental: no-op once caught up
+    scored   = analyze_sentiment_and_store()
+    return {"migrated": migrated, "scored": scored}
+
+
+def stage_select_context(stock: str, run: PipelineRun) -> dict:
+    """
+    Scored docs inside the window, freshest MAX_DOCS_PER_STOCK first. Range,
+    order and limit run server-side (index: economic_data_id ↑, ingested_at ↓
+    in firestore.indexes.json), so reads stay constant per ticker per day.
+    """
+    upstream(run, stock, "link")
+    upstream(run, ALL_TICKERS, "score")
+    cutoff = datetime.fromtimestamp(run.cutoff_epoch, timezone.utc)
+    query  = db.collection("news") \
+               .where("economic_data_id", "==", stock) \
+               .where("ingested_at", ">=", cutoff)
+    if REQUIRE_TODAY_NEWS:             # same UTC day as the cutoff
+        day_end = datetime.fromtimestamp((run.today_day + 1) * 86400, timezone.utc)
+        query = query.where("ingested_at", "<", day_end)
+    query = query.order_by("ingested_at", direction=firestore.Query.DESCENDING) \
+                 .limit(MAX_DOCS_PER_STOCK) \
+                 .select([f for f in CONTEXT_FIELDS if f != "id"])
+
+    docs = []
+    for snap in query.stream():
+        d = snap.to_dict()
+        if d.get("sentiment_score") is None:     # ingested but not scored yet
             continue
+        d["id"] = snap.id             # lets RAG context reuse indexed vectors
+        docs.append(d)
+
+    if not docs:
+        return {"skipped": f"no qualifying headlines "
+                           f"(≤{WINDOW_HOURS} h and REQUIRE_TODAY_NEWS={REQUIRE_TODAY_NEWS})"}
+    return {"docs": docs}
+
+
+def stage_recommend(stock: str, run: PipelineRun) -> dict:
+    """FinBERT net score and the GPT recommendation over the selected context."""
+    docs  = upstream(run, stock, "select_context")["docs"]
+    stats = aggregate(to_columns(docs), dedupe_clusters=False)
+    if SHOW_ARTICLE_LINES:
+        console.print(f"• {stock} article sentiment:")
+        for d, val in zip(docs, to_columns(docs).signed):
+            console.print(f"  {val:+.3f} ({d.get('sentiment_label')})  {d['title'][:80]}")
+
+    agg_rec, gpt_rec, detail, summary = generate_rag_response(
+        f"Outlook for {stock}?", docs
+    )
+    return {"finbert_total": stats["net"], "decayed_net": stats["decayed_net"],
+            "finbert_rec": finbert_to_rec(stats["net"]), "agg_rec": agg_rec,
+            "gpt_rec": gpt_rec, "detail": detail, "summary": summary}
 
-        # 4) (optional) per-headline sentiment
-        signed_scores = []
-        if SHOW_ARTICLE_LINES:
-            console.print("• Article sentiment:")
-        for d in docs:
-            lbl  = d["sentiment_label"].lower()
-            sc   = d["sentiment_score"]
-            val  = +sc if lbl == "positive" else -sc if lbl == "negative" else 0.0
-            signed_scores.append(val)
-            if SHOW_ARTICLE_LINES:
-                console.print(f"  {val:+.3f} ({lbl})  {d['title'][:80]}")
-
-        # 5) model outputs
-        finbert_total = sum(signed_scores)
-        finbert_rec   = finbert_to_rec(finbert_total)
-        agg_rec, gpt_rec, detail, summary = generate_rag_response(
-            f"Outlook for {stock}?", docs
-        )
 
-        # 6) prices
+def stage_price(stock: str, run: PipelineRun) -> dict:
+    upstream(run, stock, "recommend")
+    latest, prev = fetch_closing_prices(stock)
+    return {"latest": latest, "prev": prev}
+
+
+def stage_evaluate(stock: str, run: PipelineRun) -> dict:
+    rec   = upstream(run, stock, "recommend")
+    price = upstream(run, stock, "price")
+    latest, prev = price["latest"], price["prev"]
+    return {
+        "fin_ok":   evaluate_model(stock, rec["finbert_rec"], "FinBERT",    latest, prev),
+        "gpt_ok":   evaluate_model(stock, rec["gpt_rec"],     "GPT-4o-mini", latest, prev),
+        "move_pct": (latest - prev) / prev * 100,
+    }
+
+
+def stage_store(stock: str, run: PipelineRun) -> dict:
+    """
+    Write to Firestore. Docs are keyed `{experiment_day}_{stock}`, so a
+    re-store after upstream stages were recomputed replaces the day's docs.
+    """
+    rec   = upstream(run, stock, "recommend")
+    price = upstream(run, stock, "price")
+    ok    = upstream(run, stock, "evaluate")
+    store_recommendation(
+        stock, rec["agg_rec"], rec["gpt_rec"], rec["summary"], ok["gpt_ok"],
+        price["latest"], price["prev"], rec["detail"]
+    )
+    return {"stored": True}
+
+
+STAGES = {
+    "ingest":         stage_ingest,
+    "link":           stage_link,
+    "score":          stage_score,
+    "select_context": stage_select_context,
+    "recommend":      stage_recommend,
+    "price":          stage_price,
+    "evaluate":       stage_evaluate,
+    "store":          stage_store,
+}
+GLOBAL_STAGES = frozenset({"score"})           # checkpointed once per run under ALL_TICKERS
+# registry models a stage loads (ingest embeds new articles, recommend ranks context)
+STAGE_MODELS = {
+    "ingest":    ("encoder",),
+    "score":     ("finbert",),
+    "recommend": ("encoder",) if CONTEXT_RANKING == "embedding" else (),
+}
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Runner
+# ─────────────────────────────────────────────────────────────────────────────
+def prewarm_stage_models(stages, run: PipelineRun) -> None:
+    """Load the models of stages that still have work, once, before the threads start."""
+    names = set()
+    for stage in stages:
+        tickers = [ALL_TICKERS] if stage in GLOBAL_STAGES else run.stocks
+        if run.force or not all(run.state.done(run.run_date, t, stage) for t in tickers):
+            names.update(STAGE_MODELS.get(stage, ()))
+    if not names:
+        return
+    try:
+        prewarm(*sorted(names))
+    except Exception as err:        # stages fall back or fail on their own
+        console.print(f"[yellow]⚠️  Model prewarm failed ({err}); loading on demand.[/]")
+
+
+def run_ticker_stages(stock: str, stages, run: PipelineRun) -> bool:
+    """Run `stages` in order for one ticker; stops at the first skip or failure."""
+    console.rule(f"[bold yellow]{stock} – {' → '.join(stages)}")
+    for stage in stages:
         try:
-            latest, prev = fetch_closing_prices(stock)
-        except PriceFetchError as err:
+            run_stage(stage, stock, run)
+        except SkipTicker as why:
+            console.print(f"[italic]{stock}: {why}.[/]")
+            return True
+        except (PriceFetchError, StageNotReady) as err:
             console.print(f"[red]{err}[/]")
+            return False
+        except Exception as err:
+            console.print(f"[red]❌ {stock} failed in '{stage}': {err}[/]")
+            return False
+    return True
+
+
+def _run_per_ticker(fn, stocks, workers, *args):
+    """`fn(stock, *args)` for every ticker – results in `stocks` order."""
+    if workers <= 1:
+        return [fn(stock, *args) for stock in stocks]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda stock: fn(stock, *args), stocks))
+
+
+def _claim_articles(fetched: dict, stocks) -> dict:
+    """
+    Give each article to the first ticker (in `stocks` order) that fetched
+    it. Parallel ingests would otherwise both miss the doc and both insert
+    it, leaving `keywords` / `economic_data_id` to whichever commits last.
+    """
+    seen, claimed = set(), {}
+    for stock in stocks:
+        if fetched.get(stock) is None:      # fetch failed – keep the marker
+            claimed[stock] = None
             continue
-        move_pct = (latest - prev) / prev * 100
-        arrow    = "↑" if latest > prev else "↓"
-
-        # 7) accuracy flags
-        fin_ok = evaluate_model(stock, finbert_rec, "FinBERT",    latest, prev)
-        gpt_ok = evaluate_model(stock, gpt_rec,    "GPT-4o-mini", latest, prev)
-
-        # 8) add to summary table
-        summary_rows.append((
-            stock,
-            f"{finbert_total:+.3f}",
-            finbert_rec.upper(),
-            gpt_rec.upper(),
-            f"{prev:.2f}",
-            f"{latest:.2f}",
-            f"{move_pct:+.2f} %",
-            "✅" if fin_ok else "❌",
-            "✅" if gpt_ok else "❌"
-        ))
-
-        # 9) write to Firestore
-        store_recommendation(
-            stock, agg_rec, gpt_rec, summary, gpt_ok,
-            latest, prev, detail
-        )
+        claimed[stock] = []
+        for art in fetched[stock]:
+            doc_id = news_doc_id(art["url"]) if art.get("url") else None
+            if doc_id in seen:
+                continue
+            if doc_id:
+                seen.add(doc_id)
+            claimed[stock].append(art)
+    return claimed
+
+
+def _summary_row(stock: str, run: PipelineRun):
+    rec   = run.state.get(run.run_date, stock, "recommend")
+    price = run.state.get(run.run_date, stock, "price")
+    ok    = run.state.get(run.run_date, stock, "evaluate")
+    if not (rec and price and ok):
+        return None
+    return (
+        stock,
+        f"{rec['finbert_total']:+.3f}",
+        f"{rec['decayed_net']:+.3f}",
+        rec["finbert_rec"].upper(),
+        rec["gpt_rec"].upper(),
+        f"{price['prev']:.2f}",
+        f"{price['latest']:.2f}",
+        f"{ok['move_pct']:+.2f} %",
+        "✅" if ok["fin_ok"] else "❌",
+        "✅" if ok["gpt_ok"] else "❌"
+    )
+
 
-    # ── pretty Rich table ────────────────────────────────────────────
+def run_daily_pipeline(stocks, articles_per_stock: int = 20,
+                       workers: int = PIPELINE_WORKERS, stages=None,
+                       run_date: str = None, force: bool = False,
+                       state: CheckpointStore = None) -> None:
+    """
+    Runs `stages` (default: all, in STAGES order) for `run_date` (default:
+    today, UTC). Every completed (run_date, ticker, stage) is checkpointed,
+    so a rerun only does the remaining work; `force` recomputes the selected
+    stages. Per-ticker stages run on a bounded thread pool (`workers`,
+    1 = sequential); FinBERT scoring runs once in between.
+    """
+    stages   = [s for s in STAGES if stages is None or s in stages]
+    now      = datetime.now(timezone.utc)
+    run_date = run_date or now.date().isoformat()
+    day_end  = datetime.fromisoformat(run_date).replace(tzinfo=timezone.utc) + timedelta(days=1)
+    cutoff   = min(now, day_end) - timedelta(hours=WINDOW_HOURS)
+    cutoff_epoch = int(cutoff.timestamp())
+    run = PipelineRun(run_date, state or CheckpointStore(), STAGES, GLOBAL_STAGES, force,
+                      list(stocks), cutoff_epoch=cutoff_epoch,
+                      today_day=cutoff_epoch // 86400,          # UTC day of cutoff.date()
+                      articles_per_stock=articles_per_stock)
+    workers = max(1, min(workers, len(stocks)))
+    prewarm_stage_models(stages, run)
+    t0 = time.perf_counter()
+
+    # 0) fetch headlines concurrently (shared NewsAPI quota) – only for pending ingests
+    if "ingest" in stages:
+        pending = [s for s in stocks
+                   if force or not run.state.done(run_date, s, "ingest")]
+        if pending:
+            run.fetched = _claim_articles(fetch_news_batch(pending, articles_per_stock), pending)
+
+    before = [s for s in stages if s in ("ingest", "link")]
+    after  = [s for s in stages if s not in GLOBAL_STAGES and s not in before]
+    failed = []
+
+    # 1–2) ingest + link
+    if before:
+        ok = _run_per_ticker(run_ticker_stages, stocks, workers, before, run)
+        failed += [s for s, good in zip(stocks, ok) if not good]
+        if "ingest" in before:
+            save_ingest_indexes()
+
+    # 2b) score everything ingested above – once per run
+    if "score" in stages:
+        try:
+            run_stage("score", ALL_TICKERS, run)
+        except Exception as err:
+            console.print(f"[red]❌ FinBERT scoring failed: {err}[/]")
+            failed.append(ALL_TICKERS)
+
+    # 3–9) context → GPT → prices → evaluate → store – only on complete upstream
+    ready = [] if ALL_TICKERS in failed else [s for s in stocks if s not in failed]
+    if after and ready:
+        ok = _run_per_ticker(run_ticker_stages, ready, workers, after, run)
+        failed += [s for s, good in zip(ready, ok) if not good]
+
+    # ── pretty Rich table (ticker order as given) ───────────────────
+    summary_rows = [row for row in (_summary_row(s, run) for s in stocks) if row]
     if summary_rows:
-        table = Table(title="Daily Model Summary", show_lines=True)
-        for col in ["Ticker", "FinBERT Σ", "FinBERT Rec", "GPT Rec",
+        table = Table(title=f"Daily Model Summary – {run_date}", show_lines=True)
+        for col in ["Ticker", "FinBERT Σ", "Decayed Σ", "FinBERT Rec", "GPT Rec",
                     "Prev Close", "Latest Close", "Move %", "FinBERT✔", "GPT✔"]:
             table.add_column(col, justify="right")
         for row in summary_rows:
             table.add_row(*row)
         console.print(table)
 
-    console.print("[bold green]✅ Daily pipeline complete.[/]")
+    console.print(llm_cache_report())
+    if run.skipped:
+        console.print(f"⏭️  Reused {len(run.skipped)} checkpointed stage(s) for {run_date}.")
+    if failed:
+        console.print(f"[yellow]⚠️  Incomplete: {', '.join(sorted(set(failed)))} – "
+                      f"rerun to resume from the last checkpoint.[/]")
+    console.print(f"[bold green]✅ Daily pipeline complete in "
+                  f"{time.perf_counter() - t0:.1f}s ({workers} worker(s)).[/]")
 
 
 if __name__ == "__main__":
-    run_daily_pipeline(["TSLA", "AAPL", "MSFT", "NVDA", "NVO"])
+    import argparse
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, default=PIPELINE_WORKERS,
+                    help="per-ticker I/O threads (1 = sequential)")
+    ap.add_argument("--stage", action="append", choices=list(STAGES),
+                    help="run only this stage (repeatable); upstream checkpoints must exist")
+    ap.add_argument("--ticker", action="append",
+                    help="restrict to this ticker (repeatable)")
+    ap.add_argument("--date", help="run date YYYY-MM-DD (UTC) – checkpoint key, default today")
+    ap.add_argument("--force", action="store_true",
+                    help="recompute the selected stages even if checkpointed")
+    args = ap.parse_args()
+    run_daily_pipeline(args.ticker or DEFAULT_STOCKS, workers=args.workers,
+                       stages=args.stage, run_date=args.date, force=args.force)
@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# caches and indexes go to a throwaway directory – set before any utils import
+os.environ.setdefault("CACHE_DIR", tempfile.mkdtemp(prefix="thesis-test-cache-"))
+os.environ.setdefault("RAG_CONTEXT_RANKING", "none")
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
@@ -0,0 +1,139 @@
+import math
+import os
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.bm25_index import BM25Index, tokenize
+
+NEWS_CSV = os.path.join(os.path.dirname(__file__), os.pardir, "Data Analysis", "Data", "news.csv")
+TICKERS = ["TSLA", "AAPL", "NVDA", "NVO"]
+QUERIES = ["tesla deliveries", "apple iphone sales", "nvidia chips demand",
+           "novo nordisk wegovy", "stock market rally"]
+
+
+def _corpus():
+    if os.path.exists(NEWS_CSV):
+        news = pd.read_csv(NEWS_CSV, usecols=["doc_id", "title", "content", "publishedAt"])
+        news = news.dropna(subset=["doc_id"]).drop_duplicates("doc_id").head(1500).fillna("")
+        texts = (news["title"] + " " + news["content"]).tolist()
+        return news["doc_id"].tolist(), texts, news["publishedAt"].tolist()
+    texts = ["Tesla deliveries beat estimates", "Apple iPhone sales slow in China",
+             "Nvidia chips demand soars", "Novo Nordisk raises Wegovy outlook",
+             "Stock market rally lifts tech"] * 20
+    stamps = [f"2025-04-{1 + i % 28:02d}T12:00:00Z" for i in range(len(texts))]
+    return [f"doc{i}" for i in range(len(texts))], texts, stamps
+
+
+def _build(chunks, compact_between):
+    index = BM25Index(path="unused")
+    for ids, texts, stamps in chunks:
+        tickers = [TICKERS[i % len(TICKERS)] for i in range(len(ids))]
+        index.add(ids, texts, tickers, stamps)
+        if compact_between:
+            index.compact()
+    return index
+
+
+def _chunks(ids, texts, stamps, size):
+    return [(ids[i:i + size], texts[i:i + size], stamps[i:i + size])
+            for i in range(0, len(ids), size)]
+
+
+def brute_force(ids, texts, query, k1=1.5, b=0.75):
+    """Reference Okapi BM25 score of every document, one at a time."""
+    docs = [Counter(tokenize(t)) for t in texts]
+    lengths = [sum(d.values()) for d in docs]
+    avg = sum(lengths) / len(docs)
+    scores = []
+    for doc, length in zip(docs, lengths):
+        score = 0.0
+        for term in dict.fromkeys(tokenize(query)):
+            df = sum(term in d for d in docs)
+            tf = doc.get(term, 0)
+            if tf:
+                idf = math.log1p((len(docs) - df + 0.5) / (df + 0.5))
+                score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg))
+        scores.append(score)
+    return dict(zip(ids, scores))
+
+
+def test_incremental_compaction_equals_full_build():
+    ids, texts, stamps = _corpus()
+    full = _build([(ids, texts, stamps)], compact_between=True)
+    incremental = _build(_chunks(ids, texts, stamps, 97), compact_between=True)
+
+    assert incremental.ids == full.ids
+    np.testing.assert_array_equal(incremental._indptr, full._indptr)
+    np.testing.assert_array_equal(incremental._postings, full._postings)
+    np.testing.assert_array_equal(incremental._tfs, full._tfs)
+    for query in QUERIES:
+        assert incremental.search(query, k=10) == full.search(query, k=10)
+
+
+def test_buffered_documents_are_searchable_before_compaction():
+    ids, texts, stamps = _corpus()
+    half = len(ids) // 2
+    index = _build([(ids[:half], texts[:half], stamps[:half])], compact_between=True)
+    index.add(ids[half:], texts[half:], [None] * (len(ids) - half), stamps[half:])
+    assert index._buffer
+    for query in QUERIES:
+        got, want = index.search(query, k=10), brute_force(ids, texts, query)
+        # duplicate articles tie, so compare scores rather than which tied id won
+        assert [s for _, s in got] == pytest.approx(sorted(want.values(), reverse=True)[:10], rel=1e-4)
+        assert [s for _, s in got] == pytest.approx([want[d] for d, _ in got], rel=1e-4)
+
+
+def test_ticker_and_time_filters():
+    index = BM25Index(path="unused")
+    index.add(["a", "b", "c", "d"],
+              ["Tesla recall", "Tesla deliveries", "Tesla price cut", "Tesla rally"],
+              ["TSLA", "TSLA", "tsla", "AAPL"],
+              ["2025-04-01T00:00:00Z", "2025-04-05T00:00:00Z", None, "2025-04-03T00:00:00Z"])
+
+    assert {d for d, _ in index.search("tesla", ticker="TSLA")} == {"a", "b", "c"}
+    assert {d for d, _ in index.search("tesla", start="2025-04-02")} == {"b", "d"}
+    assert {d for d, _ in index.search("tesla", end="2025-04-04")} == {"a", "d"}
+    assert index.search("tesla", ticker="MSFT") == []
+    assert index.search("unknown words") == []
+
+
+def test_save_load_round_trip(tmp_path):
+    ids, texts, stamps = _corpus()
+    index = BM25Index(path=str(tmp_path / "bm25.npz"))
+    index.add(ids, texts, [TICKERS[i % 4] for i in range(len(ids))], stamps)
+    index.save()
+    assert not index._buffer and not index.dirty
+
+    loaded = BM25Index.load(str(tmp_path / "bm25.npz"))
+    assert loaded.ids == index.ids and ids[0] in loaded
+    for query in QUERIES:
+        assert loaded.search(query, k=5, ticker="TSLA") == index.search(query, k=5, ticker="TSLA")
+    assert loaded.add(ids[:3], texts[:3], [None] * 3, stamps[:3]) == 0
+
+
+def test_search_while_another_thread_adds():
+    import threading
+    ids, texts, stamps = _corpus()
+    index, errors = BM25Index(path="unused"), []
+
+    def writer():
+        for chunk_ids, chunk_texts, chunk_stamps in _chunks(ids, texts, stamps, 25):
+            index.add(chunk_ids, chunk_texts, [None] * len(chunk_ids), chunk_stamps)
+
+    def reader():
+        try:
+            for _ in range(200):
+                for doc_id, _ in index.search("tesla deliveries", k=5):
+                    assert doc_id in index
+        except Exception as e:          # noqa: BLE001 – surfaced below
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer), threading.Thread(target=reader)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == [] and len(index) == len(ids)
@@ -0,0 +1,59 @@
+import uuid
+
+from utils import cache
+from utils.cache import cached, http_cache_stats, make_key, set_bypass
+
+
+def _endpoint():
+    return f"test-{uuid.uuid4().hex[:8]}"
+
+
+def test_make_key_is_order_independent_for_dicts():
+    assert make_key("q", {"a": 1, "b": 2}) == make_key("q", {"b": 2, "a": 1})
+    assert make_key("q", 1) != make_key("q", 2)
+
+
+def test_cached_memoises_per_arguments():
+    endpoint, calls = _endpoint(), []
+
+    @cached(endpoint)
+    def fetch(ticker, period="5d"):
+        calls.append((ticker, period))
+        return [ticker, period]
+
+    assert fetch("TSLA") == ["TSLA", "5d"]
+    assert fetch("TSLA") == ["TSLA", "5d"]
+    assert fetch("TSLA", period="1mo") == ["TSLA", "1mo"]
+    assert calls == [("TSLA", "5d"), ("TSLA", "1mo")]
+    assert http_cache_stats()[endpoint] == {"hits": 1, "misses": 2}
+
+
+def test_none_results_are_not_cached():
+    endpoint, calls = _endpoint(), []
+
+    @cached(endpoint)
+    def fetch(ticker):
+        calls.append(ticker)
+        return None
+
+    fetch("AAPL")
+    fetch("AAPL")
+    assert calls == ["AAPL", "AAPL"]
+
+
+def test_bypass_skips_reads_but_refreshes_entries():
+    endpoint, calls = _endpoint(), []
+
+    @cached(endpoint)
+    def fetch(ticker):
+        calls.append(ticker)
+        return len(calls)
+
+    assert fetch("NVO") == 1
+    set_bypass(True)
+    try:
+        assert fetch("NVO") == 2
+    finally:
+        set_bypass(False)
+    assert fetch("NVO") == 2            # the bypassed call wrote its fresh result
+    assert not cache.is_bypassed()
@@ -0,0 +1,48 @@
+import os
+import re
+
+import pandas as pd
+import pytest
+
+from utils.entity_matcher import EntityMatcher, name_variants
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "Data Analysis", "Data")
+PATTERNS = {"tsla": "TSLA", "tesla": "TSLA", "aapl": "AAPL", "apple": "AAPL",
+            "nvidia": "NVDA", "nvda": "NVDA", "novo nordisk": "NVO", "novo": "NVO",
+            "microsoft": "MSFT", "advanced micro devices": "AMD", "amd": "AMD"}
+
+
+def reference_match(patterns, text):
+    """Brute force: scan every pattern separately, keep word-bounded hits."""
+    text, hits = text.lower(), []
+    for pattern, entity in patterns.items():
+        for m in re.finditer(f"(?={re.escape(pattern)})", text):
+            start, end = m.start(), m.start() + len(pattern)
+            if (start == 0 or not text[start - 1].isalnum()) and \
+               (end == len(text) or not text[end].isalnum()):
+                hits.append((start, end, entity))
+    return sorted(hits)
+
+
+def test_name_variants_peel_corporate_suffixes():
+    assert name_variants("Tesla, Inc.") == ["tesla, inc.", "tesla"]
+    assert name_variants("Novo Nordisk A/S") == ["novo nordisk a/s", "novo nordisk"]
+    assert name_variants(None) == []
+
+
+def test_word_boundaries_and_mention_order():
+    matcher = EntityMatcher(PATTERNS)
+    assert matcher.match("Pineapple sales at amdocs") == []
+    assert matcher.match("TSLA: Tesla and Apple; Apple again, apple.") == ["AAPL", "TSLA"]
+    assert matcher.match("Novo Nordisk (NVO) vs Nvidia") == ["NVO", "NVDA"]
+    assert matcher.match("新生活でApple Watch") == []     # CJK letters are word characters too
+
+
+@pytest.mark.skipif(not os.path.exists(os.path.join(DATA_DIR, "news.csv")),
+                    reason="news export not available")
+def test_matches_brute_force_on_news_export():
+    news = pd.read_csv(os.path.join(DATA_DIR, "news.csv"), usecols=["title", "content"])
+    matcher = EntityMatcher(PATTERNS)
+    for title, content in news.fillna("").itertuples(index=False):
+        text = f"{title} {content}"
+        assert sorted(matcher.find(text)) == reference_match(PATTERNS, text)
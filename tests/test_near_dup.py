@@ -0,0 +1,46 @@
+from utils.near_dup import MinHashIndex, article_text
+
+STORY = ("Tesla shares rose sharply on Tuesday after the electric carmaker reported "
+         "record quarterly deliveries that beat analyst estimates, with strong demand "
+         "for the Model Y in China and Europe offsetting weaker sales at home")
+REPOST = STORY + " according to a company statement"
+OTHER = ("Apple is facing a new antitrust probe in the European Union over the fees "
+         "it charges app developers on its App Store, regulators said on Monday")
+
+
+def test_article_text_strips_newsapi_truncation_tail():
+    assert article_text("Title", "Body text… [+1234 chars]") == "Title Body text"
+    assert article_text(None, float("nan")) == ""
+
+
+def test_repost_maps_to_the_first_article():
+    index = MinHashIndex()
+    assert index.match_or_add("a", STORY) is None
+    assert index.match_or_add("b", REPOST) == "a"
+    assert index.match_or_add("c", OTHER) is None
+    assert index.ids == ["a", "c"]                  # only canonicals are stored
+
+
+def test_same_doc_id_is_not_its_own_duplicate():
+    index = MinHashIndex()
+    index.match_or_add("a", STORY)
+    assert index.match_or_add("a", STORY) is None
+    assert len(index) == 1
+
+
+def test_empty_text_is_never_indexed():
+    index = MinHashIndex()
+    assert index.match_or_add("a", "") is None
+    assert len(index) == 0
+
+
+def test_save_load_round_trip(tmp_path):
+    path = str(tmp_path / "near_dup.npz")
+    index = MinHashIndex()
+    index.match_or_add("a", STORY)
+    index.match_or_add("c", OTHER)
+    index.save(path)
+
+    loaded = MinHashIndex.load(path)
+    assert loaded.ids == ["a", "c"] and not loaded.dirty
+    assert loaded.match_or_add("b", REPOST) == "a"
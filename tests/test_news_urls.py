@@ -0,0 +1,25 @@
+from utils.news_urls import canonicalize_url, news_doc_id
+
+
+def test_tracking_params_are_stripped_and_the_rest_sorted():
+    url = ("https://example.com/story?utm_source=x&b=2&fbclid=abc&UTM_Medium=y"
+           "&a=1&gclid=z&ref=home")
+    assert canonicalize_url(url) == "https://example.com/story?a=1&b=2"
+
+
+def test_scheme_host_www_fragment_and_trailing_slash_are_normalised():
+    assert canonicalize_url("HTTPS://WWW.Example.COM/News/Story/#comments") == \
+        "https://example.com/News/Story"        # path case is significant
+    assert canonicalize_url("  https://example.com/  ") == "https://example.com/"
+    assert canonicalize_url("//example.com/a") == "https://example.com/a"
+
+
+def test_syndicated_variants_share_one_doc_id():
+    variants = ["https://www.reuters.com/markets/tsla-beats/",
+                "https://reuters.com/markets/tsla-beats?utm_campaign=feed",
+                "HTTPS://REUTERS.COM/markets/tsla-beats#top"]
+    ids = {news_doc_id(u) for u in variants}
+    assert len(ids) == 1
+    doc_id = ids.pop()
+    assert len(doc_id) == 40 and all(c in "0123456789abcdef" for c in doc_id)
+    assert news_doc_id("https://reuters.com/markets/tsla-misses") != doc_id
@@ -0,0 +1,150 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import pytest
+
+from utils.pipeline_state import (ALL_TICKERS, CheckpointStore, SkipTicker, StageNotReady,
+                                  StageRun, run_stage, upstream)
+
+DAY, NEXT_DAY = "2025-04-01", "2025-04-02"
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CheckpointStore(str(tmp_path / "state" / "pipeline_state.sqlite"))
+
+
+def test_put_get_round_trip(store):
+    assert store.get(DAY, "TSLA", "ingest") is None and not store.done(DAY, "TSLA", "ingest")
+    store.put(DAY, "TSLA", "ingest", {"stored": 3, "at": datetime(2025, 4, 1, tzinfo=timezone.utc)})
+    assert store.get(DAY, "TSLA", "ingest") == {"stored": 3, "at": "2025-04-01 00:00:00+00:00"}
+    assert store.done(DAY, "TSLA", "ingest")
+    assert store.get(NEXT_DAY, "TSLA", "ingest") is None        # runs are keyed by date
+
+    store.put(DAY, "TSLA", "ingest", {"stored": 5})              # rerun replaces
+    assert store.get(DAY, "TSLA", "ingest") == {"stored": 5}
+
+
+def test_checkpoints_survive_a_restart(store):
+    store.put(DAY, "TSLA", "ingest", {"stored": 3}, seconds=1.5)
+    store.put(DAY, ALL_TICKERS, "score", {"scored": 7}, seconds=9.0)
+
+    resumed = CheckpointStore(store.path)
+    assert resumed.get(DAY, ALL_TICKERS, "score") == {"scored": 7}
+    assert resumed.summary(DAY) == {"TSLA": {"ingest": 1.5}, ALL_TICKERS: {"score": 9.0}}
+    assert resumed.summary(NEXT_DAY) == {}
+
+
+def test_clear_by_ticker_and_stage(store):
+    for ticker in ("TSLA", "AAPL"):
+        for stage in ("ingest", "link", "select_context"):
+            store.put(DAY, ticker, stage, {})
+    store.put(DAY, ALL_TICKERS, "score", {})
+    store.put(NEXT_DAY, "TSLA", "ingest", {})
+
+    # recomputing TSLA's link invalidates its later stage and the global score only
+    assert store.clear(DAY, "TSLA", "select_context") == 1
+    assert store.clear(DAY, ALL_TICKERS, "score") == 1
+    assert store.summary(DAY) == {"TSLA": {"ingest": None, "link": None},
+                                  "AAPL": {"ingest": None, "link": None, "select_context": None}}
+
+    assert store.clear(DAY, stage="link") == 2
+    assert store.clear(DAY, "AAPL") == 2
+    assert store.clear(DAY) == 1
+    assert store.summary(DAY) == {} and store.done(NEXT_DAY, "TSLA", "ingest")
+
+
+def test_concurrent_writers(store):
+    tickers = [f"T{i}" for i in range(40)]
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda t: store.put(DAY, t, "ingest", {"ticker": t}), tickers))
+    assert all(store.get(DAY, t, "ingest") == {"ticker": t} for t in tickers)
+
+
+# ── stage runner ─────────────────────────────────────────────────────────────
+def _stages(calls, fail=(), skip=()):
+    """Stub registry shaped like daily_run's: ingest → link → score (global) → recommend → store."""
+    def stage(name, needs=()):
+        def fn(stock, run):
+            for dep in needs:
+                upstream(run, ALL_TICKERS if dep == "score" else stock, dep)
+            calls.append((stock, name))
+            if (stock, name) in fail:
+                raise RuntimeError(f"{name} failed")
+            if (stock, name) in skip:
+                return {"skipped": "no qualifying headlines"}
+            return {"stage": name, "run": len(calls)}
+        return fn
+    return {"ingest":    stage("ingest"),
+            "link":      stage("link", ["ingest"]),
+            "score":     stage("score"),
+            "recommend": stage("recommend", ["link", "score"]),
+            "store":     stage("store", ["recommend"])}
+
+
+def _run(store, stages, force=False, only=None):
+    """daily_run's order: per-ticker head, global score once, per-ticker tail."""
+    run = StageRun(DAY, store, stages, frozenset({"score"}), force, ["TSLA", "AAPL"])
+    names = [s for s in stages if only is None or s in only]
+    for part in (["ingest", "link"], ["score"], ["recommend", "store"]):
+        for stock in ([ALL_TICKERS] if part == ["score"] else run.stocks):
+            for name in (n for n in names if n in part):
+                try:
+                    run_stage(name, stock, run)
+                except (SkipTicker, StageNotReady, RuntimeError):
+                    break
+    return run
+
+
+def test_resume_skips_completed_stages_and_reruns_failed_ones(store):
+    calls = []
+    _run(store, _stages(calls, fail={("AAPL", "link")}))
+    assert ("AAPL", "recommend") not in calls          # StageNotReady: link never completed
+    assert store.done(DAY, "TSLA", "store") and not store.done(DAY, "AAPL", "link")
+
+    calls.clear()
+    run = _run(store, _stages(calls))
+    # only AAPL's missing work runs; its new link invalidated the global score
+    assert calls == [("AAPL", "link"), (ALL_TICKERS, "score"),
+                     ("AAPL", "recommend"), ("AAPL", "store")]
+    assert ("TSLA", "recommend") in run.skipped and store.done(DAY, "AAPL", "store")
+
+
+def test_skipped_results_are_not_persisted(store):
+    calls = []
+    _run(store, _stages(calls, skip={("TSLA", "recommend")}))
+    assert not store.done(DAY, "TSLA", "recommend") and not store.done(DAY, "TSLA", "store")
+
+    calls.clear()
+    _run(store, _stages(calls))
+    assert calls == [("TSLA", "recommend"), ("TSLA", "store")]
+
+
+def test_force_clears_downstream_checkpoints(store):
+    _run(store, _stages([]))
+    first = store.get(DAY, "TSLA", "store")
+
+    # per-ticker stage: its ticker's later stages and the global score go
+    run = StageRun(DAY, store, _stages([]), frozenset({"score"}), True, ["TSLA", "AAPL"])
+    run_stage("link", "TSLA", run)
+    assert not store.done(DAY, "TSLA", "recommend") and not store.done(DAY, "TSLA", "store")
+    assert not store.done(DAY, ALL_TICKERS, "score")
+    assert store.done(DAY, "TSLA", "ingest") and store.done(DAY, "AAPL", "store")
+
+    # forced global stage: every ticker's later stages go
+    run_stage("score", ALL_TICKERS, run)
+    assert store.done(DAY, "AAPL", "link")
+    assert not any(store.done(DAY, t, s) for t in ("TSLA", "AAPL") for s in ("recommend", "store"))
+
+    calls = []
+    _run(store, _stages(calls), force=True, only=["recommend", "store"])
+    assert calls == [("TSLA", "recommend"), ("TSLA", "store"),
+                     ("AAPL", "recommend"), ("AAPL", "store")]
+    assert store.get(DAY, "TSLA", "store") != first
+
+
+def test_missing_upstream_raises_stage_not_ready(store):
+    run = StageRun(DAY, store, _stages([]), frozenset({"score"}))
+    with pytest.raises(StageNotReady):
+        run_stage("recommend", "TSLA", run)
+    assert store.summary(DAY) == {}
@@ -0,0 +1,91 @@
+import pytest
+
+import Agents.prompt_builder as pb
+from Agents.prompt_builder import (aggregate_sentiment, count_tokens, merge_headlines,
+                                   pack_context)
+
+
+def _doc(title, label="positive", score=0.5, **extra):
+    return {"title": title, "sentiment_label": label, "sentiment_score": score, **extra}
+
+
+def test_count_tokens_falls_back_to_chars_over_four(monkeypatch):
+    monkeypatch.setattr(pb, "_encoding", lambda model: None)
+    assert count_tokens("") == 0
+    assert count_tokens("abcd") == 1
+    assert count_tokens("abcde") == 2           # rounds up
+
+
+def test_count_tokens_uses_the_encoding_when_available(monkeypatch):
+    class Words:
+        def encode(self, text):
+            return text.split()
+    monkeypatch.setattr(pb, "_encoding", lambda model: Words())
+    assert count_tokens("three word text") == 3
+
+
+def test_merge_headlines_jaccard_threshold():
+    docs = [_doc("Tesla beats delivery estimates"),
+            _doc("Tesla beats delivery estimates again"),     # 4/5 = 0.8 → merged
+            _doc("Tesla beats estimates"),                    # 3/5 = 0.6 → own group
+            _doc("Apple faces antitrust probe")]
+    groups = merge_headlines(docs)
+    assert [[d["title"] for d in g] for g in groups] == [
+        ["Tesla beats delivery estimates", "Tesla beats delivery estimates again"],
+        ["Tesla beats estimates"],
+        ["Apple faces antitrust probe"],
+    ]
+
+
+def test_merge_headlines_by_cluster_keeps_ranking_order():
+    docs = [_doc("Nvidia unveils GPU", cluster_id="c1"),
+            _doc("Fed holds rates"),
+            _doc("New Nvidia chip announced", cluster_id="c1")]
+    groups = merge_headlines(docs)
+    assert [len(g) for g in groups] == [2, 1]
+    assert groups[0][0]["title"] == "Nvidia unveils GPU"      # first doc leads
+
+
+def test_aggregate_sentiment_counts_each_cluster_once():
+    docs = [_doc("Tesla beats estimates", "positive", 0.9, cluster_id="c1"),
+            _doc("Tesla beats estimates (repost)", "positive", 0.9, cluster_id="c1"),
+            _doc("Tesla recalls cars", "negative", 0.6)]
+    agg, sums = aggregate_sentiment(docs)
+    assert sums["positive"] == pytest.approx(0.9)
+    assert sums["negative"] == pytest.approx(0.6)
+    assert agg == "Buy"
+
+    agg, _ = aggregate_sentiment(docs[:1] + [_doc("Tesla recalls cars", "negative", 1.2)])
+    assert agg == "Sell"
+
+
+@pytest.mark.parametrize("budget", [0, 15, 40, 120])
+def test_pack_context_respects_the_token_budget(monkeypatch, budget):
+    monkeypatch.setattr(pb, "_encoding", lambda model: None)
+    docs = [_doc(f"Headline number {i} about {w}", summary="word " * 40)
+            for i, w in enumerate(["chips", "cars", "rates", "oil", "banks", "drugs"])]
+    ctx, stats = pack_context(docs, budget)
+
+    lines = ctx.splitlines()
+    assert stats["context_tokens"] <= budget
+    assert stats["context_tokens"] == sum(count_tokens(l + "\n") for l in lines)
+    assert stats["lines"] == len(lines)
+    assert stats["budget"] == budget
+
+
+def test_pack_context_drops_summary_before_dropping_the_article(monkeypatch):
+    monkeypatch.setattr(pb, "_encoding", lambda model: None)
+    doc = _doc("Fed holds rates", summary="long explanation " * 30)
+    title_only = count_tokens("- Fed holds rates (**0.5000**, positive)\n")
+    ctx, stats = pack_context([doc], title_only)
+    assert ctx == "- Fed holds rates (**0.5000**, positive)"
+    assert stats["context_tokens"] == title_only
+
+
+def test_pack_context_merges_reposts_into_one_line(monkeypatch):
+    monkeypatch.setattr(pb, "_encoding", lambda model: None)
+    docs = [_doc("Tesla beats delivery estimates"),
+            _doc("Tesla beats delivery estimates again")]
+    ctx, stats = pack_context(docs, 1000)
+    assert ctx == "- Tesla beats delivery estimates [+1 similar] (**0.5000**, positive)"
+    assert stats["merged"] == 1 and stats["groups"] == 1
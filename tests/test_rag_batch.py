@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+from Agents.prompt_builder import LLM_CACHE_SIZE, llm_cache_key
+from Agents.rag_batch import LocalBatchClient, generate_rag_batch
+from utils.cache import get_cache
+
+
+def _doc(title, label, score):
+    return {"title": title, "sentiment_label": label, "sentiment_score": score,
+            "ingested_at": "2025-04-01T10:00:00+00:00"}
+
+
+BULLISH = [_doc("Tesla beats delivery estimates", "positive", 0.9),
+           _doc("Tesla opens new factory", "positive", 0.7)]
+BEARISH = [_doc("Apple faces antitrust probe", "negative", 0.8)]
+
+
+class CountingClient(LocalBatchClient):
+    def __init__(self):
+        super().__init__()
+        self.submitted = []
+        create = self.batches.create
+        self.batches.create = lambda **kw: self.submitted.append(kw) or create(**kw)
+
+
+def test_batch_round_trip_offline(tmp_path):
+    client = CountingClient()
+    requests = [("Outlook for TSLA?", BULLISH), ("Outlook for TSLA?", BULLISH),
+                ("Outlook for AAPL?", BEARISH)]
+
+    results = generate_rag_batch(requests, client, poll_seconds=0, job_dir=str(tmp_path))
+
+    assert [r[:2] for r in results] == [("Buy", "Buy"), ("Buy", "Buy"), ("Sell", "Sell")]
+    assert results[0][2].startswith("- Tesla beats delivery estimates")
+    assert len(client.submitted) == 1
+    job_files = os.listdir(tmp_path)
+    assert len(job_files) == 1
+    with open(tmp_path / job_files[0], encoding="utf-8") as fh:
+        assert len(fh.read().splitlines()) == 2        # identical prompts sent once
+
+
+def test_batch_answers_fill_the_llm_cache(tmp_path):
+    from Agents.prompt_builder import aggregate_sentiment, build_prompt
+    docs = [_doc("Nvidia unveils new GPU", "positive", 0.6)]
+    generate_rag_batch([("Outlook for NVDA?", docs)], LocalBatchClient(),
+                       poll_seconds=0, job_dir=str(tmp_path / "first"))
+
+    prompt = build_prompt(aggregate_sentiment(docs)[0], docs)
+    key = llm_cache_key(prompt, "gpt-4o-mini", max_tokens=200, temperature=0)
+    assert get_cache("llm", LLM_CACHE_SIZE).get(key).startswith("Recommendation: Buy")
+
+    # cached prompts are not submitted again
+    client = CountingClient()
+    results = generate_rag_batch([("Outlook for NVDA?", docs)], client,
+                                 poll_seconds=0, job_dir=str(tmp_path / "second"))
+    assert client.submitted == []
+    assert results[0][1] == "Buy"
+
+
+def test_unanswered_requests_fall_back_to_aggregator(tmp_path):
+    class FailingClient(LocalBatchClient):
+        def _run(self, batch):
+            batch.status = "failed"
+
+    docs = [_doc("Novo Nordisk cuts outlook", "negative", 0.95)]
+    results = generate_rag_batch([("Outlook for NVO?", docs)], FailingClient(),
+                                 poll_seconds=0, job_dir=str(tmp_path))
+    assert results == [("Sell", "Sell", "- **Error generating reasoning**.",
+                        {"positive": 0.0, "neutral": 0.0, "negative": pytest.approx(0.95)})]
@@ -0,0 +1,73 @@
+import types
+import asyncio
+
+import pytest
+
+import utils.rate_limit as rl
+from utils.rate_limit import NewsQuotaExhausted, TokenBucket
+
+
+class FakeClock:
+    """monotonic() + asyncio.sleep() that advance virtual time only."""
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rl, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+    monkeypatch.setattr(rl.asyncio, "sleep", clock.sleep)
+    return clock
+
+
+def _acquire(bucket, n):
+    async def go():
+        for _ in range(n):
+            await bucket.acquire()
+    asyncio.run(go())
+
+
+def test_burst_then_waits_for_refill(clock):
+    bucket = TokenBucket(rate=2.0, capacity=3)
+    _acquire(bucket, 3)
+    assert clock.slept == []                     # burst is free
+    _acquire(bucket, 2)
+    assert clock.slept == [pytest.approx(0.5), pytest.approx(0.5)]
+    assert bucket.used == 5
+
+
+def test_refill_is_capped_at_capacity(clock):
+    bucket = TokenBucket(rate=1.0, capacity=2)
+    _acquire(bucket, 2)
+    clock.now += 60                              # long idle
+    _acquire(bucket, 2)
+    assert clock.slept == []
+    _acquire(bucket, 1)
+    assert clock.slept == [pytest.approx(1.0)]
+
+
+def test_quota_is_a_hard_limit(clock):
+    bucket = TokenBucket(rate=100.0, capacity=10, quota=2)
+    _acquire(bucket, 2)
+    assert bucket.remaining == 0
+    with pytest.raises(NewsQuotaExhausted):
+        _acquire(bucket, 1)
+    assert bucket.used == 2
+
+
+def test_exhaust_stops_every_caller(clock):
+    bucket = TokenBucket(rate=1.0, capacity=5)
+    _acquire(bucket, 1)
+    bucket.exhaust()                             # what a NewsAPI 429 triggers
+    with pytest.raises(NewsQuotaExhausted):
+        _acquire(bucket, 1)
+    assert bucket.used == 1
@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Agents.prompt_builder import aggregate_sentiment
+from utils.sentiment_agg import (MISSING_TS, aggregate, aggregate_by_ticker,
+                                 decay_weights, to_columns)
+
+NEWS_CSV = os.path.join(os.path.dirname(__file__), os.pardir, "Data Analysis", "Data", "news.csv")
+needs_news = pytest.mark.skipif(not os.path.exists(NEWS_CSV), reason="news export not available")
+
+
+def old_aggregate_sentiment(documents):
+    """The per-document loop aggregate_sentiment used before the columnar rewrite."""
+    summary = {"positive": 0.0, "neutral": 0.0, "negative": 0.0}
+    seen_clusters = set()
+    for d in documents:
+        cluster = d.get("cluster_id")
+        if cluster:
+            if cluster in seen_clusters:
+                continue
+            seen_clusters.add(cluster)
+        lbl = d.get("sentiment_label", "neutral").lower()
+        summary[lbl] += float(d.get("sentiment_score", 0.0))
+    agg = "Buy" if summary["positive"] >= summary["negative"] else "Sell"
+    return agg, summary
+
+
+def _news():
+    news = pd.read_csv(NEWS_CSV, usecols=["economic_data_id", "publishedAt",
+                                          "sentiment_label", "sentiment_score"])
+    return news.dropna(subset=["economic_data_id"])
+
+
+@needs_news
+def test_matches_old_loop_on_every_ticker_day_slice():
+    news = _news()
+    slices = news.groupby([news["economic_data_id"], news["publishedAt"].str[:10]])
+    assert slices.ngroups == 403
+    for _, group in slices:
+        docs = group.to_dict("records")
+        agg, summary = aggregate_sentiment(docs)
+        old_agg, old_summary = old_aggregate_sentiment(docs)
+        assert agg == old_agg
+        assert summary == pytest.approx(old_summary, abs=1e-9)
+
+
+def test_repost_clusters_count_once():
+    docs = [{"sentiment_label": "Positive", "sentiment_score": 0.9, "cluster_id": "c1"},
+            {"sentiment_label": "Positive", "sentiment_score": 0.8, "cluster_id": "c1"},
+            {"sentiment_label": "Negative", "sentiment_score": 0.7, "cluster_id": ""},
+            {"sentiment_label": "Negative", "sentiment_score": 0.6}]
+    assert aggregate_sentiment(docs) == old_aggregate_sentiment(docs)
+    cols = to_columns(docs)
+    assert aggregate(cols)["n"] == 3
+    assert aggregate(cols, dedupe_clusters=False)["n"] == 4
+    assert aggregate(cols)["net"] == pytest.approx(0.9 - 0.7 - 0.6)
+
+
+@needs_news
+def test_by_ticker_equals_per_ticker_aggregate():
+    docs = _news().to_dict("records")
+    cols = to_columns(docs, ts_fields=("publishedAt",))
+    now = float(cols.ts.max())
+    grouped = aggregate_by_ticker(cols, now=now)
+    assert set(grouped) == set(cols.tickers)
+    for ticker, result in grouped.items():
+        alone = aggregate(cols.take(np.flatnonzero(cols.tickers == ticker)), now=now)
+        assert result["counts"] == alone["counts"] and result["n"] == alone["n"]
+        assert result["sums"] == pytest.approx(alone["sums"])
+        assert result["net"] == pytest.approx(alone["net"])
+        assert result["decayed_net"] == pytest.approx(alone["decayed_net"])
+
+
+def test_decay_weights_halve_every_half_life():
+    now = 1_000_000.0
+    ts = np.array([now, now - 12 * 3600, now - 24 * 3600, now + 3600, MISSING_TS], dtype=np.int64)
+    assert decay_weights(ts, now=now, half_life_hours=12).tolist() == [1.0, 0.5, 0.25, 1.0, 0.0]
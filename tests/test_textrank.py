@@ -0,0 +1,32 @@
+from utils.textrank import split_sentences, textrank_summary
+
+ARTICLE = ("Tesla delivered a record number of vehicles in the third quarter. "
+           "Analysts had expected Tesla deliveries to fall short of the record. "
+           "The weather in Austin was mild this week. "
+           "Tesla shares rose after the record vehicle deliveries were announced. "
+           "A local bakery opened a second shop.")
+
+
+def test_split_sentences_drops_newsapi_truncation_tail():
+    assert split_sentences("First one. Second one! [+812 chars]") == ["First one.", "Second one!"]
+    assert split_sentences("Shares fell 3.5% today. \"Bad news,\" he said.") == \
+        ["Shares fell 3.5% today.", "\"Bad news,\" he said."]
+
+
+def test_short_texts_are_returned_whole():
+    assert textrank_summary("Only one sentence here.") == "Only one sentence here."
+    assert textrank_summary("") == ""
+    assert textrank_summary(None) == ""
+
+
+def test_picks_central_sentences_in_original_order():
+    summary = textrank_summary(ARTICLE, max_sentences=2)
+    picked = split_sentences(summary)
+    assert len(picked) == 2
+    assert all("Tesla" in s for s in picked)              # off-topic sentences lose
+    sentences = split_sentences(ARTICLE)
+    assert [sentences.index(s) for s in picked] == sorted(sentences.index(s) for s in picked)
+
+
+def test_is_deterministic():
+    assert textrank_summary(ARTICLE) == textrank_summary(ARTICLE)
@@ -0,0 +1,84 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from utils.vector_index import MISSING_TS, VectorIndex, to_epochs
+
+DIM = 16
+TICKERS = ["TSLA", "AAPL", "NVDA", None]
+
+
+def _corpus(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    ids = [f"doc{i}" for i in range(n)]
+    vecs = rng.normal(size=(n, DIM)).astype(np.float32)
+    tickers = [TICKERS[i % len(TICKERS)] for i in range(n)]
+    stamps = [f"2025-04-{1 + i % 28:02d}T12:00:00Z" for i in range(n)]
+    return ids, vecs, tickers, stamps
+
+
+def brute_force(vecs, tickers, stamps, query, k, ticker=None, start=None, end=None):
+    """Reference: score every row, apply filters, sort."""
+    unit = vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+    scores = unit @ (query / np.linalg.norm(query))
+    epochs, lo, hi = to_epochs(stamps), to_epochs([start])[0], to_epochs([end])[0]
+    keep = [i for i in range(len(vecs))
+            if (ticker is None or tickers[i] == ticker)
+            and (start is None or epochs[i] >= lo) and (end is None or epochs[i] <= hi)]
+    keep.sort(key=lambda i: -scores[i])
+    return [f"doc{i}" for i in keep[:k]]
+
+
+def test_to_epochs_handles_strings_datetimes_and_missing():
+    out = to_epochs(["1970-01-01T00:01:00Z", datetime(1970, 1, 1, 0, 2, tzinfo=timezone.utc),
+                     "2025-04-01T10:00:00+02:00", None, "not a date"])
+    assert out[:2].tolist() == [60, 120]
+    assert out[2] == to_epochs(["2025-04-01T08:00:00Z"])[0]
+    assert out[3] == out[4] == MISSING_TS
+
+
+@pytest.mark.parametrize("filters", [{}, {"ticker": "TSLA"}, {"ticker": "NVDA"},
+                                     {"start": "2025-04-10", "end": "2025-04-20"},
+                                     {"ticker": "AAPL", "start": "2025-04-15T00:00:00Z"}])
+def test_search_matches_brute_force(filters):
+    ids, vecs, tickers, stamps = _corpus()
+    index = VectorIndex(DIM, path="unused")
+    assert index.add(ids, vecs, tickers, stamps) == len(ids)
+    query = np.random.default_rng(1).normal(size=DIM)
+
+    got = [doc_id for doc_id, _ in index.search(query, k=10, **filters)]
+    assert got == brute_force(vecs, tickers, stamps, query, 10, **filters)
+
+
+def test_duplicate_ids_are_ignored_and_unknown_ticker_is_empty():
+    ids, vecs, tickers, stamps = _corpus(8)
+    index = VectorIndex(DIM, path="unused")
+    index.add(ids, vecs, tickers, stamps)
+    assert index.add(ids[:3] + ["new", "new"], vecs[:5], tickers[:5], stamps[:5]) == 1
+    assert len(index) == 9 and "new" in index
+    assert index.search(vecs[0], ticker="MSFT") == []
+
+
+def test_save_load_round_trip_with_appends(tmp_path):
+    ids, vecs, tickers, stamps = _corpus(50)
+    index = VectorIndex(DIM, path=str(tmp_path))
+    index.add(ids[:30], vecs[:30], tickers[:30], stamps[:30])
+    index.save()
+    index.add(ids[30:], vecs[30:], tickers[30:], stamps[30:])
+    index.save()                                       # second save appends only
+
+    loaded = VectorIndex.load(DIM, path=str(tmp_path))
+    assert loaded.ids == ids and not loaded.dirty
+    np.testing.assert_allclose(loaded.vector("doc7"), index.vector("doc7"), atol=1e-3)
+    query = vecs[7]
+    assert loaded.search(query, k=5, ticker=tickers[7])[0][0] == "doc7"
+    assert [d for d, _ in loaded.search(query, k=5)] == [d for d, _ in index.search(query, k=5)]
+
+
+def test_load_with_other_dim_starts_empty(tmp_path):
+    ids, vecs, tickers, stamps = _corpus(4)
+    index = VectorIndex(DIM, path=str(tmp_path))
+    index.add(ids, vecs, tickers, stamps)
+    index.save()
+    assert len(VectorIndex.load(DIM * 2, path=str(tmp_path))) == 0
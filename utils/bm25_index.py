@@ -0,0 +1,243 @@
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from utils.cache import CACHE_ROOT
+from utils.logger import get_logger
+from utils.vector_index import MISSING_TS, Timestamp, to_epoch, to_epochs
+
+logger = get_logger(__name__)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Configuration
+# ─────────────────────────────────────────────────────────────────────────────
+INDEX_PATH = os.path.join(CACHE_ROOT, "bm25_index.npz")
+BM25_K1    = 1.5
+BM25_B     = 0.75
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9'.-]*[a-z0-9]|[a-z0-9]")
+_STOP  = frozenset("""
+a an and are as at be but by for from has have he her his in is it its of on or
+that the their they this to was were will with which who would said says also
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall((text or "").lower()) if t not in _STOP]
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Inverted index (CSR postings + small append buffer)
+# ─────────────────────────────────────────────────────────────────────────────
+class BM25Index:
+    """
+    Okapi BM25 over article text with ticker / publication-time filters.
+
+    Postings live in CSR arrays: `indptr[t]:indptr[t+1]` slices `postings`
+    (doc rows, ascending) and `tfs` for term id `t`. Documents added since
+    the last `compact()` sit in a per-term append buffer that search reads
+    alongside the CSR slice; `save()` folds them in.
+    """
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B, path: str = INDEX_PATH):
+        self.k1, self.b, self.path = k1, b, path
+        self.ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._terms: Dict[str, int] = {}
+        self._indptr   = np.zeros(1, dtype=np.int64)
+        self._postings = np.empty(0, dtype=np.int32)
+        self._tfs      = np.empty(0, dtype=np.uint16)
+        self._buffer: Dict[int, Tuple[List[int], List[int]]] = {}
+        self._doc_len  = np.empty(0, dtype=np.float32)
+        self._tickers: List[str] = []
+        self._ticker_codes: Dict[str, int] = {}
+        self._codes = np.empty(0, dtype=np.int32)
+        self._ts    = np.empty(0, dtype=np.int64)
+        self._lock  = threading.Lock()
+        self.dirty  = False
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._rows
+
+    def _code(self, ticker: Optional[str]) -> int:
+        ticker = ticker.upper() if isinstance(ticker, str) else ""
+        if ticker not in self._ticker_codes:
+            self._ticker_codes[ticker] = len(self._tickers)
+            self._tickers.append(ticker)
+        return self._ticker_codes[ticker]
+
+    def add(self, ids: Iterable[str], texts: Iterable[str],
+            tickers: Iterable[Optional[str]], timestamps: Iterable[Timestamp]) -> int:
+        """Index documents not seen before; returns how many were added."""
+        ids, texts, tickers = list(ids), list(texts), list(tickers)
+        epochs = to_epochs(timestamps)
+        with self._lock:
+            lengths, codes, ts = [], [], []
+            for doc_id, text, ticker, epoch in zip(ids, texts, tickers, epochs):
+                if doc_id in self._rows:
+                    continue
+                row = len(self.ids)
+                self._rows[doc_id] = row
+                self.ids.append(doc_id)
+                counts = Counter(tokenize(text))
+                for term, tf in counts.items():
+                    tid = self._terms.setdefault(term, len(self._terms))
+                    docs, freqs = self._buffer.setdefault(tid, ([], []))
+                    docs.append(row)
+                    freqs.append(min(tf, np.iinfo(np.uint16).max))
+                lengths.append(sum(counts.values()))
+                codes.append(self._code(ticker))
+                ts.append(epoch)
+            if not lengths:
+                return 0
+            self._doc_len = np.concatenate([self._doc_len, np.array(lengths, dtype=np.float32)])
+            self._codes   = np.concatenate([self._codes, np.array(codes, dtype=np.int32)])
+            self._ts      = np.concatenate([self._ts, np.array(ts, dtype=np.int64)])
+            self.dirty = True
+            return len(lengths)
+
+    def compact(self) -> None:
+        """Merge the append buffer into the CSR arrays (O(postings), no sort)."""
+        with self._lock:
+            self._compact()
+
+    def _compact(self) -> None:
+        if not self._buffer:
+            return
+        n_terms    = len(self._terms)
+        old_counts = np.zeros(n_terms, dtype=np.int64)
+        old_counts[:len(self._indptr) - 1] = np.diff(self._indptr)
+        new_counts = np.zeros(n_terms, dtype=np.int64)
+        for tid, (docs, _) in self._buffer.items():
+            new_counts[tid] = len(docs)
+
+        indptr = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(old_counts + new_counts, out=indptr[1:])
+        postings = np.empty(indptr[-1], dtype=np.int32)
+        tfs      = np.empty(indptr[-1], dtype=np.uint16)
+
+        # existing postings keep their order, shifted to the new term offsets
+        nnz = len(self._postings)
+        if nnz:
+            term_of = np.repeat(np.arange(len(self._indptr) - 1), old_counts[:len(self._indptr) - 1])
+            pos = indptr[term_of] + (np.arange(nnz) - self._indptr[term_of])
+            postings[pos] = self._postings
+            tfs[pos]      = self._tfs
+        # buffered docs have higher row ids, so they go after them
+        for tid, (docs, freqs) in self._buffer.items():
+            start = indptr[tid] + old_counts[tid]
+            postings[start:start + len(docs)] = docs
+            tfs[start:start + len(docs)]      = freqs
+
+        self._indptr, self._postings, self._tfs = indptr, postings, tfs
+        self._buffer = {}
+
+    def _term_postings(self, tid: int) -> Tuple[np.ndarray, np.ndarray]:
+        docs, tfs = np.empty(0, dtype=np.int32), np.empty(0, dtype=np.uint16)
+        if tid < len(self._indptr) - 1:
+            lo, hi = self._indptr[tid], self._indptr[tid + 1]
+            docs, tfs = self._postings[lo:hi], self._tfs[lo:hi]
+        if tid in self._buffer:
+            extra_docs, extra_tfs = self._buffer[tid]
+            docs = np.concatenate([docs, np.array(extra_docs, dtype=np.int32)])
+            tfs  = np.concatenate([tfs, np.array(extra_tfs, dtype=np.uint16)])
+        return docs, tfs
+
+    def search(self, query: str, k: int = 10, ticker: Optional[str] = None,
+               start: Timestamp = None, end: Timestamp = None) -> List[Tuple[str, float]]:
+        """Top-`k` (doc_id, bm25) for `query`, optionally filtered by ticker and window."""
+        with self._lock:            # add() may be appending to the buffer concurrently
+            return self._search(query, k, ticker, start, end)
+
+    def _search(self, query: str, k: int, ticker: Optional[str],
+                start: Timestamp, end: Timestamp) -> List[Tuple[str, float]]:
+        n = len(self.ids)
+        terms = [self._terms[t] for t in dict.fromkeys(tokenize(query)) if t in self._terms]
+        if not n or not terms:
+            return []
+
+        avg_len = float(self._doc_len.mean()) or 1.0
+        norm    = self.k1 * (1 - self.b + self.b * self._doc_len / avg_len)
+        scores  = np.zeros(n, dtype=np.float32)
+        for tid in terms:
+            docs, tfs = self._term_postings(tid)
+            df  = len(docs)
+            idf = np.log1p((n - df + 0.5) / (df + 0.5))
+            tf  = tfs.astype(np.float32)
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + norm[docs])
+
+        hits = np.flatnonzero(scores > 0)
+        if ticker is not None:
+            code = self._ticker_codes.get(ticker.upper())
+            hits = hits[self._codes[hits] == code] if code is not None else hits[:0]
+        if start is not None:
+            hits = hits[self._ts[hits] >= to_epoch(start)]
+        if end is not None:
+            hits = hits[(self._ts[hits] <= to_epoch(end)) & (self._ts[hits] != MISSING_TS)]
+        if not hits.size:
+            return []
+
+        k = min(k, hits.size)
+        top = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.ids[r], float(scores[r])) for r in top]
+
+    # ── persistence ──────────────────────────────────────────────────────────
+    def save(self) -> None:
+        with self._lock:       # no add() may slip in between compaction and write
+            self._compact()
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            terms = [None] * len(self._terms)
+            for term, tid in self._terms.items():
+                terms[tid] = term
+            tmp = self.path + ".tmp"
+            with open(tmp, "wb") as fh:
+                np.savez(fh, ids=np.array(self.ids, dtype=object),
+                         terms=np.array(terms, dtype=object),
+                         tickers=np.array(self._tickers, dtype=object),
+                         indptr=self._indptr, postings=self._postings, tfs=self._tfs,
+                         doc_len=self._doc_len, codes=self._codes, ts=self._ts,
+                         params=np.array([self.k1, self.b]))
+            os.replace(tmp, self.path)
+            self.dirty = False
+        logger.info(f"Saved BM25 index ({len(self.ids)} articles, {len(self._terms)} terms, "
+                    f"{len(self._postings)} postings) to {self.path}")
+
+    @classmethod
+    def load(cls, path: str = INDEX_PATH) -> "BM25Index":
+        if not os.path.exists(path):
+            return cls(path=path)
+        with np.load(path, allow_pickle=True) as data:
+            k1, b = (float(x) for x in data["params"])
+            index = cls(k1, b, path)
+            index.ids      = data["ids"].tolist()
+            index._terms   = {t: i for i, t in enumerate(data["terms"].tolist())}
+            index._tickers = data["tickers"].tolist()
+            index._indptr, index._postings, index._tfs = data["indptr"], data["postings"], data["tfs"]
+            index._doc_len, index._codes, index._ts = data["doc_len"], data["codes"], data["ts"]
+        index._rows = {doc_id: row for row, doc_id in enumerate(index.ids)}
+        index._ticker_codes = {t: c for c, t in enumerate(index._tickers)}
+        return index
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Process-wide index
+# ─────────────────────────────────────────────────────────────────────────────
+_index: Optional[BM25Index] = None
+_index_lock = threading.Lock()
+
+def get_bm25_index() -> BM25Index:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = BM25Index.load()
+    return _index
+
+
+def save_bm25_index() -> None:
+    if _index is not None and _index.dirty:
+        _index.save()
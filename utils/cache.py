@@ -0,0 +1,111 @@
+import os
+import json
+import hashlib
+import functools
+from typing import Any, Callable, Dict, Optional
+
+import diskcache
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Configuration
+# ─────────────────────────────────────────────────────────────────────────────
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_ROOT   = os.getenv("CACHE_DIR", os.path.join(PROJECT_ROOT, ".cache"))
+
+HTTP_CACHE_SIZE_LIMIT = int(os.getenv("HTTP_CACHE_SIZE_MB", "512")) * 2**20
+
+# TTL (seconds) per upstream endpoint
+ENDPOINT_TTLS: Dict[str, int] = {
+    "newsapi":      30 * 60,        # headlines move fast
+    "tiingo_daily": 6 * 60 * 60,    # EOD bars only change once a day
+    "yf_history":   60 * 60,
+    "yf_info":      6 * 60 * 60,    # matches economic_data_agent.CACHE_TTL
+}
+
+# HTTP_CACHE_BYPASS=1 → skip reads (fresh results are still written back)
+_bypass = os.getenv("HTTP_CACHE_BYPASS", "0") == "1"
+
+_caches: Dict[str, diskcache.Cache] = {}
+_stats: Dict[str, Dict[str, int]] = {}
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Cache handles
+# ─────────────────────────────────────────────────────────────────────────────
+def get_cache(namespace: str, size_limit: int = HTTP_CACHE_SIZE_LIMIT) -> diskcache.Cache:
+    """
+    Return the process-wide diskcache for `namespace` (one directory per
+    namespace under CACHE_ROOT), evicting least-recently-used entries once
+    `size_limit` bytes are exceeded.
+    """
+    if namespace not in _caches:
+        _caches[namespace] = diskcache.Cache(
+            os.path.join(CACHE_ROOT, namespace),
+            size_limit=size_limit,
+            eviction_policy="least-recently-used",
+        )
+    return _caches[namespace]
+
+
+def set_bypass(flag: bool = True) -> None:
+    global _bypass
+    _bypass = flag
+
+
+def is_bypassed() -> bool:
+    return _bypass
+
+
+def make_key(*parts: Any) -> str:
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+# ─────────────────────────────────────────────────────────────────────────────
+# HTTP response cache
+# ─────────────────────────────────────────────────────────────────────────────
+def _count(endpoint: str, outcome: str) -> None:
+    _stats.setdefault(endpoint, {"hits": 0, "misses": 0})[outcome] += 1
+
+
+def http_get(endpoint: str, key: str) -> Optional[Any]:
+    """Return the cached payload for `key`, or None on miss/bypass."""
+    if _bypass:
+        _count(endpoint, "misses")
+        return None
+    value = get_cache("http").get(f"{endpoint}:{key}")
+    _count(endpoint, "misses" if value is None else "hits")
+    return value
+
+
+def http_set(endpoint: str, key: str, value: Any, ttl: Optional[int] = None) -> None:
+    if value is None:
+        return
+    get_cache("http").set(f"{endpoint}:{key}", value,
+                          expire=ttl if ttl is not None else ENDPOINT_TTLS.get(endpoint))
+
+
+def cached(endpoint: str, ttl: Optional[int] = None) -> Callable:
+    """
+    Decorator: memoise a network call on disk, keyed by `endpoint` and the
+    call arguments. Apply it *inside* any @retry so failures are never cached.
+    """
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key   = make_key(fn.__qualname__, args, kwargs)
+            value = http_get(endpoint, key)
+            if value is not None:
+                return value
+            value = fn(*args, **kwargs)
+            http_set(endpoint, key, value, ttl)
+            return value
+        return wrapper
+    return decorator
+
+
+def http_cache_stats() -> Dict[str, Dict[str, int]]:
+    """Per-endpoint hit/miss counts for this process."""
+    return {k: dict(v) for k, v in _stats.items()}
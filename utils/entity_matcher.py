@@ -0,0 +1,89 @@
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Name normalisation
+# ─────────────────────────────────────────────────────────────────────────────
+_CORP_SUFFIX = re.compile(
+    r"[\s,]+(inc\.?|incorporated|corp\.?|corporation|co\.?|company|ltd\.?|"
+    r"limited|plc|a/s|ag|sa|n\.v\.|holdings?)$"
+)
+
+def name_variants(long_name: str) -> List[str]:
+    """`Tesla, Inc.` → ['tesla, inc.', 'tesla'] (lower-cased, suffixes peeled)."""
+    name = (long_name or "").lower().strip()
+    variants = [name] if name else []
+    while name:
+        stripped = _CORP_SUFFIX.sub("", name).strip(" ,")
+        if stripped == name:
+            break
+        name = stripped
+        if name:
+            variants.append(name)
+    return variants
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Aho-Corasick automaton
+# ─────────────────────────────────────────────────────────────────────────────
+class EntityMatcher:
+    """
+    Compiled multi-pattern matcher: every pattern → entity id, matched on
+    word boundaries in one linear pass over lower-cased text.
+    """
+    def __init__(self, patterns: Dict[str, str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out:  List[List[Tuple[int, str]]] = [[]]   # (pattern length, entity)
+        for pattern, entity in patterns.items():
+            pattern = pattern.lower().strip()
+            if pattern:
+                self._insert(pattern, entity)
+        self._build()
+
+    def _insert(self, pattern: str, entity: str) -> None:
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(pattern), entity))
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> Iterable[Tuple[int, int, str]]:
+        """Yield (start, end, entity) for every word-bounded pattern hit."""
+        text = text.lower()
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length, entity in self._out[node]:
+                start, end = i - length + 1, i + 1
+                if (start == 0 or not text[start - 1].isalnum()) and \
+                   (end == len(text) or not text[end].isalnum()):
+                    yield start, end, entity
+
+    def match(self, text: str) -> List[str]:
+        """Entities in `text`, most mentioned first (ties → first seen)."""
+        counts: Dict[str, List[int]] = {}
+        for start, _, entity in self.find(text):
+            hit = counts.setdefault(entity, [0, start])
+            hit[0] += 1
+        return sorted(counts, key=lambda e: (-counts[e][0], counts[e][1]))
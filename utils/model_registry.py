@@ -0,0 +1,72 @@
+import os
+import time
+import warnings
+import threading
+from typing import Any, Callable, Dict
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Quiet ML logging without importing TensorFlow/torch up front
+# ─────────────────────────────────────────────────────────────────────────────
+def quiet_ml_logs() -> None:
+    """
+    Env-var equivalents of the old `tf.compat.v1.logging` calls. Must run
+    before transformers/torch are first imported – i.e. at module import.
+    """
+    os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "3")
+    os.environ.setdefault("TF_ENABLE_ONEDNN_OPTS", "0")
+    os.environ.setdefault("USE_TF", "0")                   # transformers: never pull in TensorFlow
+    warnings.filterwarnings("ignore", category=UserWarning)
+
+
+def configure_torch() -> None:
+    """Torch JIT profiling tweaks, applied lazily once torch is loaded."""
+    import torch
+    torch._C._jit_set_profiling_executor(False)
+    torch._C._jit_set_profiling_mode(False)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Lazy, process-wide model registry
+# ─────────────────────────────────────────────────────────────────────────────
+_factories: Dict[str, Callable[[], Any]] = {}
+_instances: Dict[str, Any] = {}
+_locks:     Dict[str, threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+
+def register_model(name: str, factory: Callable[[], Any]) -> None:
+    """Declare how to build `name`; nothing is loaded until `get_model`."""
+    with _registry_lock:
+        _factories[name] = factory
+        _locks.setdefault(name, threading.Lock())
+
+
+def get_model(name: str) -> Any:
+    """Return the single per-process instance of `name`, loading it on first use."""
+    if name in _instances:
+        return _instances[name]
+    if name not in _factories:
+        raise KeyError(f"No model registered under {name!r}.")
+    with _locks[name]:
+        if name not in _instances:
+            t0 = time.perf_counter()
+            _instances[name] = _factories[name]()
+            logger.info(f"Loaded model '{name}' in {time.perf_counter() - t0:.1f}s")
+    return _instances[name]
+
+
+def prewarm(name: str, *more: str) -> None:
+    """
+    Load the named models eagerly (e.g. before a timed run or in a
+    long-lived app). Names are required: registering a model is free,
+    loading every registered one is not.
+    """
+    for n in (name,) + more:
+        get_model(n)
+
+
+def is_loaded(name: str) -> bool:
+    return name in _instances
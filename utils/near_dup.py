@@ -0,0 +1,190 @@
+import os
+import re
+import zlib
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.cache import CACHE_ROOT
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Configuration
+# ─────────────────────────────────────────────────────────────────────────────
+INDEX_PATH        = os.path.join(CACHE_ROOT, "near_dup_index.npz")
+NUM_PERM          = 128          # MinHash permutations
+BANDS             = 16           # LSH bands → 8 rows each, candidate threshold ≈ 0.71
+SHINGLE_WORDS     = 3            # word n-gram size
+JACCARD_THRESHOLD = 0.8          # estimated similarity to call it a repost
+
+_PRIME      = np.uint64((1 << 31) - 1)
+_TRUNCATED  = re.compile(r"\s*(…|\.\.\.)?\s*\[\+\d+ chars\]\s*$")
+_TOKEN      = re.compile(r"[a-z0-9]+")
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Shingling
+# ─────────────────────────────────────────────────────────────────────────────
+def article_text(title: Optional[str], content: Optional[str]) -> str:
+    """Title + content with NewsAPI's `… [+1234 chars]` tail removed."""
+    title   = title if isinstance(title, str) else ""
+    content = content if isinstance(content, str) else ""
+    return f"{title} {_TRUNCATED.sub('', content)}".strip()
+
+
+def shingles(text: str, k: int = SHINGLE_WORDS) -> np.ndarray:
+    tokens = _TOKEN.findall(text.lower())
+    if len(tokens) < k:
+        grams = [" ".join(tokens)] if tokens else []
+    else:
+        grams = [" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)]
+    return np.unique(np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams),
+                                 dtype=np.uint64, count=len(grams)))
+
+# ─────────────────────────────────────────────────────────────────────────────
+# MinHash + LSH index
+# ─────────────────────────────────────────────────────────────────────────────
+class MinHashIndex:
+    """
+    Incremental near-duplicate index over article shingles.
+
+    Only canonical articles are stored; `match_or_add` returns the canonical
+    doc id for a repost, or registers the article as a new canonical.
+    """
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = BANDS,
+                 threshold: float = JACCARD_THRESHOLD, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands.")
+        rng = np.random.RandomState(seed)
+        self.num_perm  = num_perm
+        self.bands     = bands
+        self.rows      = num_perm // bands
+        self.threshold = threshold
+        self._a = rng.randint(1, int(_PRIME), num_perm).astype(np.uint64)
+        self._b = rng.randint(0, int(_PRIME), num_perm).astype(np.uint64)
+
+        self.ids: List[str] = []
+        self._sigs: List[np.ndarray] = []
+        self._buckets: Dict[Tuple[int, bytes], List[int]] = {}
+        self._lock  = threading.Lock()
+        self.dirty  = False
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        sh = shingles(text)
+        if not sh.size:
+            return None
+        hashed = (self._a[:, None] * sh[None, :] + self._b[:, None]) % _PRIME
+        return hashed.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, sig: np.ndarray):
+        for band in range(self.bands):
+            yield band, sig[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def query(self, sig: np.ndarray) -> Optional[str]:
+        """Best canonical id with estimated Jaccard ≥ threshold, else None."""
+        candidates = {row for key in self._band_keys(sig)
+                      for row in self._buckets.get(key, ())}
+        best, best_sim = None, self.threshold
+        for row in candidates:
+            sim = float(np.mean(self._sigs[row] == sig))
+            if sim >= best_sim:
+                best, best_sim = self.ids[row], sim
+        return best
+
+    def add(self, doc_id: str, sig: np.ndarray) -> None:
+        row = len(self.ids)
+        self.ids.append(doc_id)
+        self._sigs.append(sig)
+        for key in self._band_keys(sig):
+            self._buckets.setdefault(key, []).append(row)
+        self.dirty = True
+
+    def match_or_add(self, doc_id: str, text: str) -> Optional[str]:
+        """
+        Return the canonical id if `text` is a near-duplicate of an indexed
+        article; otherwise index it under `doc_id` and return None.
+        """
+        sig = self.signature(text)
+        if sig is None:
+            return None
+        with self._lock:
+            canonical = self.query(sig)
+            if canonical is None or canonical == doc_id:
+                if canonical is None:
+                    self.add(doc_id, sig)
+                return None
+            return canonical
+
+    # ── persistence ──────────────────────────────────────────────────────────
+    def save(self, path: str = INDEX_PATH) -> None:
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            sigs = (np.vstack(self._sigs) if self._sigs
+                    else np.empty((0, self.num_perm), dtype=np.uint32))
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as fh:
+                np.savez(fh, sigs=sigs, ids=np.array(self.ids, dtype=object),
+                         params=np.array([self.num_perm, self.bands]),
+                         threshold=np.array([self.threshold]))
+            os.replace(tmp, path)
+            self.dirty = False
+        logger.info(f"Saved near-dup index ({len(self.ids)} canonical articles) to {path}")
+
+    @classmethod
+    def load(cls, path: str = INDEX_PATH) -> "MinHashIndex":
+        if not os.path.exists(path):
+            return cls()
+        with np.load(path, allow_pickle=True) as data:
+            num_perm, bands = (int(x) for x in data["params"])
+            index = cls(num_perm=num_perm, bands=bands,
+                        threshold=float(data["threshold"][0]))
+            for doc_id, sig in zip(data["ids"], data["sigs"]):
+                index.add(str(doc_id), sig)
+        index.dirty = False
+        return index
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Process-wide index
+# ─────────────────────────────────────────────────────────────────────────────
+_index: Optional[MinHashIndex] = None
+_index_lock = threading.Lock()
+
+def get_index() -> MinHashIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = MinHashIndex.load()
+    return _index
+
+
+def save_index() -> None:
+    if _index is not None and _index.dirty:
+        _index.save()
+
+# ─────────────────────────────────────────────────────────────────────────────
+# CLI: measure / seed from an export (e.g. Data Analysis/Data/news.csv)
+# ─────────────────────────────────────────────────────────────────────────────
+if __name__ == "__main__":
+    import argparse
+    import pandas as pd
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("csv", help="news export with doc_id, title, content columns")
+    ap.add_argument("--seed", action="store_true", help="persist the canonical articles")
+    args = ap.parse_args()
+
+    df    = pd.read_csv(args.csv)
+    index = get_index() if args.seed else MinHashIndex()
+    dups  = 0
+    for row in df.itertuples():
+        if index.match_or_add(str(row.doc_id), article_text(row.title, row.content)):
+            dups += 1
+    print(f"🔁 {dups} of {len(df)} articles are near-duplicates "
+          f"({len(index)} canonical).")
+    if args.seed:
+        save_index()
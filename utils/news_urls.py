@@ -0,0 +1,30 @@
+import hashlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# ─────────────────────────────────────────────────────────────────────────────
+# URL → news document id (pure helpers, shared by ingest and the daily run)
+# ─────────────────────────────────────────────────────────────────────────────
+_TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "cmpid", "ref", "src"}
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalise a NewsAPI URL so syndicated tracking variants collapse:
+    lower-case scheme/host, drop `www.`, fragments, utm_*/click-id params
+    and trailing slashes; keep remaining query params in sorted order.
+    """
+    parts = urlsplit(url.strip())
+    host  = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower() or "https", host, path, urlencode(query), ""))
+
+
+def news_doc_id(url: str) -> str:
+    """Stable Firestore document id for a news article (sha1 of canonical URL)."""
+    return hashlib.sha1(canonicalize_url(url).encode("utf-8")).hexdigest()
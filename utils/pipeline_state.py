@@ -0,0 +1,163 @@
+import os
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, FrozenSet, List, Optional
+
+from utils.cache import CACHE_ROOT
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Configuration
+# ─────────────────────────────────────────────────────────────────────────────
+STATE_PATH  = os.path.join(CACHE_ROOT, "pipeline_state.sqlite")
+ALL_TICKERS = "*"        # key for run-wide stages (e.g. FinBERT scoring)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    run_date     TEXT NOT NULL,
+    ticker       TEXT NOT NULL,
+    stage        TEXT NOT NULL,
+    payload      TEXT NOT NULL,
+    seconds      REAL,
+    completed_at TEXT NOT NULL,
+    PRIMARY KEY (run_date, ticker, stage)
+)
+"""
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Checkpoint store
+# ─────────────────────────────────────────────────────────────────────────────
+class CheckpointStore:
+    """
+    Local SQLite record of completed pipeline stages, keyed by
+    (run_date, ticker, stage) with the stage's JSON payload. Safe to share
+    between worker threads.
+    """
+    def __init__(self, path: str = STATE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path  = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(_SCHEMA)
+
+    def get(self, run_date: str, ticker: str, stage: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM checkpoints WHERE run_date=? AND ticker=? AND stage=?",
+                (run_date, ticker, stage)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def done(self, run_date: str, ticker: str, stage: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM checkpoints WHERE run_date=? AND ticker=? AND stage=?",
+                (run_date, ticker, stage)).fetchone() is not None
+
+    def put(self, run_date: str, ticker: str, stage: str, payload: Any,
+            seconds: Optional[float] = None) -> None:
+        blob = json.dumps(payload, default=str)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?)",
+                (run_date, ticker, stage, blob, seconds,
+                 datetime.now(timezone.utc).isoformat()))
+
+    def clear(self, run_date: str, ticker: Optional[str] = None,
+              stage: Optional[str] = None) -> int:
+        sql, args = "DELETE FROM checkpoints WHERE run_date=?", [run_date]
+        if ticker is not None:
+            sql, args = sql + " AND ticker=?", args + [ticker]
+        if stage is not None:
+            sql, args = sql + " AND stage=?", args + [stage]
+        with self._lock, self._conn:
+            return self._conn.execute(sql, args).rowcount
+
+    def summary(self, run_date: str) -> Dict[str, Dict[str, float]]:
+        """{ticker: {stage: seconds}} of everything completed for `run_date`."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ticker, stage, seconds FROM checkpoints WHERE run_date=?",
+                (run_date,)).fetchall()
+        out: Dict[str, Dict[str, float]] = {}
+        for ticker, stage, seconds in rows:
+            out.setdefault(ticker, {})[stage] = seconds
+        return out
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Stage runner
+# ─────────────────────────────────────────────────────────────────────────────
+class SkipTicker(Exception):
+    """Nothing further to do for this ticker today (e.g. no qualifying headlines)."""
+
+
+class StageNotReady(Exception):
+    """An upstream stage has no checkpoint for this run yet."""
+
+
+@dataclass
+class StageRun:
+    """
+    One run of an ordered stage registry: `stages` maps name → fn(stock, run)
+    returning the JSON payload to checkpoint; `global_stages` are keyed
+    under ALL_TICKERS and run once per run.
+    """
+    run_date:      str                          # YYYY-MM-DD (UTC), checkpoint key
+    state:         CheckpointStore
+    stages:        Dict[str, Callable[[str, "StageRun"], dict]]
+    global_stages: FrozenSet[str] = frozenset()
+    force:         bool = False
+    stocks:        List[str] = field(default_factory=list)
+    skipped:       List[tuple] = field(default_factory=list)
+
+
+def upstream(run: StageRun, stock: str, stage: str) -> Any:
+    payload = run.state.get(run.run_date, stock, stage)
+    if payload is None:
+        raise StageNotReady(f"{stock}: stage '{stage}' has not completed for {run.run_date}")
+    return payload
+
+
+def invalidate_downstream(stage: str, stock: str, run: StageRun) -> None:
+    """
+    Drop checkpoints that were derived from `stage`. A per-ticker stage
+    clears that ticker's later stages (and later global ones, which must
+    cover its new output); a forced global stage clears the later stages of
+    every ticker in the run.
+    """
+    order   = list(run.stages)
+    later   = order[order.index(stage) + 1:]
+    is_global = stage in run.global_stages
+    tickers = [stock] if not is_global else (run.stocks if run.force else [])
+    if not is_global:
+        for s in later:
+            if s in run.global_stages:
+                run.state.clear(run.run_date, ALL_TICKERS, s)
+    for ticker in tickers:
+        for s in later:
+            if s not in run.global_stages:
+                run.state.clear(run.run_date, ticker, s)
+
+
+def run_stage(stage: str, stock: str, run: StageRun) -> Any:
+    """
+    Run one stage unless its checkpoint exists (or `run.force`); returns its
+    payload. Recomputing a stage invalidates its downstream checkpoints;
+    "skipped" results are not persisted, so a later rerun looks again.
+    """
+    key = ALL_TICKERS if stage in run.global_stages else stock
+    payload = None if run.force else run.state.get(run.run_date, key, stage)
+    if payload is not None:
+        run.skipped.append((key, stage))
+        return payload
+
+    t0 = time.perf_counter()
+    payload = run.stages[stage](stock, run)
+    invalidate_downstream(stage, stock, run)
+    if payload.get("skipped"):
+        raise SkipTicker(payload["skipped"])
+    run.state.put(run.run_date, key, stage, payload, time.perf_counter() - t0)
+    return payload
@@ -0,0 +1,45 @@
+import time
+import asyncio
+from typing import Optional
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Shared request budget for concurrent API fetchers
+# ─────────────────────────────────────────────────────────────────────────────
+class NewsQuotaExhausted(Exception):
+    pass
+
+
+class TokenBucket:
+    """
+    Shared asyncio token bucket: `rate` requests/sec sustained, `capacity`
+    burst, and an optional hard `quota` of requests for the whole run.
+    A 429 from NewsAPI calls `exhaust()` so every ticker stops paging.
+    """
+    def __init__(self, rate: float, capacity: int, quota: Optional[int] = None):
+        self.rate      = rate
+        self.capacity  = capacity
+        self.tokens    = float(capacity)
+        self.remaining = quota
+        self.used      = 0
+        self._updated  = time.monotonic()
+        self._lock     = asyncio.Lock()
+
+    def exhaust(self):
+        self.remaining = 0
+
+    async def acquire(self):
+        async with self._lock:
+            if self.remaining is not None and self.remaining <= 0:
+                raise NewsQuotaExhausted("NewsAPI request quota exhausted.")
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity,
+                                  self.tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self.tokens >= 1:
+                    break
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+            self.tokens -= 1
+            self.used   += 1
+            if self.remaining is not None:
+                self.remaining -= 1
@@ -0,0 +1,124 @@
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.vector_index import MISSING_TS, to_epochs
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Configuration
+# ─────────────────────────────────────────────────────────────────────────────
+LABELS          = ("positive", "neutral", "negative")
+LABEL_SIGN      = np.array([1.0, 0.0, -1.0], dtype=np.float64)
+UNKNOWN_LABEL   = -1
+HALF_LIFE_HOURS = float(os.getenv("SENTIMENT_HALF_LIFE_HOURS", "12"))
+TS_FIELDS       = ("ingested_at", "timestamp")      # first present field wins
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Columnar batch
+# ─────────────────────────────────────────────────────────────────────────────
+@dataclass
+class SentimentColumns:
+    labels:    np.ndarray     # int8 index into LABELS, -1 = unscored / unknown
+    scores:    np.ndarray     # float64 FinBERT confidence, 0 where missing
+    ts:        np.ndarray     # int64 epoch seconds, MISSING_TS where unparsable
+    tickers:   np.ndarray     # object, economic_data_id
+    canonical: np.ndarray     # bool, first article of its repost cluster
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @property
+    def signed(self) -> np.ndarray:
+        """+score for positive, −score for negative, 0 otherwise."""
+        sign = np.where(self.labels >= 0, LABEL_SIGN[np.maximum(self.labels, 0)], 0.0)
+        return sign * self.scores
+
+    def take(self, idx: np.ndarray) -> "SentimentColumns":
+        return SentimentColumns(self.labels[idx], self.scores[idx], self.ts[idx],
+                                self.tickers[idx], self.canonical[idx])
+
+
+def to_columns(documents: List[dict], ts_fields=TS_FIELDS) -> SentimentColumns:
+    """Lower-case labels, scores, timestamps and cluster flags parsed once for the batch."""
+    df = pd.DataFrame.from_records(
+        [{"label":   d.get("sentiment_label"),
+          "score":   d.get("sentiment_score"),
+          "ts":      next((d[f] for f in ts_fields if d.get(f)), None),
+          "ticker":  d.get("economic_data_id"),
+          "cluster": d.get("cluster_id")} for d in documents],
+        columns=["label", "score", "ts", "ticker", "cluster"],
+    )
+    labels = (df["label"].astype("string").str.lower()
+              .map({l: i for i, l in enumerate(LABELS)})
+              .fillna(UNKNOWN_LABEL).to_numpy(dtype=np.int8))
+    scores = pd.to_numeric(df["score"], errors="coerce").fillna(0.0).to_numpy(dtype=np.float64)
+    cluster = df["cluster"].where(df["cluster"].astype(bool) & df["cluster"].notna())
+    canonical = ~(cluster.notna() & cluster.duplicated()).to_numpy()
+    return SentimentColumns(labels, scores, to_epochs(df["ts"]),
+                            df["ticker"].to_numpy(dtype=object), canonical)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Aggregates
+# ─────────────────────────────────────────────────────────────────────────────
+def decay_weights(ts: np.ndarray, now: Optional[float] = None,
+                  half_life_hours: float = HALF_LIFE_HOURS) -> np.ndarray:
+    """2^(−age / half-life); 0 for articles without a timestamp."""
+    now = time.time() if now is None else now
+    age_h = np.maximum(now - ts.astype(np.float64), 0.0) / 3600.0
+    return np.where(ts == MISSING_TS, 0.0, np.exp2(-age_h / half_life_hours))
+
+
+def aggregate(cols: SentimentColumns, dedupe_clusters: bool = True,
+              now: Optional[float] = None, half_life_hours: float = HALF_LIFE_HOURS) -> Dict:
+    """
+    Per-label score sums and counts, the plain net score (Σ signed) and the
+    exponentially time-decayed net score. With `dedupe_clusters` each repost
+    cluster contributes once (its first article).
+    """
+    keep = cols.canonical if dedupe_clusters else np.ones(len(cols), dtype=bool)
+    keep = keep & (cols.labels >= 0)
+    lbl  = cols.labels[keep].astype(np.intp)
+    sums   = np.bincount(lbl, weights=cols.scores[keep], minlength=len(LABELS))
+    counts = np.bincount(lbl, minlength=len(LABELS))
+    signed = cols.signed[keep]
+    w      = decay_weights(cols.ts[keep], now, half_life_hours)
+    return {
+        "sums":        {l: float(s) for l, s in zip(LABELS, sums)},
+        "counts":      {l: int(c) for l, c in zip(LABELS, counts)},
+        "net":         float(signed.sum()),
+        "decayed_net": float((signed * w).sum()),
+        "n":           int(keep.sum()),
+    }
+
+
+def aggregate_by_ticker(cols: SentimentColumns, dedupe_clusters: bool = True,
+                        now: Optional[float] = None,
+                        half_life_hours: float = HALF_LIFE_HOURS) -> Dict[str, Dict]:
+    """`aggregate` for every ticker in the batch, in one bincount pass."""
+    keep = cols.canonical if dedupe_clusters else np.ones(len(cols), dtype=bool)
+    keep = keep & (cols.labels >= 0)
+    names = pd.Series(cols.tickers[keep], dtype=object).fillna("").astype(str).to_numpy()
+    tickers, inv = np.unique(names, return_inverse=True)
+    n_t, n_l = len(tickers), len(LABELS)
+    lbl    = cols.labels[keep].astype(np.intp)
+    cell   = inv * n_l + lbl
+    sums   = np.bincount(cell, weights=cols.scores[keep], minlength=n_t * n_l).reshape(n_t, n_l)
+    counts = np.bincount(cell, minlength=n_t * n_l).reshape(n_t, n_l)
+    signed = cols.signed[keep]
+    w      = decay_weights(cols.ts[keep], now, half_life_hours)
+    net    = np.bincount(inv, weights=signed, minlength=n_t)
+    dnet   = np.bincount(inv, weights=signed * w, minlength=n_t)
+    return {
+        str(t): {
+            "sums":        {l: float(s) for l, s in zip(LABELS, sums[i])},
+            "counts":      {l: int(c) for l, c in zip(LABELS, counts[i])},
+            "net":         float(net[i]),
+            "decayed_net": float(dnet[i]),
+            "n":           int(counts[i].sum()),
+        }
+        for i, t in enumerate(tickers)
+    }
@@ -0,0 +1,61 @@
+import re
+from typing import List
+
+import numpy as np
+
+_SENTENCE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'“])")
+_WORD     = re.compile(r"[a-z][a-z0-9'-]+")
+_STOP     = frozenset("""
+a an and are as at be but by for from has have he her his in is it its of on or
+that the their they this to was were will with which who would said says also
+""".split())
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Extractive TextRank summariser (NumPy only)
+# ─────────────────────────────────────────────────────────────────────────────
+def split_sentences(text: str) -> List[str]:
+    text = re.sub(r"\s*\[\+\d+ chars\]\s*$", "", text.strip())
+    return [s.strip() for s in _SENTENCE.split(text) if s.strip()]
+
+
+def textrank_summary(text: str, max_sentences: int = 2, damping: float = 0.85,
+                     iterations: int = 50, tol: float = 1e-6) -> str:
+    """
+    Pick the `max_sentences` most central sentences (PageRank over a cosine
+    similarity graph of bag-of-words vectors), returned in original order.
+    """
+    sentences = split_sentences(text or "")
+    if len(sentences) <= max_sentences:
+        return " ".join(sentences)
+
+    bags  = [[w for w in _WORD.findall(s.lower()) if w not in _STOP] for s in sentences]
+    vocab = {w: i for i, w in enumerate(sorted({w for bag in bags for w in bag}))}
+    if not vocab:
+        return " ".join(sentences[:max_sentences])
+
+    tf = np.zeros((len(sentences), len(vocab)), dtype=np.float32)
+    for row, bag in enumerate(bags):
+        for w in bag:
+            tf[row, vocab[w]] += 1.0
+    idf = np.log(len(sentences) / (1.0 + (tf > 0).sum(axis=0))) + 1.0
+    vec = tf * idf
+    norms = np.linalg.norm(vec, axis=1, keepdims=True)
+    vec  /= np.where(norms == 0, 1.0, norms)
+
+    sim = vec @ vec.T
+    np.fill_diagonal(sim, 0.0)
+    out_weight = sim.sum(axis=1, keepdims=True)
+    transition = np.divide(sim, out_weight, out=np.full_like(sim, 1.0 / len(sentences)),
+                           where=out_weight > 0)
+
+    n = len(sentences)
+    rank = np.full(n, 1.0 / n, dtype=np.float32)
+    for _ in range(iterations):
+        new_rank = (1 - damping) / n + damping * (transition.T @ rank)
+        if np.abs(new_rank - rank).sum() < tol:
+            rank = new_rank
+            break
+        rank = new_rank
+
+    keep = sorted(np.argsort(-rank, kind="stable")[:max_sentences])
+    return " ".join(sentences[i] for i in keep)
@@ -0,0 +1,247 @@
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from utils.cache import CACHE_ROOT
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Configuration
+# ─────────────────────────────────────────────────────────────────────────────
+INDEX_DIR   = os.path.join(CACHE_ROOT, "vector_index")
+VECTORS_BIN = "vectors.f16"      # row-major float16, appended in place
+META_FILE   = "meta.npz"         # ids, ticker codes, timestamps, dim, row count
+MISSING_TS  = np.iinfo(np.int64).min
+_EPOCH      = pd.Timestamp(0, tz="UTC")
+
+Timestamp = Union[str, datetime, None]
+
+
+def to_epochs(values: Iterable[Timestamp]) -> np.ndarray:
+    """ISO strings / datetimes → UTC epoch seconds (MISSING_TS where unparsable)."""
+    ts = pd.to_datetime(pd.Series(list(values), dtype=object), utc=True,
+                        errors="coerce", format="ISO8601")
+    out = np.full(len(ts), MISSING_TS, dtype=np.int64)
+    ok = ts.notna().to_numpy()
+    out[ok] = ((ts[ok] - _EPOCH) // pd.Timedelta(seconds=1)).to_numpy(dtype=np.int64)
+    return out
+
+
+def to_epoch(value: Timestamp) -> int:
+    return int(to_epochs([value])[0])
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Cosine top-k index
+# ─────────────────────────────────────────────────────────────────────────────
+class _Partition:
+    """Contiguous float32 rows of one ticker, so filtered search is one matvec."""
+    def __init__(self, dim: int):
+        self.n    = 0
+        self.vecs = np.empty((0, dim), dtype=np.float32)
+        self.ts   = np.empty(0, dtype=np.int64)
+        self.rows = np.empty(0, dtype=np.int64)     # global row ids
+
+    def extend(self, vecs: np.ndarray, ts: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        need = self.n + len(rows)
+        if need > len(self.rows):
+            cap = max(need, 2 * len(self.rows), 256)
+            for name in ("vecs", "ts", "rows"):
+                old = getattr(self, name)
+                new = np.empty((cap,) + old.shape[1:], dtype=old.dtype)
+                new[:self.n] = old[:self.n]
+                setattr(self, name, new)
+        local = np.arange(self.n, need)
+        self.vecs[local], self.ts[local], self.rows[local] = vecs, ts, rows
+        self.n = need
+        return local
+
+    def top_k(self, q: np.ndarray, k: int, lo: int, hi: int) -> Tuple[np.ndarray, np.ndarray]:
+        scores = self.vecs[:self.n] @ q
+        if lo != MISSING_TS or hi != np.iinfo(np.int64).max:
+            ts = self.ts[:self.n]
+            scores[(ts < lo) | (ts > hi) | (ts == MISSING_TS)] = -np.inf
+        k = min(k, scores.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.isfinite(scores[top])]
+        return self.rows[top], scores[top]
+
+
+class VectorIndex:
+    """
+    Append-only embedding index with an id map and per-row ticker/time
+    metadata for filtered top-k cosine search.
+
+    Rows are L2-normalised on insert, so cosine similarity is a dot product.
+    On disk the matrix is one float16 file in insertion order (memory-mapped
+    on load); in memory rows live in float32 per-ticker partitions so a
+    ticker-filtered query is a single contiguous BLAS matvec.
+    """
+    def __init__(self, dim: int, path: str = INDEX_DIR):
+        self.dim  = dim
+        self.path = path
+        self.ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._tickers: List[str] = []
+        self._ticker_codes: Dict[str, int] = {}
+        self._parts: List[_Partition] = []
+        self._codes = np.empty(0, dtype=np.int32)   # per global row
+        self._local = np.empty(0, dtype=np.int64)   # row within its partition
+        self._ts    = np.empty(0, dtype=np.int64)
+        self._saved = 0                             # rows already in VECTORS_BIN
+        self._lock  = threading.Lock()
+        self.dirty  = False
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._rows
+
+    def _code(self, ticker: Optional[str]) -> int:
+        ticker = ticker.upper() if isinstance(ticker, str) else ""
+        if ticker not in self._ticker_codes:
+            self._ticker_codes[ticker] = len(self._tickers)
+            self._tickers.append(ticker)
+            self._parts.append(_Partition(self.dim))
+        return self._ticker_codes[ticker]
+
+    def _append(self, ids: List[str], vecs: np.ndarray, codes: np.ndarray, ts: np.ndarray) -> None:
+        start = len(self.ids)
+        rows  = np.arange(start, start + len(ids))
+        local = np.empty(len(ids), dtype=np.int64)
+        for code in np.unique(codes):
+            sel = codes == code
+            local[sel] = self._parts[code].extend(vecs[sel], ts[sel], rows[sel])
+        self._codes = np.concatenate([self._codes[:start], codes.astype(np.int32)])
+        self._local = np.concatenate([self._local[:start], local])
+        self._ts    = np.concatenate([self._ts[:start], ts])
+        for row, doc_id in zip(rows, ids):
+            self._rows[doc_id] = int(row)
+        self.ids.extend(ids)
+
+    def add(self, ids: Iterable[str], vectors: np.ndarray,
+            tickers: Iterable[Optional[str]], timestamps: Iterable[Timestamp]) -> int:
+        """Append rows for ids not yet indexed; returns how many were added."""
+        ids, tickers, timestamps = list(ids), list(tickers), list(timestamps)
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1.0, norms)
+        epochs = to_epochs(timestamps)
+        with self._lock:
+            keep, seen = [], set()
+            for i, doc_id in enumerate(ids):
+                if doc_id not in self._rows and doc_id not in seen:
+                    keep.append(i)
+                    seen.add(doc_id)
+            if not keep:
+                return 0
+            codes = np.array([self._code(tickers[i]) for i in keep], dtype=np.int32)
+            self._append([ids[i] for i in keep], vectors[keep], codes, epochs[keep])
+            self.dirty = True
+            return len(keep)
+
+    def vector(self, doc_id: str) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._rows.get(doc_id)
+            if row is None:
+                return None
+            return self._parts[self._codes[row]].vecs[self._local[row]].copy()
+
+    def search(self, query: np.ndarray, k: int = 10, ticker: Optional[str] = None,
+               start: Timestamp = None, end: Timestamp = None) -> List[Tuple[str, float]]:
+        """
+        Top-`k` (doc_id, cosine) for `query`, optionally restricted to one
+        ticker and a [start, end] publication window.
+        """
+        q = np.asarray(query, dtype=np.float32).reshape(self.dim)
+        q = q / (np.linalg.norm(q) or 1.0)
+        lo = MISSING_TS if start is None else to_epoch(start)
+        hi = np.iinfo(np.int64).max if end is None else to_epoch(end)
+
+        with self._lock:            # ingest threads may be growing partitions
+            if ticker is not None:
+                code = self._ticker_codes.get(ticker.upper())
+                parts = [] if code is None else [self._parts[code]]
+            else:
+                parts = self._parts
+            found = [p.top_k(q, k, lo, hi) for p in parts if p.n]
+            if not found:
+                return []
+            rows   = np.concatenate([r for r, _ in found])
+            scores = np.concatenate([s for _, s in found])
+            order  = np.argsort(-scores, kind="stable")[:k]
+            return [(self.ids[rows[i]], float(scores[i])) for i in order]
+
+    # ── persistence ──────────────────────────────────────────────────────────
+    def save(self) -> None:
+        """Append unsaved rows to the float16 matrix, then rewrite the metadata."""
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            n = len(self.ids)
+            fresh = np.empty((n - self._saved, self.dim), dtype=np.float16)
+            for i, row in enumerate(range(self._saved, n)):
+                fresh[i] = self._parts[self._codes[row]].vecs[self._local[row]]
+            bin_path = os.path.join(self.path, VECTORS_BIN)
+            with open(bin_path, "r+b" if os.path.exists(bin_path) else "wb") as fh:
+                # drop rows a crashed save appended without committing metadata
+                fh.seek(self._saved * self.dim * 2)
+                fh.truncate()
+                fh.write(fresh.tobytes())
+            meta = os.path.join(self.path, META_FILE)
+            with open(meta + ".tmp", "wb") as fh:
+                np.savez(fh, ids=np.array(self.ids, dtype=object),
+                         tickers=np.array(self._tickers, dtype=object),
+                         codes=self._codes, ts=self._ts,
+                         shape=np.array([n, self.dim]))
+            os.replace(meta + ".tmp", meta)
+            self._saved = n
+            self.dirty = False
+        logger.info(f"Saved vector index ({n} articles) to {self.path}")
+
+    @classmethod
+    def load(cls, dim: int, path: str = INDEX_DIR) -> "VectorIndex":
+        index = cls(dim, path)
+        meta = os.path.join(path, META_FILE)
+        if not os.path.exists(meta):
+            return index
+        with np.load(meta, allow_pickle=True) as data:
+            n, stored_dim = (int(x) for x in data["shape"])
+            if stored_dim != dim:
+                logger.warning(f"Vector index at {path} has dim {stored_dim}, "
+                               f"expected {dim} – starting empty.")
+                return index
+            ids     = [str(i) for i in data["ids"]]
+            tickers = [str(t) for t in data["tickers"]]
+            codes, ts = data["codes"].astype(np.int32), data["ts"].astype(np.int64)
+        for ticker in tickers:
+            index._code(ticker)
+        if n:
+            mm = np.memmap(os.path.join(path, VECTORS_BIN), dtype=np.float16,
+                           mode="r", shape=(n, dim))
+            index._append(ids, mm, codes, ts)
+        index._saved = n
+        return index
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Process-wide index
+# ─────────────────────────────────────────────────────────────────────────────
+_index: Optional[VectorIndex] = None
+_index_lock = threading.Lock()
+
+def get_vector_index(dim: int) -> VectorIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = VectorIndex.load(dim)
+    return _index
+
+
+def save_vector_index() -> None:
+    if _index is not None and _index.dirty:
+        _index.save()